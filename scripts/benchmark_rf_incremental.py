@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+"""Benchmark of the incremental training of the random forest (``full_fit_interval``) against fitting a new
+forest in every training.
+
+Simulates the trainings of a run of SMBO, which adds a few data points between two trainings, and prints one line
+per interval of full fits: the total training time and the quality of the predictions on held-out data points,
+averaged over all trainings, e.g.
+``python scripts/benchmark_rf_incremental.py --n_init 1000 --n_iterations 200 --intervals 1 2 5 10``.
+"""
+
+from typing import List
+
+import os
+import sys
+import time
+from argparse import ArgumentDefaultsHelpFormatter, ArgumentParser
+
+import numpy as np
+from scipy.stats import spearmanr
+
+cmd_folder = os.path.realpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+if cmd_folder not in sys.path:
+    sys.path.insert(0, cmd_folder)
+
+from ConfigSpace.hyperparameters import UniformFloatHyperparameter  # noqa: E402
+
+from smac.configspace import ConfigurationSpace  # noqa: E402
+from smac.epm.random_forest.rf_with_instances import (  # noqa: E402
+    RandomForestWithInstances,
+)
+from smac.epm.utils import get_types  # noqa: E402
+
+__copyright__ = "Copyright 2022, AutoML.org Freiburg-Hannover"
+__license__ = "3-clause BSD"
+
+
+def objective(X: np.ndarray, rng: np.random.RandomState) -> np.ndarray:
+    return np.sum((X - 0.3) ** 2, axis=1) + np.sin(10 * X[:, 0]) + 0.1 * rng.randn(X.shape[0])
+
+
+def benchmark(
+    intervals: List[int],
+    n_init: int,
+    n_iterations: int,
+    n_new: int,
+    n_test: int,
+    n_dimensions: int,
+    seed: int,
+) -> None:
+    cs = ConfigurationSpace(seed=seed)
+    for i in range(n_dimensions):
+        cs.add_hyperparameter(UniformFloatHyperparameter("x%d" % i, 0, 1))
+    types, bounds = get_types(cs)
+
+    rng = np.random.RandomState(seed)
+    n_train = n_init + n_iterations * n_new
+    X = rng.rand(n_train, n_dimensions)
+    Y = objective(X, rng)
+    X_test = rng.rand(n_test, n_dimensions)
+    Y_test = objective(X_test, rng)
+
+    for interval in intervals:
+        model = RandomForestWithInstances(cs, types, bounds, seed=seed, full_fit_interval=interval)
+        duration = 0.0
+        rmses, correlations = [], []
+        for iteration in range(n_iterations + 1):
+            n = n_init + iteration * n_new
+            start = time.time()
+            model.train(X[:n], Y[:n].reshape((-1, 1)))
+            duration += time.time() - start
+
+            means = model.predict(X_test)[0][:, 0]
+            rmses.append(np.sqrt(np.mean((means - Y_test) ** 2)))
+            correlations.append(spearmanr(means, Y_test)[0])
+
+        print(
+            "full fit every %4d trainings: training %8.3f sec | RMSE %.4f | Spearman correlation %.4f"
+            % (interval, duration, np.mean(rmses), np.mean(correlations))
+        )
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(formatter_class=ArgumentDefaultsHelpFormatter)
+    parser.add_argument("--intervals", nargs="+", type=int, default=[1, 2, 5, 10, 20], help="full_fit_interval")
+    parser.add_argument("--n_init", type=int, default=500, help="number of data points of the first training")
+    parser.add_argument("--n_iterations", type=int, default=100, help="number of trainings after the first one")
+    parser.add_argument("--n_new", type=int, default=1, help="number of data points added per training")
+    parser.add_argument("--n_test", type=int, default=1000, help="number of held-out data points")
+    parser.add_argument("--n_dimensions", type=int, default=10, help="number of continuous hyperparameters")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    benchmark(
+        intervals=args.intervals,
+        n_init=args.n_init,
+        n_iterations=args.n_iterations,
+        n_new=args.n_new,
+        n_test=args.n_test,
+        n_dimensions=args.n_dimensions,
+        seed=args.seed,
+    )
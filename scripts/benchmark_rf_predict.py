@@ -0,0 +1,184 @@
+#!/usr/bin/env python
+"""Benchmark of the predictions of the random forest: one call into pyrfr per data point versus the flattened
+forest, which predicts all data points at once with NumPy.
+
+Prints one line per number of query points, including the one-off time to flatten the trained forest and whether
+the predictions are identical, e.g. ``python scripts/benchmark_rf_predict.py --n_train 5000 --log_y``. With
+instances, the predictions marginalized over the instances are compared instead, which averages the responses of all
+instances per tree either from one call into pyrfr per pair of query point and instance or with the flattened forest,
+e.g. ``python scripts/benchmark_rf_predict.py --n_instances 1000 --sizes 10 100 1000``.
+"""
+
+from typing import List, Tuple
+
+import os
+import sys
+import time
+from argparse import ArgumentDefaultsHelpFormatter, ArgumentParser
+
+import numpy as np
+
+cmd_folder = os.path.realpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+if cmd_folder not in sys.path:
+    sys.path.insert(0, cmd_folder)
+
+from ConfigSpace.hyperparameters import (  # noqa: E402
+    CategoricalHyperparameter,
+    UniformFloatHyperparameter,
+)
+
+from smac.configspace import ConfigurationSpace  # noqa: E402
+from smac.epm.random_forest.flat_forest import FlatForest  # noqa: E402
+from smac.epm.random_forest.rf_with_instances import (  # noqa: E402
+    RandomForestWithInstances,
+)
+from smac.epm.utils import get_types  # noqa: E402
+from smac.utils.constants import VERY_SMALL_NUMBER  # noqa: E402
+
+__copyright__ = "Copyright 2022, AutoML.org Freiburg-Hannover"
+__license__ = "3-clause BSD"
+
+N_INSTANCE_FEATURES = 5
+
+
+def sample(n: int, types: List[int], rng: np.random.RandomState) -> np.ndarray:
+    X = rng.rand(n, len(types))
+    for i, n_categories in enumerate(types):
+        if n_categories > 0:
+            X[:, i] = rng.randint(n_categories, size=n)
+    return X
+
+
+def predict_per_row(model: RandomForestWithInstances, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Predictions with one call into pyrfr per data point, as done before the flattened forest."""
+    if not model.log_y:
+        return np.array([model.rf.predict_mean_var(x) for x in X]).T
+
+    all_preds = [model.rf.all_leaf_values(x) for x in X]
+    third_dimension = max(len(pred) for preds_per_tree in all_preds for pred in preds_per_tree)
+    preds_as_array = np.full((X.shape[0], model.rf_opts.num_trees, third_dimension), np.nan)
+    for i, preds_per_tree in enumerate(all_preds):
+        for j, pred in enumerate(preds_per_tree):
+            preds_as_array[i, j, : len(pred)] = pred
+    preds_as_array = np.log(np.nanmean(np.exp(preds_as_array), axis=2) + VERY_SMALL_NUMBER)
+    return preds_as_array.mean(axis=1), preds_as_array.var(axis=1)
+
+
+def predict_flat(model: RandomForestWithInstances, forest: FlatForest, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    if not model.log_y:
+        return forest.predict_mean_var(X)
+
+    preds_as_array = np.log(np.nanmean(np.exp(forest.all_leaf_values(X)), axis=2) + VERY_SMALL_NUMBER)
+    return preds_as_array.mean(axis=1), preds_as_array.var(axis=1)
+
+
+def marginalize_per_pair(model: RandomForestWithInstances, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Marginalized predictions with one call into pyrfr per pair of data point and instance, as done before the
+    flattened forest."""
+    tree_means = np.zeros((X.shape[0], model.rf_opts.num_trees))
+    for i, x in enumerate(X):
+        preds_trees = [[] for _ in range(model.rf_opts.num_trees)]  # type: List[List[float]]
+        for features in model.instance_features:
+            for tree, preds in enumerate(model.rf.all_leaf_values(np.concatenate((x, features)))):
+                preds_trees[tree] += preds
+        for tree, preds in enumerate(preds_trees):
+            tree_means[i, tree] = np.log(np.exp(np.array(preds)).mean()) if model.log_y else np.array(preds).mean()
+    return tree_means.mean(axis=1), tree_means.var(axis=1)
+
+
+def marginalize_flat(
+    model: RandomForestWithInstances, forest: FlatForest, X: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    tree_means = forest.marginalize_over_instances(X, model.instance_features, log_y=model.log_y)
+    return tree_means.mean(axis=1), tree_means.var(axis=1)
+
+
+def benchmark(
+    sizes: List[int],
+    n_train: int,
+    n_continuous: int,
+    n_categorical: int,
+    n_instances: int,
+    log_y: bool,
+    seed: int,
+) -> None:
+    cs = ConfigurationSpace(seed=seed)
+    for i in range(n_categorical):
+        cs.add_hyperparameter(CategoricalHyperparameter("c%d" % i, ["%d" % j for j in range(5)]))
+    for i in range(n_continuous):
+        cs.add_hyperparameter(UniformFloatHyperparameter("x%d" % i, 0, 1))
+    types, bounds = get_types(cs)
+
+    rng = np.random.RandomState(seed)
+    X = sample(n_train, types, rng)
+    Y = np.sum((X - 0.3) ** 2, axis=1) + 0.1 * rng.randn(n_train)
+    instance_features = None
+    if n_instances > 0:
+        instance_features = rng.rand(n_instances, N_INSTANCE_FEATURES)
+        instances = rng.randint(n_instances, size=n_train)
+        X = np.hstack((X, instance_features[instances]))
+        Y += np.sum(instance_features[instances], axis=1)
+    if log_y:
+        Y = np.log(Y - Y.min() + 1)
+
+    model = RandomForestWithInstances(
+        cs,
+        types + [0] * (X.shape[1] - len(types)),
+        bounds,
+        seed=seed,
+        log_y=log_y,
+        instance_features=instance_features,
+    )
+    start = time.time()
+    model.train(X, Y.reshape((-1, 1)))
+    print("Training on %d data points: %.3f sec" % (n_train, time.time() - start))
+
+    start = time.time()
+    forest = FlatForest(model.rf)
+    print("Flattening the forest (%d nodes): %.3f sec" % (len(forest.features), time.time() - start))
+
+    for size in sizes:
+        X_test = sample(size, types, rng)
+
+        start = time.time()
+        if n_instances > 0:
+            expected = marginalize_per_pair(model, X_test)
+        else:
+            expected = predict_per_row(model, X_test)
+        duration_per_row = time.time() - start
+
+        start = time.time()
+        if n_instances > 0:
+            means, vars_ = marginalize_flat(model, forest, X_test)
+        else:
+            means, vars_ = predict_flat(model, forest, X_test)
+        duration_flat = time.time() - start
+
+        identical = np.array_equal(means, expected[0]) and np.array_equal(vars_, expected[1])
+        difference = max(np.max(np.abs(means - expected[0]), initial=0), np.max(np.abs(vars_ - expected[1]), initial=0))
+        print(
+            "%8d query points: per row %8.3f sec | flattened %8.3f sec | speedup %6.1f | identical %s (max. diff. %g)"
+            % (size, duration_per_row, duration_flat, duration_per_row / duration_flat, identical, difference)
+        )
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(formatter_class=ArgumentDefaultsHelpFormatter)
+    parser.add_argument("--sizes", nargs="+", type=int, default=[1000, 10000, 100000], help="number of query points")
+    parser.add_argument("--n_train", type=int, default=2000, help="number of training data points")
+    parser.add_argument("--n_continuous", type=int, default=10, help="number of continuous hyperparameters")
+    parser.add_argument("--n_categorical", type=int, default=2, help="number of categorical hyperparameters")
+    parser.add_argument("--n_instances", type=int, default=0, help="number of instances to marginalize over")
+    parser.add_argument("--log_y", action="store_true", help="predict with a forest on log-transformed costs")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    benchmark(
+        sizes=args.sizes,
+        n_train=args.n_train,
+        n_continuous=args.n_continuous,
+        n_categorical=args.n_categorical,
+        n_instances=args.n_instances,
+        log_y=args.log_y,
+        seed=args.seed,
+    )
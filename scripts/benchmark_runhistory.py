@@ -0,0 +1,495 @@
+#!/usr/bin/env python
+"""Micro-benchmarks for the runhistory.
+
+Each benchmark prints one line per problem size so that the scaling behaviour can be read off
+directly, e.g. ``python scripts/benchmark_runhistory.py add --sizes 10000 20000 40000``.
+"""
+
+from typing import Callable, Dict, List, Optional
+
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from argparse import ArgumentDefaultsHelpFormatter, ArgumentParser
+
+import numpy as np
+
+cmd_folder = os.path.realpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+if cmd_folder not in sys.path:
+    sys.path.insert(0, cmd_folder)
+
+from ConfigSpace.hyperparameters import UniformFloatHyperparameter  # noqa: E402
+
+from smac.configspace import Configuration, ConfigurationSpace  # noqa: E402
+from smac.runhistory.runhistory import (  # noqa: E402
+    EnumEncoder,
+    InstSeedBudgetKey,
+    RunHistory,
+    RunKey,
+    RunValue,
+)
+from smac.runhistory.snapshot import RunHistorySnapshot, write_snapshot  # noqa: E402
+from smac.tae import StatusType  # noqa: E402
+from smac.utils.io.serialization import SERIALIZERS, get_serializer  # noqa: E402
+
+__copyright__ = "Copyright 2022, AutoML.org Freiburg-Hannover"
+__license__ = "3-clause BSD"
+
+
+def get_config_space(n_hps: int = 10, seed: int = 1) -> ConfigurationSpace:
+    """Returns a continuous configuration space with `n_hps` hyperparameters."""
+    cs = ConfigurationSpace(seed=seed)
+    for i in range(n_hps):
+        cs.add_hyperparameter(UniformFloatHyperparameter("x%d" % i, 0, 1))
+    return cs
+
+
+def get_configs(n_configs: int, n_hps: int = 10, seed: int = 1) -> List[Configuration]:
+    """Samples `n_configs` configurations from a continuous configuration space."""
+    configs = get_config_space(n_hps, seed).sample_configuration(size=n_configs)
+    if n_configs == 1:
+        configs = [configs]
+
+    return configs
+
+
+def fill_runhistory(
+    runhistory: RunHistory,
+    n_runs: int,
+    n_instances: int = 10,
+    num_obj: int = 1,
+    seed: int = 1,
+    configs: Optional[List[Configuration]] = None,
+) -> RunHistory:
+    """Adds `n_runs` runs on `n_instances` instances to the runhistory. The configurations are sampled unless
+    they are given."""
+    rng = np.random.RandomState(seed)
+    if configs is None:
+        configs = get_configs(int(np.ceil(n_runs / n_instances)), seed=seed)
+    costs = rng.rand(n_runs, num_obj)
+    status = rng.choice([StatusType.SUCCESS, StatusType.TIMEOUT, StatusType.CRASHED], p=[0.8, 0.1, 0.1], size=n_runs)
+
+    for i in range(n_runs):
+        runhistory.add(
+            config=configs[i // n_instances],
+            cost=costs[i] if num_obj > 1 else costs[i, 0],
+            time=float(costs[i, 0]),
+            status=status[i],
+            instance_id="instance_%d" % (i % n_instances),
+            seed=0,
+        )
+
+    return runhistory
+
+
+def benchmark_add(sizes: List[int], num_obj: int) -> None:
+    """Time to fill a runhistory. Should grow linearly with the number of runs."""
+    for size in sizes:
+        start = time.time()
+        fill_runhistory(RunHistory(), size, num_obj=num_obj)
+        duration = time.time() - start
+        print(
+            "add: %8d runs, %2d objectives: %8.3f sec (%6.2f us/run)" % (size, num_obj, duration, 1e6 * duration / size)
+        )
+
+
+def benchmark_costs(sizes: List[int], num_obj: int, n_instances: int = 10) -> None:
+    """Time to compute the normalized mean and the minimum cost of all configurations, one configuration after
+    the other and with the batch API."""
+    for size in sizes:
+        runhistory = fill_runhistory(RunHistory(), size, n_instances=n_instances, num_obj=num_obj)
+        configs = runhistory.get_all_configs()
+
+        start = time.time()
+        for config in configs:
+            runhistory.average_cost(config, normalize=True)
+            runhistory.min_cost(config, normalize=True)
+        duration_loop = time.time() - start
+
+        start = time.time()
+        runhistory.get_costs(configs, normalize=True)
+        duration_batch = time.time() - start
+
+        print(
+            "costs: %8d runs, %2d objectives: per config %7.3f sec | batch %7.3f sec | speedup %5.1fx"
+            % (size, num_obj, duration_loop, duration_batch, duration_loop / duration_batch)
+        )
+
+
+def fill_storage(runhistory: RunHistory, n_runs: int, num_obj: int, n_budgets: int = 4, seed: int = 1) -> None:
+    """Writes `n_runs` runs directly into the storage of the runhistory, bypassing `add`."""
+    rng = np.random.RandomState(seed)
+    costs = rng.rand(n_runs, num_obj)
+    status = rng.choice([StatusType.SUCCESS, StatusType.TIMEOUT, StatusType.CRASHED], p=[0.8, 0.1, 0.1], size=n_runs)
+    budgets = rng.randint(n_budgets, size=n_runs)
+    instances = ["instance_%d" % i for i in range(100)]
+
+    for i in range(n_runs):
+        cost = costs[i].tolist() if num_obj > 1 else float(costs[i, 0])
+        k = RunKey(i // 100, instances[i % 100], 0, float(budgets[i]))
+        runhistory.data[k] = RunValue(cost, float(costs[i, 0]), status[i], float(i), float(i + 1), None)
+        runhistory._index(k, status[i], None)
+
+
+def benchmark_memory(sizes: List[int], num_obj: int, n_instances: int = 10) -> None:
+    """Memory per run of a runhistory (including its indexes and caches, but not the configurations) with a
+    single and with `num_obj` objectives, for the default and the compact representation of the runs. The json
+    validation is off because strict validation additionally keeps the encoding of each run."""
+    variants = [("dict", {}), ("compact", {"compact": True})]
+    for size in sizes:
+        configs = get_configs(int(np.ceil(size / n_instances)))
+        for n_objectives in sorted({1, num_obj}):
+            results = []
+            for name, kwargs in variants:
+                tracemalloc.start()
+                runhistory = fill_runhistory(
+                    RunHistory(json_validation="off", **kwargs),
+                    size,
+                    n_instances=n_instances,
+                    num_obj=n_objectives,
+                    configs=configs,
+                )
+                memory = tracemalloc.get_traced_memory()[0]
+                tracemalloc.stop()
+                del runhistory
+                results.append("%s %6.1f B/run" % (name, memory / size))
+
+            print("memory: %8d runs, %2d objectives: %s" % (size, n_objectives, " | ".join(results)))
+
+
+def benchmark_configs(sizes: List[int], num_obj: int, batch_size: int = 1000) -> None:
+    """Memory per configuration of a runhistory with one run per configuration, which keeps the configurations
+    and which creates them from their vectors on access (``lazy_configs``). The configurations are sampled in
+    batches and not referenced elsewhere. Also the time to look up the ids of all configurations, by hashing
+    them (as a dict keyed by configuration does) and with the vector index of the runhistory."""
+    for size in sizes:
+        results = []
+        for name, kwargs in [("default", {}), ("lazy", {"lazy_configs": True})]:
+            cs = get_config_space()
+            tracemalloc.start()
+            runhistory = RunHistory(json_validation="off", **kwargs)
+            for n_configs in range(0, size, batch_size):
+                for config in cs.sample_configuration(size=min(batch_size, size - n_configs)):
+                    runhistory.add(config, 1, 1, StatusType.SUCCESS, seed=0)
+            memory = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            del runhistory
+            results.append("%s %6.1f B/config" % (name, memory / size))
+
+        configs = get_configs(size)
+        runhistory = RunHistory(json_validation="off")
+        for config in configs:
+            runhistory.add(config, 1, 1, StatusType.SUCCESS, seed=0)
+        config_ids = dict(runhistory.config_ids.items())
+
+        start = time.time()
+        [config_ids[config] for config in configs]
+        duration_hash = time.time() - start
+
+        start = time.time()
+        [runhistory.config_ids[config] for config in configs]
+        duration_index = time.time() - start
+
+        print(
+            "configs: %8d configs: %s | lookup: hash %7.4f sec, index %7.4f sec"
+            % (size, " | ".join(results), duration_hash, duration_index)
+        )
+
+
+def benchmark_queries(sizes: List[int], num_obj: int, n_budgets: int = 4) -> None:
+    """Time of the budget and status queries of one SMBO iteration with several budgets (available budgets,
+    successful runs and evaluated configurations per budget), with the indexes and by scanning all runs."""
+    for size in sizes:
+        runhistory = RunHistory()
+        fill_storage(runhistory, size, num_obj, n_budgets=n_budgets)
+
+        start = time.time()
+        for budget in sorted({k.budget for k in runhistory.data.keys()}, reverse=True):
+            {k: v for k, v in runhistory.data.items() if v.status == StatusType.SUCCESS and k.budget == budget}
+            [runhistory.ids_config.get(k.config_id) for k in runhistory.data.keys() if k.budget == budget]
+        duration_scan = time.time() - start
+
+        start = time.time()
+        for budget in runhistory.get_budgets()[::-1]:
+            runhistory.get_runs(statuses=[StatusType.SUCCESS], budgets=[budget])
+            [runhistory.ids_config.get(k.config_id) for k in runhistory._get_run_keys(budgets=[budget])]
+        duration_index = time.time() - start
+
+        print(
+            "queries: %8d runs, %2d budgets: scan %8.4f sec | index %8.4f sec | speedup %5.2fx"
+            % (size, n_budgets, duration_scan, duration_index, duration_scan / duration_index)
+        )
+
+
+def get_runs_for_config_copy(runhistory: RunHistory, config: Configuration) -> List[InstSeedBudgetKey]:
+    """Returns the runs on the highest budget of a configuration like `RunHistory.get_runs_for_config` did before
+    the views were cached, i.e. by copying and rewriting the runs of the configuration."""
+    runs = runhistory._configid_to_inst_seed_budget.get(runhistory.config_ids.get(config), {}).copy()
+    for k, v in runs.items():
+        runs[k] = [max(v)]
+    return [InstSeedBudgetKey(k.instance, k.seed, budget) for k, v in runs.items() for budget in v]
+
+
+def benchmark_config_runs(sizes: List[int], num_obj: int, n_configs: int = 10, n_queries: int = 100) -> None:
+    """Time to compare the runs of an incumbent and its challengers on `size` instances as the racers do, by
+    copying the runs of both configurations and with the cached views."""
+    for size in sizes:
+        runhistory = fill_runhistory(RunHistory(), size * n_configs, n_instances=size, num_obj=num_obj)
+        configs = runhistory.get_all_configs()
+
+        start = time.time()
+        for i in range(n_queries):
+            inc_runs = get_runs_for_config_copy(runhistory, configs[0])
+            chall_runs = get_runs_for_config_copy(runhistory, configs[i % n_configs])
+            set(inc_runs).intersection(chall_runs)
+        duration_copy = time.time() - start
+
+        start = time.time()
+        for i in range(n_queries):
+            inc_runs_view = runhistory.get_runs_view_for_config(configs[0])
+            chall_runs_view = runhistory.get_runs_view_for_config(configs[i % n_configs])
+            inc_runs_view.max_budget_run_set & chall_runs_view.max_budget_run_set
+        duration_view = time.time() - start
+
+        print(
+            "config_runs: %6d instances: copy %8.3f ms/query | view %8.3f ms/query | speedup %6.1fx"
+            % (
+                size,
+                1e3 * duration_copy / n_queries,
+                1e3 * duration_view / n_queries,
+                duration_copy / duration_view,
+            )
+        )
+
+
+def benchmark_save(sizes: List[int], num_obj: int, n_saves: int = 20) -> None:
+    """Time per save if the runhistory is saved after every new run, with complete rewrites and with the
+    journal."""
+    for size in sizes:
+        durations = []
+        for append in (False, True):
+            runhistory = fill_runhistory(RunHistory(), size + n_saves, num_obj=num_obj)
+            keys = list(runhistory.data.keys())
+            with tempfile.TemporaryDirectory() as tmpdir:
+                fn = os.path.join(tmpdir, "runhistory.json")
+                runhistory.save_json(fn, append=append)
+
+                # Pretend the last runs are new by marking them as pending
+                duration = 0.0
+                for k in keys[size:]:
+                    if append:
+                        runhistory._journal_pending[k] = None
+                    start = time.time()
+                    runhistory.save_json(fn, append=append)
+                    duration += time.time() - start
+            durations.append(duration / n_saves)
+
+        print(
+            "save: %8d runs, %2d objectives: rewrite %9.6f sec/save | journal %9.6f sec/save | speedup %7.1fx"
+            % (size, num_obj, durations[0], durations[1], durations[0] / durations[1])
+        )
+
+
+def load_json_with_add(fn: str, cs: ConfigurationSpace) -> RunHistory:
+    """Loads a runhistory file by calling `RunHistory.add` for each run (how `load_json` used to work)."""
+    with open(fn) as fp:
+        all_data = json.load(fp, object_hook=StatusType.enum_hook)
+
+    runhistory = RunHistory()
+    configs = {int(id_): Configuration(cs, values=values) for id_, values in all_data["configs"].items()}
+    for k, v in all_data["data"]:
+        runhistory.add(
+            config=configs[int(k[0])],
+            cost=v[0],
+            time=float(v[1]),
+            status=StatusType(v[2]),
+            instance_id=k[1],
+            seed=int(k[2]),
+            budget=float(k[3]),
+            starttime=v[3],
+            endtime=v[4],
+            additional_info=v[5],
+        )
+
+    return runhistory
+
+
+def benchmark_load(sizes: List[int], num_obj: int) -> None:
+    """Time to load a runhistory file by adding one run after the other and with the bulk loader."""
+    for size in sizes:
+        runhistory = fill_runhistory(RunHistory(), size, num_obj=num_obj)
+        cs = runhistory.ids_config[1].configuration_space
+        with tempfile.TemporaryDirectory() as tmpdir:
+            fn = os.path.join(tmpdir, "runhistory.json")
+            runhistory.save_json(fn)
+
+            start = time.time()
+            load_json_with_add(fn, cs)
+            duration_add = time.time() - start
+
+            start = time.time()
+            RunHistory().load_json(fn, cs)
+            duration_bulk = time.time() - start
+
+        print(
+            "load: %8d runs, %2d objectives: add %8.3f sec | bulk %8.3f sec | speedup %5.1fx"
+            % (size, num_obj, duration_add, duration_bulk, duration_add / duration_bulk)
+        )
+
+
+def benchmark_snapshot(sizes: List[int], num_obj: int) -> None:
+    """Time to open a runhistory file and a snapshot of it, to select the successful runs from both and to
+    warm-start a new runhistory from both with `RunHistory.update`. Opening a snapshot only maps the file, the
+    runs and configurations are created when they are accessed."""
+    for size in sizes:
+        runhistory = fill_runhistory(RunHistory(), size, num_obj=num_obj)
+        cs = runhistory.ids_config[1].configuration_space
+        with tempfile.TemporaryDirectory() as tmpdir:
+            json_fn = os.path.join(tmpdir, "runhistory.json")
+            snapshot_fn = os.path.join(tmpdir, "runhistory.snapshot")
+            runhistory.save_json(json_fn)
+            write_snapshot(runhistory, snapshot_fn)
+
+            results = []
+            for name, open_runhistory in (
+                ("json", lambda: load_json(json_fn, cs)),
+                ("snapshot", lambda: RunHistorySnapshot(snapshot_fn, cs)),
+            ):
+                start = time.time()
+                opened = open_runhistory()
+                duration_open = time.time() - start
+
+                start = time.time()
+                opened.get_runs(statuses=[StatusType.SUCCESS])
+                duration_select = time.time() - start
+
+                start = time.time()
+                RunHistory().update(opened)
+                duration_update = time.time() - start
+                results.append(
+                    "%s: open %7.3f sec, select %7.3f sec, update %7.3f sec"
+                    % (name, duration_open, duration_select, duration_update)
+                )
+
+        print("snapshot: %8d runs, %2d objectives: %s" % (size, num_obj, " | ".join(results)))
+
+
+def load_json(fn: str, cs: ConfigurationSpace) -> RunHistory:
+    runhistory = RunHistory()
+    runhistory.load_json(fn, cs)
+    return runhistory
+
+
+def benchmark_serializers(sizes: List[int], num_obj: int) -> None:
+    """Time to save and load a runhistory with each available serialization backend. ``json (hook)`` reads and
+    writes the runhistory file as before the serializers were introduced, i.e. indented and with an object
+    hook for the status types."""
+    for size in sizes:
+        runhistory = fill_runhistory(RunHistory(), size, num_obj=num_obj)
+        cs = runhistory.ids_config[1].configuration_space
+        with tempfile.TemporaryDirectory() as tmpdir:
+            fn = os.path.join(tmpdir, "runhistory.json")
+            start = time.time()
+            data = runhistory._serialize_runs(runhistory.data.keys())
+            configs, config_origins = runhistory._serialize_configs(runhistory.ids_config.keys())
+            with open(fn, "w") as fp:
+                json.dump(
+                    {"data": data, "config_origins": config_origins, "configs": configs}, fp, cls=EnumEncoder, indent=2
+                )
+            duration_save = time.time() - start
+
+            start = time.time()
+            with open(fn) as fp:
+                json.load(fp, object_hook=StatusType.enum_hook)
+            duration_load = time.time() - start
+            print(
+                "serializers: %8d runs, %2d objectives: %-11s save %7.3f sec | load (without runs) %7.3f sec | %6.1f MB"
+                % (size, num_obj, "json (hook)", duration_save, duration_load, os.path.getsize(fn) / 1e6)
+            )
+
+            for name in SERIALIZERS:
+                try:
+                    get_serializer(name)
+                except ImportError:
+                    continue
+
+                fn = os.path.join(tmpdir, "runhistory.%s" % name)
+                start = time.time()
+                runhistory.save_json(fn, serializer=name)
+                duration_save = time.time() - start
+
+                start = time.time()
+                runhistory._read_json(fn, serializer=name)
+                duration_read = time.time() - start
+
+                start = time.time()
+                RunHistory().load_json(fn, cs, serializer=name)
+                duration_load = time.time() - start
+                print(
+                    "serializers: %8d runs, %2d objectives: %-11s save %7.3f sec | load (without runs) %7.3f sec | "
+                    "%6.1f MB | load %7.3f sec"
+                    % (size, num_obj, name, duration_save, duration_read, os.path.getsize(fn) / 1e6, duration_load)
+                )
+
+
+def benchmark_validation(sizes: List[int], num_obj: int, curve_length: int = 100) -> None:
+    """Time to add runs with a learning curve as additional info and to save them, for each json validation
+    mode."""
+    for size in sizes:
+        rng = np.random.RandomState(1)
+        configs = get_configs(size)
+        costs = rng.rand(size, num_obj)
+        curves = rng.rand(size, curve_length).tolist()
+
+        results = []
+        for json_validation in ("strict", "deferred", "off"):
+            runhistory = RunHistory(json_validation=json_validation)
+            start = time.time()
+            for i in range(size):
+                runhistory.add(
+                    config=configs[i],
+                    cost=costs[i] if num_obj > 1 else costs[i, 0],
+                    time=1.0,
+                    status=StatusType.SUCCESS,
+                    seed=0,
+                    additional_info={"learning_curve": curves[i], "folds": curves[i][:5]},
+                )
+            duration_add = time.time() - start
+
+            with tempfile.TemporaryDirectory() as tmpdir:
+                start = time.time()
+                runhistory.save_json(os.path.join(tmpdir, "runhistory.json"))
+                duration_save = time.time() - start
+            results.append(
+                "%s: add %7.2f us/run, save %6.3f sec" % (json_validation, 1e6 * duration_add / size, duration_save)
+            )
+
+        print("validation: %8d runs, %2d objectives: %s" % (size, num_obj, " | ".join(results)))
+
+
+BENCHMARKS = {
+    "add": benchmark_add,
+    "config_runs": benchmark_config_runs,
+    "configs": benchmark_configs,
+    "costs": benchmark_costs,
+    "load": benchmark_load,
+    "memory": benchmark_memory,
+    "queries": benchmark_queries,
+    "save": benchmark_save,
+    "serializers": benchmark_serializers,
+    "snapshot": benchmark_snapshot,
+    "validation": benchmark_validation,
+}  # type: Dict[str, Callable[..., None]]
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(formatter_class=ArgumentDefaultsHelpFormatter)
+    parser.add_argument("benchmark", choices=sorted(BENCHMARKS), help="benchmark to run")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[5000, 10000, 20000, 40000], help="number of runs")
+    parser.add_argument("--num_obj", type=int, default=2, help="number of objectives")
+    args = parser.parse_args()
+
+    BENCHMARKS[args.benchmark](sizes=args.sizes, num_obj=args.num_obj)
@@ -0,0 +1,219 @@
+#!/usr/bin/env python
+"""Micro-benchmarks for the conversion of a runhistory into training data of the EPM.
+
+Each benchmark prints one line per problem size so that the scaling behaviour can be read off
+directly, e.g. ``python scripts/benchmark_runhistory2epm.py build --sizes 10000 100000 --n_feats 100``.
+"""
+
+from typing import Callable, Dict, List, Mapping, Tuple
+
+import os
+import sys
+import time
+from argparse import ArgumentDefaultsHelpFormatter, ArgumentParser
+
+import numpy as np
+
+cmd_folder = os.path.realpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+if cmd_folder not in sys.path:
+    sys.path.insert(0, cmd_folder)
+
+from ConfigSpace.hyperparameters import UniformFloatHyperparameter  # noqa: E402
+
+from smac.configspace import ConfigurationSpace  # noqa: E402
+from smac.multi_objective.aggregation_strategy import (  # noqa: E402
+    MeanAggregationStrategy,
+)
+from smac.multi_objective.utils import normalize_costs  # noqa: E402
+from smac.runhistory.runhistory import RunHistory, RunKey, RunValue  # noqa: E402
+from smac.runhistory.runhistory2epm import (  # noqa: E402
+    AbstractRunHistory2EPM,
+    RunHistory2EPM4LogScaledCost,
+)
+from smac.scenario.scenario import Scenario  # noqa: E402
+from smac.tae import StatusType  # noqa: E402
+
+__copyright__ = "Copyright 2022, AutoML.org Freiburg-Hannover"
+__license__ = "3-clause BSD"
+
+
+def get_transformer(
+    n_runs: int,
+    n_feats: int,
+    num_obj: int,
+    n_hps: int = 10,
+    n_instances: int = 100,
+    n_budgets: int = 1,
+    seed: int = 1,
+) -> Tuple[AbstractRunHistory2EPM, RunHistory]:
+    """Returns a transformer and a runhistory with `n_runs` successful runs of `n_runs / n_instances`
+    configurations on `n_instances` instances with `n_feats` features each. If there are several budgets,
+    each configuration is run on one instance on all `n_budgets` budgets instead (as by successive halving)."""
+    cs = ConfigurationSpace(seed=seed)
+    for i in range(n_hps):
+        cs.add_hyperparameter(UniformFloatHyperparameter("x%d" % i, 0, 1))
+
+    rng = np.random.RandomState(seed)
+    features = {"instance %d" % i: rng.rand(n_feats).tolist() for i in range(n_instances)}
+    scenario_dict = {
+        "run_obj": "quality",
+        "cs": cs,
+        "output_dir": "",
+        "instances": [[instance] for instance in features],
+        "features": features,
+    }
+    if num_obj > 1:
+        scenario_dict["multi_objectives"] = ", ".join("cost%d" % i for i in range(num_obj))
+    transformer = RunHistory2EPM4LogScaledCost(
+        scenario=Scenario(scenario_dict),
+        num_params=n_hps,
+        success_states=[StatusType.SUCCESS],
+        consider_for_higher_budgets_state=[StatusType.SUCCESS],
+        multi_objective_algorithm=MeanAggregationStrategy(),
+    )
+
+    runhistory = RunHistory(json_validation="off")
+    runs_per_config = n_budgets if n_budgets > 1 else n_instances
+    configs = cs.sample_configuration(size=int(np.ceil(n_runs / runs_per_config)))
+    for i in range(n_runs):
+        cost = rng.rand(num_obj).tolist() if num_obj > 1 else float(rng.rand())
+        if n_budgets > 1:
+            instance, budget = "instance %d" % (i // n_budgets % n_instances), float(3 ** (i % n_budgets))
+        else:
+            instance, budget = "instance %d" % (i % n_instances), 0.0
+        runhistory.add(
+            configs[i // runs_per_config], cost, 1, StatusType.SUCCESS, instance_id=instance, seed=0, budget=budget
+        )
+
+    return transformer, runhistory
+
+
+def build_matrix_per_row(
+    transformer: AbstractRunHistory2EPM,
+    run_dict: Mapping[RunKey, RunValue],
+    runhistory: RunHistory,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Returns X and the untransformed y of the runs like `_build_matrix` did before it was vectorized, i.e.
+    by converting and aggregating one run after the other."""
+    X = np.ones([len(run_dict), transformer.num_params + transformer.n_feats]) * np.nan
+    y = np.ones([len(run_dict), 1])
+    for row, (key, run) in enumerate(run_dict.items()):
+        conf_vector = runhistory.ids_config[key.config_id].get_array()
+        if transformer.n_feats:
+            X[row, :] = np.hstack((conf_vector, transformer.instance_features[key.instance_id]))
+        else:
+            X[row, :] = conf_vector
+
+        if transformer.num_obj > 1:
+            assert transformer.multi_objective_algorithm is not None
+            y[row] = transformer.multi_objective_algorithm(normalize_costs(run.cost, runhistory.objective_bounds))
+        else:
+            y[row] = run.cost
+
+    return X, y
+
+
+def benchmark_build(sizes: List[int], n_feats: int, num_obj: int) -> None:
+    """Time to build the training data from all successful runs, one run after the other (as before), at once
+    with a new transformer and with a transformer which converted the runs before the last run was added."""
+    for size in sizes:
+        transformer, runhistory = get_transformer(size, n_feats, num_obj)
+        run_dict = runhistory.get_runs(statuses=[StatusType.SUCCESS])
+
+        start = time.time()
+        build_matrix_per_row(transformer, run_dict, runhistory)
+        duration_per_row = time.time() - start
+
+        start = time.time()
+        transformer._build_matrix(run_dict, runhistory)
+        duration_at_once = time.time() - start
+
+        config = runhistory.get_all_configs()[0]
+        cost = [0.5] * num_obj if num_obj > 1 else 0.5
+        runhistory.add(config, cost, 1, StatusType.SUCCESS, instance_id="instance 0", seed=1)
+        run_dict = runhistory.get_runs(statuses=[StatusType.SUCCESS])
+        start = time.time()
+        transformer._build_matrix(run_dict, runhistory)
+        duration_cached = time.time() - start
+
+        print(
+            "build: %8d runs, %3d features, %2d objectives: per row %7.4f sec | at once %7.4f sec | cached %7.4f sec"
+            % (size, n_feats, num_obj, duration_per_row, duration_at_once, duration_cached)
+        )
+
+
+def collect_data(transformer: AbstractRunHistory2EPM, runhistory: RunHistory) -> None:
+    """Collects the training data on all budgets as `EPMChooser` does when there are not enough runs on the
+    higher budgets, i.e. `transform` from the highest to the lowest budget and `get_configurations`."""
+    budgets = runhistory.get_budgets()[::-1]
+    for budget in budgets:
+        transformer.transform(runhistory, budget_subset=[budget])
+    transformer.get_configurations(runhistory, budget_subset=budgets[-1:])
+
+
+def benchmark_budgets(sizes: List[int], n_feats: int, num_obj: int, n_budgets: int = 5) -> None:
+    """Time to collect the training data on all budgets with a new transformer and with a transformer which
+    collected the data before the last run was added."""
+    for size in sizes:
+        transformer, runhistory = get_transformer(size, n_feats, num_obj, n_budgets=n_budgets)
+
+        start = time.time()
+        collect_data(transformer, runhistory)
+        duration_at_once = time.time() - start
+
+        config = runhistory.get_all_configs()[0]
+        cost = [0.5] * num_obj if num_obj > 1 else 0.5
+        runhistory.add(
+            config, cost, 1, StatusType.SUCCESS, instance_id="instance 0", seed=0, budget=1.0, force_update=True
+        )
+        start = time.time()
+        collect_data(transformer, runhistory)
+        duration_cached = time.time() - start
+
+        print(
+            "budgets: %8d runs, %2d budgets, %3d features, %2d objectives: at once %7.4f sec | cached %7.4f sec"
+            % (size, n_budgets, n_feats, num_obj, duration_at_once, duration_cached)
+        )
+
+
+def benchmark_response(sizes: List[int], n_feats: int, num_obj: int, repetitions: int = 10) -> None:
+    """Mean time to compute the statistics of the y values and to transform them after a run was added, with
+    the y values of the last call cleared (as before) and cached."""
+    for size in sizes:
+        transformer, runhistory = get_transformer(size, n_feats, num_obj)
+        run_dict = runhistory.get_runs(statuses=[StatusType.SUCCESS])
+        _, y, _ = transformer._get_run_rows(run_dict, runhistory)
+        y = np.vstack((y, np.random.RandomState(1).rand(2 * repetitions + 2, y.shape[1])))
+
+        durations = {}
+        for n_new, mode in enumerate(["cleared"] * (repetitions + 1) + ["cached"] * (repetitions + 1)):
+            # The first call in the cached mode sorts the y values of the last call
+            if mode == "cleared":
+                transformer._response_values = {}
+            start = time.time()
+            transformer._get_response_values(y[: size + n_new], return_time_as_y=False, store_statistics=True)
+            if n_new not in (0, repetitions + 1):
+                durations[mode] = durations.get(mode, 0.0) + (time.time() - start) / repetitions
+
+        print(
+            "response: %8d runs: cleared %7.4f sec | cached %7.4f sec"
+            % (size, durations["cleared"], durations["cached"])
+        )
+
+
+BENCHMARKS = {
+    "build": benchmark_build,
+    "budgets": benchmark_budgets,
+    "response": benchmark_response,
+}  # type: Dict[str, Callable[..., None]]
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(formatter_class=ArgumentDefaultsHelpFormatter)
+    parser.add_argument("benchmark", choices=sorted(BENCHMARKS), help="benchmark to run")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[10000, 20000, 50000, 100000], help="number of runs")
+    parser.add_argument("--n_feats", type=int, default=100, help="number of instance features")
+    parser.add_argument("--num_obj", type=int, default=1, help="number of objectives")
+    args = parser.parse_args()
+
+    BENCHMARKS[args.benchmark](sizes=args.sizes, n_feats=args.n_feats, num_obj=args.num_obj)
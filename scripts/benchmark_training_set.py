@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+"""Benchmark of the training set policies of the EPMChooser: time to train the random forest on the selected
+data points and quality of its predictions.
+
+The data imitates a long SMBO run on a noisy 10-dimensional function: the first data points are sampled
+uniformly, the later ones increasingly close to the optimum. The quality is measured on uniformly sampled test
+points (rank correlation) and on test points close to the optimum (RMSE), where the acquisition function is
+optimized, e.g. ``python scripts/benchmark_training_set.py --sizes 5000 20000 --max_size 2000``.
+"""
+
+from typing import Dict, List, Tuple
+
+import os
+import sys
+import time
+from argparse import ArgumentDefaultsHelpFormatter, ArgumentParser
+
+import numpy as np
+from scipy.stats import spearmanr
+
+cmd_folder = os.path.realpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+if cmd_folder not in sys.path:
+    sys.path.insert(0, cmd_folder)
+
+from ConfigSpace.hyperparameters import UniformFloatHyperparameter  # noqa: E402
+
+from smac.configspace import ConfigurationSpace  # noqa: E402
+from smac.epm.random_forest.rf_with_instances import (  # noqa: E402
+    RandomForestWithInstances,
+)
+from smac.epm.utils import get_types  # noqa: E402
+from smac.optimizer.configuration_chooser.training_set import (  # noqa: E402
+    KeepAll,
+    KeepRecent,
+    KeepTopAndSubsample,
+    Reservoir,
+    TrainingSetPolicy,
+)
+
+__copyright__ = "Copyright 2022, AutoML.org Freiburg-Hannover"
+__license__ = "3-clause BSD"
+
+N_DIMS = 10
+
+
+def objective(X: np.ndarray) -> np.ndarray:
+    """Shifted sphere with a sine ripple, the optimum is at 0.3 in each dimension."""
+    Z = X - 0.3
+    return np.sum(Z**2, axis=1) + 0.1 * np.sum(np.sin(10 * Z), axis=1)
+
+
+def sample_points(n: int, concentration: np.ndarray, rng: np.random.RandomState) -> np.ndarray:
+    """Samples points which are uniformly distributed for concentration 0 and close to the optimum for
+    concentration 1."""
+    uniform = rng.rand(n, N_DIMS)
+    local = np.clip(0.3 + rng.randn(n, N_DIMS) * 0.05, 0, 1)
+    return uniform + concentration[:, np.newaxis] * (local - uniform)
+
+
+def get_data(size: int, noise: float, rng: np.random.RandomState) -> Tuple[np.ndarray, np.ndarray]:
+    concentration = np.clip(np.linspace(-0.1, 1, size), 0, 1)
+    X = sample_points(size, concentration, rng)
+    Y = objective(X) + noise * rng.randn(size)
+    return X, Y.reshape(-1, 1)
+
+
+def get_policies(max_size: int) -> Dict[str, TrainingSetPolicy]:
+    return {
+        "all": KeepAll(),
+        "recent": KeepRecent(max_size),
+        "top+subsample": KeepTopAndSubsample(max_size, top_fraction=0.5),
+        "reservoir": Reservoir(max_size),
+    }
+
+
+def benchmark(sizes: List[int], max_size: int, noise: float, seed: int) -> None:
+    cs = ConfigurationSpace(seed=seed)
+    for i in range(N_DIMS):
+        cs.add_hyperparameter(UniformFloatHyperparameter("x%d" % i, 0, 1))
+    types, bounds = get_types(cs)
+
+    rng = np.random.RandomState(seed)
+    X_uniform = rng.rand(1000, N_DIMS)
+    X_local = sample_points(1000, np.ones(1000), rng)
+    y_uniform, y_local = objective(X_uniform), objective(X_local)
+
+    for size in sizes:
+        X, Y = get_data(size, noise, np.random.RandomState(seed))
+        for name, policy in get_policies(max_size).items():
+            indices = policy.select(X, Y, np.random.RandomState(seed))
+            X_train, Y_train = (X, Y) if indices is None else (X[indices], Y[indices])
+
+            model = RandomForestWithInstances(cs, types, bounds, seed=seed)
+            start = time.time()
+            model.train(X_train, Y_train)
+            duration = time.time() - start
+
+            rank_correlation = spearmanr(model.predict(X_uniform)[0].flatten(), y_uniform)[0]
+            rmse = np.sqrt(np.mean((model.predict(X_local)[0].flatten() - y_local) ** 2))
+            print(
+                "%8d runs, %-14s %8d points: train %7.3f sec | rank corr. (uniform) %.3f | RMSE (optimum) %.4f"
+                % (size, name, X_train.shape[0], duration, rank_correlation, rmse)
+            )
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(formatter_class=ArgumentDefaultsHelpFormatter)
+    parser.add_argument("--sizes", nargs="+", type=int, default=[5000, 20000, 50000], help="number of runs")
+    parser.add_argument("--max_size", type=int, default=2000, help="maximal size of the training set")
+    parser.add_argument("--noise", type=float, default=0.05, help="standard deviation of the noise")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    benchmark(sizes=args.sizes, max_size=args.max_size, noise=args.noise, seed=args.seed)
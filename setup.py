@@ -27,6 +27,10 @@ extras_require = {
         "pyro-ppl>=1.7.0",
         "botorch>=0.5.0"
     ],
+    "serialization": [
+        "orjson>=3.4.0",
+        "msgpack>=1.0.0",
+    ],
     "dev": [
         "setuptools",
         "types-setuptools",
@@ -5,7 +5,6 @@ import warnings
 
 import numpy as np
 from sklearn.decomposition import PCA
-from sklearn.exceptions import NotFittedError
 from sklearn.preprocessing import MinMaxScaler
 
 from smac.configspace import ConfigurationSpace
@@ -20,6 +19,57 @@ __email__ = "lindauer@cs.uni-freiburg.de"
 __version__ = "0.0.1"
 
 
+class InstanceFeaturePCA:
+    """Reduces the dimensionality of instance features by scaling them to [0, 1] and applying PCA.
+
+    Since the instance features do not change during a run, the scaler and the PCA are fitted once on the
+    features of the instances (each instance once) and the reduced features of the instances are kept. A model
+    trained by the `RFRImputator` and by the `EPMChooser` is the same object in the facades, hence it fits them
+    only once, and other models can share them by assigning the same object to `BaseEPM.instance_feature_pca`.
+
+    Parameters
+    ----------
+    instance_features : np.ndarray (I, K)
+        Contains the K dimensional instance features of the I different instances.
+    n_components : int
+        Number of components to keep. Must be smaller than I and at most K.
+    """
+
+    def __init__(self, instance_features: np.ndarray, n_components: int) -> None:
+        self.instance_features = instance_features
+        self.n_components = n_components
+        self.scaler = MinMaxScaler()
+        self.pca = PCA(n_components=n_components)
+        self._reduced_features = None  # type: Optional[np.ndarray]
+
+    def get_reduced_features(self) -> np.ndarray:
+        """Returns the reduced features of the instances, and fits the scaler and the PCA on the first call.
+
+        Returns
+        -------
+        reduced_features : np.ndarray (I, n_components)
+        """
+        if self._reduced_features is None:
+            features = self.scaler.fit_transform(self.instance_features)
+            features = np.nan_to_num(features)  # if features with max == min
+            self._reduced_features = self.pca.fit_transform(features)
+        return self._reduced_features
+
+    def transform(self, features: np.ndarray) -> np.ndarray:
+        """Reduces the dimensionality of the given instance features.
+
+        Parameters
+        ----------
+        features : np.ndarray (N, K)
+
+        Returns
+        -------
+        reduced_features : np.ndarray (N, n_components)
+        """
+        self.get_reduced_features()
+        return self.pca.transform(np.nan_to_num(self.scaler.transform(features)))
+
+
 class BaseEPM:
     """Abstract implementation of the EPM API.
 
@@ -47,14 +97,16 @@ class BaseEPM:
     pca_components : float
         Number of components to keep when using PCA to reduce
         dimensionality of instance features. Requires to
-        set n_feats (> pca_dims).
+        set n_feats (>= pca_dims) and more instances than components.
 
     Attributes
     ----------
     instance_features : np.ndarray(I, K)
         Contains the K dimensional instance features
         of the I different instances
-    pca : sklearn.decomposition.PCA
+    instance_feature_pca : Optional[InstanceFeaturePCA]
+        Scaler and PCA for the instance features, which are fitted once, or None if PCA is not applied
+    pca : Optional[sklearn.decomposition.PCA]
         Object to perform PCA
     pca_components : float
         Number of components to keep or None
@@ -63,7 +115,7 @@ class BaseEPM:
     n_params : int
         Number of parameters in a configuration (only available after train has
         been called)
-    scaler : sklearn.preprocessing.MinMaxScaler
+    scaler : Optional[sklearn.preprocessing.MinMaxScaler]
         Object to scale data to be withing [0, 1]
     var_threshold : float
         Lower bound vor variance. If estimated variance < var_threshold, the set
@@ -72,6 +124,9 @@ class BaseEPM:
         If set, contains a list with feature types (cat,const) of input vector
     """
 
+    # Whether `_train` accepts weights of the data points, see `train`
+    supports_weights = False
+
     def __init__(
         self,
         configspace: ConfigurationSpace,
@@ -93,9 +148,15 @@ class BaseEPM:
 
         self.n_params = len(self.configspace.get_hyperparameters())
 
-        self.pca = PCA(n_components=self.pca_components)
-        self.scaler = MinMaxScaler()
-        self._apply_pca = False
+        # reduce dimensionality of features if there are more than pca_components
+        self.instance_feature_pca = None  # type: Optional[InstanceFeaturePCA]
+        if (
+            instance_features is not None
+            and self.pca_components
+            and self.n_feats >= self.pca_components
+            and instance_features.shape[0] > self.pca_components
+        ):
+            self.instance_feature_pca = InstanceFeaturePCA(instance_features, self.pca_components)
 
         # Never use a lower variance than this
         self.var_threshold = VERY_SMALL_NUMBER
@@ -107,7 +168,19 @@ class BaseEPM:
 
         self.logger = PickableLoggerAdapter(self.__module__ + "." + self.__class__.__name__)
 
-    def train(self, X: np.ndarray, Y: np.ndarray) -> "BaseEPM":
+    @property
+    def pca(self) -> Optional[PCA]:
+        return self.instance_feature_pca.pca if self.instance_feature_pca is not None else None
+
+    @property
+    def scaler(self) -> Optional[MinMaxScaler]:
+        return self.instance_feature_pca.scaler if self.instance_feature_pca is not None else None
+
+    @property
+    def _apply_pca(self) -> bool:
+        return self.instance_feature_pca is not None
+
+    def train(self, X: np.ndarray, Y: np.ndarray, weights: Optional[np.ndarray] = None) -> "BaseEPM":
         """Trains the EPM on X and Y.
 
         Parameters
@@ -117,6 +190,9 @@ class BaseEPM:
         Y : np.ndarray [n_samples, n_objectives]
             The corresponding target values. n_objectives must match the
             number of target names specified in the constructor.
+        weights : Optional[np.ndarray] [n_samples, ]
+            Weights of the data points, e.g. the number of runs a data point aggregates (see
+            `RunHistory2EPM4Cost`). Models which do not support weights ignore them.
 
         Returns
         -------
@@ -128,30 +204,22 @@ class BaseEPM:
             raise ValueError("Feature mismatch: X should have %d features, but has %d" % (self.n_params, X.shape[1]))
         if X.shape[0] != Y.shape[0]:
             raise ValueError("X.shape[0] (%s) != y.shape[0] (%s)" % (X.shape[0], Y.shape[0]))
+        if weights is not None and weights.shape != (X.shape[0],):
+            raise ValueError("Expected %d weights, got array of shape %s" % (X.shape[0], weights.shape))
 
-        # reduce dimensionality of features of larger than PCA_DIM
-        if self.pca_components and X.shape[0] > self.pca.n_components and self.n_feats >= self.pca_components:
-            X_feats = X[:, -self.n_feats :]
-            # scale features
-            X_feats = self.scaler.fit_transform(X_feats)
-            X_feats = np.nan_to_num(X_feats)  # if features with max == min
-            # PCA
-            X_feats = self.pca.fit_transform(X_feats)
-            X = np.hstack((X[:, : self.n_params], X_feats))
+        if self.instance_feature_pca is not None:
+            X = np.hstack((X[:, : self.n_params], self.instance_feature_pca.transform(X[:, -self.n_feats :])))
             if hasattr(self, "types"):
                 # for RF, adapt types list
-                # if X_feats.shape[0] < self.pca, X_feats.shape[1] ==
-                # X_feats.shape[0]
                 self.types = np.array(
-                    np.hstack((self.types[: self.n_params], np.zeros((X_feats.shape[1])))),
+                    np.hstack((self.types[: self.n_params], np.zeros((X.shape[1] - self.n_params)))),
                     dtype=np.uint,
                 )  # type: ignore
-            self._apply_pca = True
-        else:
-            self._apply_pca = False
-            if hasattr(self, "types"):
-                self.types = copy.deepcopy(self._initial_types)
+        elif hasattr(self, "types"):
+            self.types = copy.deepcopy(self._initial_types)
 
+        if weights is not None and self.supports_weights:
+            return self._train(X, Y, weights=weights)  # type: ignore[call-arg] # noqa F821
         return self._train(X, Y)
 
     def _train(self, X: np.ndarray, Y: np.ndarray) -> "BaseEPM":
@@ -202,15 +270,15 @@ class BaseEPM:
                 "Rows in X should have %d entries but have %d!" % (self.n_params + self.n_feats, X.shape[1])
             )
 
-        if self._apply_pca:
-            try:
-                X_feats = X[:, -self.n_feats :]
-                X_feats = self.scaler.transform(X_feats)
-                X_feats = self.pca.transform(X_feats)
-                X = np.hstack((X[:, : self.n_params], X_feats))
-            except NotFittedError:
-                pass  # PCA not fitted if only one training sample
+        if self.instance_feature_pca is not None:
+            X = np.hstack((X[:, : self.n_params], self.instance_feature_pca.transform(X[:, -self.n_feats :])))
 
+        return self._predict_reduced(X, cov_return_type)
+
+    def _predict_reduced(
+        self, X: np.ndarray, cov_return_type: Optional[str] = "diagonal_cov"
+    ) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """Like `predict`, but the dimensionality of the instance features in X is already reduced."""
         if X.shape[1] != len(self.types):
             raise ValueError("Rows in X should have %d entries but have %d!" % (len(self.types), X.shape[1]))
 
@@ -278,12 +346,13 @@ class BaseEPM:
             return mean, var
 
         n_instances = len(self.instance_features)
+        instance_features = self._get_reduced_instance_features()
 
         mean = np.zeros(X.shape[0])
         var = np.zeros(X.shape[0])
         for i, x in enumerate(X):
-            X_ = np.hstack((np.tile(x, (n_instances, 1)), self.instance_features))
-            means, vars = self.predict(X_)
+            X_ = np.hstack((np.tile(x, (n_instances, 1)), instance_features))
+            means, vars = self._predict_reduced(X_)
             assert vars is not None  # please mypy
             # VAR[1/n (X_1 + ... + X_n)] =
             # 1/n^2 * ( VAR(X_1) + ... + VAR(X_n))
@@ -302,6 +371,14 @@ class BaseEPM:
 
         return mean, var
 
+    def _get_reduced_instance_features(self) -> np.ndarray:
+        """Returns the instance features as the model is trained on them, i.e. with reduced dimensionality if
+        PCA is applied."""
+        assert self.instance_features is not None  # please mypy
+        if self.instance_feature_pca is not None:
+            return self.instance_feature_pca.get_reduced_features()
+        return self.instance_features
+
     def get_configspace(self) -> ConfigurationSpace:
         """
         Retrieves the ConfigurationSpace used for the model.
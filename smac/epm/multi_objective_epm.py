@@ -50,6 +50,9 @@ class MultiObjectiveEPM(BaseEPM):
         a list of estimators predicting different target values
     """
 
+    # Weights are passed to the estimators, which ignore them if they do not support them
+    supports_weights = True
+
     def __init__(
         self,
         target_names: List[str],
@@ -106,7 +109,7 @@ class MultiObjectiveEPM(BaseEPM):
         """
         raise NotImplementedError
 
-    def _train(self, X: np.ndarray, Y: np.ndarray) -> "MultiObjectiveEPM":
+    def _train(self, X: np.ndarray, Y: np.ndarray, weights: Optional[np.ndarray] = None) -> "MultiObjectiveEPM":
         """Trains the models on X and y.
 
         Parameters
@@ -116,6 +119,8 @@ class MultiObjectiveEPM(BaseEPM):
         Y : np.ndarray [n_samples, n_objectives]
             The corresponding target values. n_objectives must match the
             number of target names specified in the constructor.
+        weights : Optional[np.ndarray] [n_samples, ]
+            Weights of the data points, which are passed to the models.
 
         Returns
         -------
@@ -124,7 +129,7 @@ class MultiObjectiveEPM(BaseEPM):
         if len(self.estimators) == 0:
             raise ValueError("The list of estimators for this model is empty!")
         for i, estimator in enumerate(self.estimators):
-            estimator.train(X, Y[:, i])
+            estimator.train(X, Y[:, i], weights=weights)
 
         return self
 
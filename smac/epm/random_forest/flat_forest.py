@@ -0,0 +1,411 @@
+from typing import Dict, List, Optional, Tuple
+
+import math
+
+import numpy as np
+from pyrfr import regression
+
+__copyright__ = "Copyright 2022, AutoML.org Freiburg-Hannover"
+__license__ = "3-clause BSD"
+
+
+class FlatForest:
+    """Flattened copy of a trained pyrfr forest, which evaluates the trees on many data points at once with
+    NumPy instead of calling into pyrfr once per data point.
+
+    The nodes of all trees are stored in one structure of arrays, the nodes of the i-th tree start at
+    ``roots[i]``. The children of a leaf are the leaf itself, and the responses of the leaves are stored
+    consecutively in ``leaf_values``. The predictions are bitwise identical to the ones of pyrfr: the data
+    points are routed through the trees with the same comparisons, and the statistics of the leaves and across
+    the trees are computed with the same sequence of floating point operations as in
+    ``rfr::util::weighted_running_statistics`` and ``binary_rss_forest.predict_mean_var``.
+
+    Parameters
+    ----------
+    rf : regression.binary_rss_forest
+        Trained forest. The law of total variance must not be used for its predictions, as in
+        `RandomForestWithInstances`.
+
+    Attributes
+    ----------
+    roots : np.ndarray [n_trees, ]
+        Index of the root node of each tree.
+    features : np.ndarray [n_nodes, ]
+        Index of the feature a node splits on, -1 for leaves.
+    thresholds : np.ndarray [n_nodes, ]
+        Data points with a feature value greater than the threshold go to the right child, all others (including
+        NaN) to the left child. NaN for categorical splits and leaves.
+    children : np.ndarray [n_nodes, 2]
+        Indices of the left and right child of a node.
+    categorical_splits : np.ndarray [n_nodes, ]
+        Row in ``categories_left`` of a categorical split, -1 for numerical splits and leaves.
+    categories_left : np.ndarray [n_categorical_splits, n_categories]
+        Whether a category goes to the left child of a categorical split.
+    leaf_starts : np.ndarray [n_nodes, ]
+        Start of the responses of a leaf in ``leaf_values``.
+    leaf_sizes : np.ndarray [n_nodes, ]
+        Number of responses in a leaf, 0 for inner nodes.
+    leaf_values : np.ndarray [n_responses, ]
+        Responses of all leaves.
+    leaf_weights : np.ndarray [n_responses, ]
+        Weights of the responses of all leaves.
+    leaf_means : np.ndarray [n_nodes, ]
+        Weighted mean of the responses of a leaf, NaN for inner nodes.
+    """
+
+    # Number of pairs of data points and trees which are routed through the trees at once
+    _CHUNK_SIZE = 2**14
+
+    def __init__(self, rf: regression.binary_rss_forest) -> None:
+        roots = []  # type: List[int]
+        features = []  # type: List[int]
+        thresholds = []  # type: List[float]
+        children = []  # type: List[int]
+        categorical_splits = []  # type: List[int]
+        category_sets = []  # type: List[List[int]]
+        leaf_starts = []  # type: List[int]
+        leaf_sizes = []  # type: List[int]
+        leaf_values = []  # type: List[float]
+        leaf_weights = []  # type: List[float]
+
+        for tree in rf.get_all_trees():
+            offset = len(features)
+            roots.append(offset)
+            for index in range(tree.number_of_nodes()):
+                node = tree.get_node(index)
+                leaf_starts.append(len(leaf_values))
+                if node.is_a_leaf():
+                    features.append(-1)
+                    thresholds.append(np.nan)
+                    children.extend((offset + index, offset + index))
+                    categorical_splits.append(-1)
+                    responses = node.responses()
+                    leaf_sizes.append(len(responses))
+                    leaf_values.extend(responses)
+                    leaf_weights.extend(node.weights())
+                else:
+                    features.append(node.get_feature_index())
+                    children.extend((offset + node.get_child_index(0), offset + node.get_child_index(1)))
+                    threshold = node.get_num_split_value()
+                    thresholds.append(threshold)
+                    if math.isnan(threshold):
+                        categorical_splits.append(len(category_sets))
+                        category_sets.append([int(category) for category in node.get_cat_split()])
+                    else:
+                        categorical_splits.append(-1)
+                    leaf_sizes.append(0)
+
+        self.roots = np.array(roots, dtype=np.int64)
+        self.features = np.array(features, dtype=np.int64)
+        self.thresholds = np.array(thresholds, dtype=np.float64)
+        self.children = np.array(children, dtype=np.int64).reshape((-1, 2))
+        self.categorical_splits = np.array(categorical_splits, dtype=np.int64)
+        n_categories = max((max(categories, default=-1) + 1 for categories in category_sets), default=0)
+        self.categories_left = np.zeros((len(category_sets), n_categories), dtype=bool)
+        for i, categories in enumerate(category_sets):
+            self.categories_left[i, categories] = True
+        self.leaf_starts = np.array(leaf_starts, dtype=np.int64)
+        self.leaf_sizes = np.array(leaf_sizes, dtype=np.int64)
+        self.leaf_values = np.array(leaf_values, dtype=np.float64)
+        self.leaf_weights = np.array(leaf_weights, dtype=np.float64)
+        self.leaf_means = self._compute_leaf_means()
+
+        self._leaf_sums = {}  # type: Dict[bool, np.ndarray]
+        self._instance_counts = None  # type: Optional[Tuple[np.ndarray, int, np.ndarray, np.ndarray]]
+
+    @property
+    def num_trees(self) -> int:
+        return len(self.roots)
+
+    def _compute_leaf_means(self) -> np.ndarray:
+        """Computes the weighted mean of the responses of each leaf like ``weighted_running_statistics``,
+        i.e. by pushing the responses one by one, which is vectorized over the leaves."""
+        leaves = np.flatnonzero(self.leaf_sizes)
+        # Sorting the leaves by decreasing size makes the leaves with a k-th response a prefix
+        leaves = leaves[np.argsort(-self.leaf_sizes[leaves], kind="stable")]
+        starts, sizes = self.leaf_starts[leaves], self.leaf_sizes[leaves]
+
+        means = np.zeros(len(leaves))
+        mean_weights = np.zeros(len(leaves))
+        n_active = len(leaves)
+        for k in range(sizes[0] if len(leaves) > 0 else 0):
+            while sizes[n_active - 1] <= k:
+                n_active -= 1
+            values = self.leaf_values[starts[:n_active] + k]
+            weights = self.leaf_weights[starts[:n_active] + k]
+            mean_weights[:n_active] += (weights - mean_weights[:n_active]) / (k + 1)
+            sum_of_weights = (k + 1) * mean_weights[:n_active]
+            means[:n_active] += (values - means[:n_active]) * weights / sum_of_weights
+
+        leaf_means = np.full(len(self.features), np.nan)
+        leaf_means[leaves] = means
+        return leaf_means
+
+    def _find_leaves(self, X: np.ndarray) -> np.ndarray:
+        """Returns the index of the leaf each data point falls into in each tree.
+
+        Parameters
+        ----------
+        X : np.ndarray [n_samples, n_features]
+
+        Returns
+        -------
+        leaves : np.ndarray [n_samples, n_trees]
+        """
+        # Routing chunks of data points keeps the intermediate arrays small enough to stay in the cache
+        n_trees = self.num_trees
+        chunk_size = max(1, self._CHUNK_SIZE // n_trees)
+        leaves = np.empty((X.shape[0], n_trees), dtype=np.int64)
+        for start in range(0, X.shape[0], chunk_size):
+            leaves[start : start + chunk_size] = self._route(X[start : start + chunk_size])
+        return leaves
+
+    def find_leaf_indices(self, X: np.ndarray) -> np.ndarray:
+        """Returns the index of the leaf each data point falls into within each tree, like
+        ``binary_tree.find_leaf_index`` of each tree for each data point.
+
+        Parameters
+        ----------
+        X : np.ndarray [n_samples, n_features]
+
+        Returns
+        -------
+        leaf_indices : np.ndarray [n_samples, n_trees]
+            Indices of the leaves within the trees, i.e. ``leaf_indices + roots`` are the leaves in the arrays of
+            the flattened forest.
+        """
+        return self._find_leaves(X) - self.roots
+
+    def _route(self, X: np.ndarray) -> np.ndarray:
+        n_trees = self.num_trees
+        n_samples, n_features = X.shape
+        flat_X = np.ascontiguousarray(X, dtype=np.float64).ravel()
+        children = self.children.ravel()
+
+        # Routes all pairs of data points and trees one level down at a time, until all of them are in leaves
+        nodes = np.tile(self.roots, n_samples)
+        offsets = np.repeat(np.arange(n_samples) * n_features, n_trees)
+        active = np.arange(len(nodes))
+        while True:
+            node = nodes[active]
+            feature = self.features[node]
+            inner = feature >= 0
+            active, node, feature = active[inner], node[inner], feature[inner]
+            if len(active) == 0:
+                break
+
+            nodes[active] = children[2 * node + self._goes_right(node, flat_X[offsets[active] + feature])]
+
+        return nodes.reshape((n_samples, n_trees))
+
+    def _goes_right(self, node: np.ndarray, x: np.ndarray) -> np.ndarray:
+        """Returns whether the values x of the split features of the inner nodes go to the right child."""
+        # Same comparison as pyrfr, which sends NaN to the left child
+        go_right = x > self.thresholds[node]
+        if len(self.categories_left) > 0:
+            split = self.categorical_splits[node]
+            categorical = np.flatnonzero(split >= 0)
+            category = x[categorical].astype(np.int64)
+            known = (category >= 0) & (category < self.categories_left.shape[1])
+            go_right[categorical] = ~(known & self.categories_left[split[categorical], np.where(known, category, 0)])
+        return go_right
+
+    def _get_instance_counts(
+        self, instance_features: np.ndarray, n_config_features: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns the number of instances which reach each node if the splits on configuration features are
+        ignored. A configuration combined with any instance only reaches the nodes which are consistent with its
+        splits on configuration features, and for these, the number of instances depends only on the instance
+        features. They are cached as the instance features do not change during a run.
+
+        Returns
+        -------
+        split_rows : np.ndarray [n_nodes, ]
+            Row of a split on an instance feature in the directions of the instances, -1 for all other nodes.
+        counts : np.ndarray [n_nodes, ]
+            Number of instances which reach a node.
+        """
+        cache = self._instance_counts
+        if cache is not None and cache[0] is instance_features and cache[1] == n_config_features:
+            return cache[2], cache[3]
+
+        n_instances = len(instance_features)
+        nodes = np.flatnonzero(self.features >= n_config_features)
+        split_rows = np.full(len(self.features), -1, dtype=np.int64)
+        split_rows[nodes] = np.arange(len(nodes))
+        values = instance_features[:, self.features[nodes] - n_config_features].T
+        go_right = self._goes_right(np.repeat(nodes, n_instances), values.ravel()).reshape(values.shape)
+        # The sets of instances are stored as bits
+        go_left, go_right = np.packbits(~go_right, axis=1), np.packbits(go_right, axis=1)
+
+        # Propagates the sets of instances from the roots to the leaves one level at a time
+        counts = np.zeros(len(self.features), dtype=np.int64)
+        counts[self.roots] = n_instances
+        level = self.roots
+        instances = np.tile(np.packbits(np.ones(n_instances, dtype=bool)), (len(level), 1))
+        while True:
+            inner = self.features[level] >= 0
+            level, instances = level[inner], instances[inner]
+            if len(level) == 0:
+                break
+
+            rows = split_rows[level]
+            on_instance = np.flatnonzero(rows >= 0)
+            left, right = instances.copy(), instances
+            left[on_instance] &= go_left[rows[on_instance]]
+            right[on_instance] &= go_right[rows[on_instance]]
+            level = np.concatenate((self.children[level, 0], self.children[level, 1]))
+            instances = np.concatenate((left, right))
+            counts[level] = np.unpackbits(instances, axis=1).sum(axis=1)
+
+            reached = counts[level] > 0
+            level, instances = level[reached], instances[reached]
+
+        self._instance_counts = (instance_features, n_config_features, split_rows, counts)
+        return split_rows, counts
+
+    def _get_leaf_sums(self, exp: bool) -> np.ndarray:
+        """Returns the sum of the (exponentiated) responses of each leaf, 0 for inner nodes."""
+        if exp not in self._leaf_sums:
+            values = np.exp(self.leaf_values) if exp else self.leaf_values
+            leaves = np.flatnonzero(self.leaf_sizes)
+            leaf_sums = np.zeros(len(self.features))
+            # The responses of the leaves are stored consecutively in the order of the leaves
+            leaf_sums[leaves] = np.add.reduceat(values, self.leaf_starts[leaves])
+            self._leaf_sums[exp] = leaf_sums
+        return self._leaf_sums[exp]
+
+    def predict_mean_var(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Predicts the mean and the variance over the trees of the means of the leaves the data points fall
+        into, like ``binary_rss_forest.predict_mean_var`` for each data point.
+
+        Parameters
+        ----------
+        X : np.ndarray [n_samples, n_features]
+
+        Returns
+        -------
+        means : np.ndarray [n_samples, ]
+        vars : np.ndarray [n_samples, ]
+        """
+        tree_means = self.leaf_means[self._find_leaves(X)]
+        mean = np.zeros(X.shape[0])
+        sdm = np.zeros(X.shape[0])
+        for i in range(self.num_trees):
+            delta = tree_means[:, i] - mean
+            mean += delta / (i + 1)
+            sdm += delta * (tree_means[:, i] - mean)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            var = sdm / (self.num_trees - 1)
+        # Same as std::max(0, var), which also maps NaN (a single tree) to 0
+        return mean, np.where(0 < var, var, 0)
+
+    def all_leaf_values(self, X: np.ndarray) -> np.ndarray:
+        """Returns the responses in the leaves the data points fall into, like
+        ``binary_rss_forest.all_leaf_values`` for each data point.
+
+        Parameters
+        ----------
+        X : np.ndarray [n_samples, n_features]
+
+        Returns
+        -------
+        values : np.ndarray [n_samples, n_trees, max_leaf_size]
+            The responses padded with NaN to the largest number of responses in the leaves of all data points.
+        """
+        leaves = self._find_leaves(X)
+        sizes = self.leaf_sizes[leaves]
+        max_leaf_size = int(sizes.max()) if sizes.size > 0 else 0
+
+        positions = np.arange(max_leaf_size)
+        mask = positions < sizes[:, :, np.newaxis]
+        values = np.full(leaves.shape + (max_leaf_size,), np.nan)
+        values[mask] = self.leaf_values[(self.leaf_starts[leaves][:, :, np.newaxis] + positions)[mask]]
+        return values
+
+    def marginalize_over_instances(
+        self, X: np.ndarray, instance_features: np.ndarray, log_y: bool = False
+    ) -> np.ndarray:
+        """Returns the mean of the responses in the leaves which a configuration falls into together with any
+        of the instances, for each tree. This is the mean of the responses returned by
+        ``binary_rss_forest.all_leaf_values`` for the configuration combined with each instance.
+
+        Parameters
+        ----------
+        X : np.ndarray [n_samples, n_config_features]
+            Configurations.
+        instance_features : np.ndarray [n_instances, n_instance_features]
+            Instance features, which are appended to the configurations.
+        log_y : bool
+            Whether the responses are logarithmic costs, which are exponentiated before averaging and the mean
+            is logarithmized again.
+
+        Returns
+        -------
+        means : np.ndarray [n_samples, n_trees]
+        """
+        n_trees = self.num_trees
+        split_rows, counts = self._get_instance_counts(instance_features, X.shape[1])
+        sums_per_leaf = counts * self._get_leaf_sums(exp=log_y)
+        sizes_per_leaf = counts * self.leaf_sizes
+
+        sums = np.empty((X.shape[0], n_trees))
+        sizes = np.empty((X.shape[0], n_trees))
+        chunk_size = max(1, self._CHUNK_SIZE // n_trees)
+        for start in range(0, X.shape[0], chunk_size):
+            chunk = slice(start, start + chunk_size)
+            sums[chunk], sizes[chunk] = self._sum_over_instances(
+                X[chunk], split_rows, counts, sums_per_leaf, sizes_per_leaf
+            )
+
+        means = sums / sizes
+        return np.log(means) if log_y else means
+
+    def _sum_over_instances(
+        self,
+        X: np.ndarray,
+        split_rows: np.ndarray,
+        counts: np.ndarray,
+        sums_per_leaf: np.ndarray,
+        sizes_per_leaf: np.ndarray,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns the sum and the number of the responses in the leaves which the configurations fall into
+        together with any of the instances, for each tree.
+
+        Returns
+        -------
+        sums : np.ndarray [n_samples, n_trees]
+        sizes : np.ndarray [n_samples, n_trees]
+        """
+        n_trees = self.num_trees
+        n_samples, n_features = X.shape
+        flat_X = np.ascontiguousarray(X, dtype=np.float64).ravel()
+        children = self.children.ravel()
+
+        # Routes the pairs of configurations and trees like `_route`, but to both children of splits on instance
+        # features if instances reach them. Each leaf which is reached adds the responses of the instances in it
+        sums = np.zeros(n_samples * n_trees)
+        sizes = np.zeros(n_samples * n_trees)
+        pair = np.arange(n_samples * n_trees)
+        node = np.tile(self.roots, n_samples)
+        while len(node) > 0:
+            feature = self.features[node]
+            leaf = feature < 0
+            sums += np.bincount(pair[leaf], weights=sums_per_leaf[node[leaf]], minlength=len(sums))
+            sizes += np.bincount(pair[leaf], weights=sizes_per_leaf[node[leaf]], minlength=len(sizes))
+
+            pair, node, feature = pair[~leaf], node[~leaf], feature[~leaf]
+            config = split_rows[node] < 0
+            x = flat_X[pair[config] // n_trees * n_features + feature[config]]
+            node = np.concatenate(
+                (
+                    children[2 * node[config] + self._goes_right(node[config], x)],
+                    self.children[node[~config]].ravel(),
+                )
+            )
+            pair = np.concatenate((pair[config], np.repeat(pair[~config], 2)))
+            reached = counts[node] > 0
+            pair, node = pair[reached], node[reached]
+
+        return sums.reshape((n_samples, n_trees)), sizes.reshape((n_samples, n_trees))
@@ -5,6 +5,7 @@ from pyrfr import regression
 
 from smac.configspace import ConfigurationSpace
 from smac.epm.random_forest import BaseModel
+from smac.epm.random_forest.flat_forest import FlatForest
 from smac.utils.constants import N_TREES, VERY_SMALL_NUMBER
 
 __author__ = "Aaron Klein"
@@ -58,6 +59,12 @@ class RandomForestWithInstances(BaseModel):
     pca_components : float
         Number of components to keep when using PCA to reduce dimensionality of instance features. Requires to
         set n_feats (> pca_dims).
+    full_fit_interval : int
+        A new forest is fitted in every full_fit_interval-th training. In the trainings in between, the data points
+        which were added since the previous training are only inserted into the leaves of the current trees (see
+        ``binary_rss_forest.pseudo_update``), which is much cheaper but does not adapt the splits to them. A new
+        forest is fitted anyway if the previous data points or their responses changed. Defaults to 1, i.e. a new
+        forest is fitted in every training.
 
     Attributes
     ----------
@@ -66,6 +73,10 @@ class RandomForestWithInstances(BaseModel):
     n_points_per_tree : int
     rf : regression.binary_rss_forest
         Only available after training
+    flat_forest : Optional[FlatForest]
+        Flattened copy of ``rf`` for predicting many data points at once, which is built once as many data
+        points have been predicted with ``rf`` as there are training data points, to marginalize over instances,
+        or on request with `get_flat_forest`
     hypers: list
         List of random forest hyperparameters
     unlog_y: bool
@@ -76,6 +87,8 @@ class RandomForestWithInstances(BaseModel):
     logger : logging.logger
     """
 
+    supports_weights = True
+
     def __init__(
         self,
         configspace: ConfigurationSpace,
@@ -94,6 +107,7 @@ class RandomForestWithInstances(BaseModel):
         max_num_nodes: int = 2**20,
         instance_features: Optional[np.ndarray] = None,
         pca_components: Optional[int] = None,
+        full_fit_interval: int = 1,
     ) -> None:
         super().__init__(
             configspace=configspace,
@@ -120,7 +134,15 @@ class RandomForestWithInstances(BaseModel):
         self.rf_opts.compute_law_of_total_variance = False
 
         self.n_points_per_tree = n_points_per_tree
+        self.full_fit_interval = full_fit_interval
+        self._n_updates_since_fit = 0
         self.rf = None  # type: regression.binary_rss_forest
+        self.flat_forest = None  # type: Optional[FlatForest]
+        self._n_predicted_by_rf = 0
+        # The data container of the last training and the data it was filled with, which is reused if the data
+        # points of the next training start with the same data points
+        self._data_container = None  # type: Optional[regression.default_data_container]
+        self._data_container_content = None  # type: Optional[Tuple[np.ndarray, np.ndarray, Optional[np.ndarray]]]
 
         # This list well be read out by save_iteration() in the solver
         self.hypers = [
@@ -136,7 +158,7 @@ class RandomForestWithInstances(BaseModel):
             self.seed,
         ]
 
-    def _train(self, X: np.ndarray, y: np.ndarray) -> "RandomForestWithInstances":
+    def _train(self, X: np.ndarray, y: np.ndarray, weights: Optional[np.ndarray] = None) -> "RandomForestWithInstances":
         """Trains the random forest on X and y.
 
         Parameters
@@ -145,14 +167,24 @@ class RandomForestWithInstances(BaseModel):
             Input data points.
         y : np.ndarray [n_samples, ]
             The corresponding target values.
+        weights : Optional[np.ndarray] [n_samples, ]
+            Weights of the data points, which weigh their responses in the leaves and splits of the trees.
 
         Returns
         -------
         self
         """
         X = self._impute_inactive(X)
+        y = y.flatten()
+        if (
+            self.rf is not None
+            and self._n_updates_since_fit + 1 < self.full_fit_interval
+            and self._starts_with_data_container(X, y, weights)
+        ):
+            return self._update(X, y, weights)
+
         self.X = X
-        self.y = y.flatten()
+        self.y = y
 
         if self.n_points_per_tree <= 0:
             self.rf_opts.num_data_points_per_tree = self.X.shape[0]
@@ -160,39 +192,124 @@ class RandomForestWithInstances(BaseModel):
             self.rf_opts.num_data_points_per_tree = self.n_points_per_tree
         self.rf = regression.binary_rss_forest()
         self.rf.options = self.rf_opts
-        data = self._init_data_container(self.X, self.y)
+        data = self._init_data_container(self.X, self.y, weights)
         self.rf.fit(data, rng=self.rng)
+        self._n_updates_since_fit = 0
+        self.flat_forest = None
+        self._n_predicted_by_rf = 0
+        return self
+
+    def _update(
+        self, X: np.ndarray, y: np.ndarray, weights: Optional[np.ndarray] = None
+    ) -> "RandomForestWithInstances":
+        """Inserts the data points which were added since the previous training into the leaves of the trees.
+
+        Parameters
+        ----------
+        X : np.ndarray [n_samples, n_features (config + instance features)]
+            Input data points, which start with the data points of the previous training.
+        y : np.ndarray [n_samples, ]
+            The corresponding target values.
+        weights : Optional[np.ndarray] [n_samples, ]
+            Weights of the data points.
+
+        Returns
+        -------
+        self
+        """
+        n_old = self.X.shape[0]
+        self.X = X
+        self.y = y
+        # The data container is kept up to date for the next full fit
+        self._init_data_container(self.X, self.y, weights)
+
+        new_weights = [1.0] * (X.shape[0] - n_old) if weights is None else np.asarray(weights)[n_old:].tolist()
+        for row_X, row_y, weight in zip(X[n_old:].tolist(), y[n_old:].tolist(), new_weights):
+            self.rf.pseudo_update(row_X, row_y, weight)
+
+        self._n_updates_since_fit += 1
+        self.flat_forest = None
+        self._n_predicted_by_rf = 0
         return self
 
-    def _init_data_container(self, X: np.ndarray, y: np.ndarray) -> regression.default_data_container:
+    def get_flat_forest(self) -> FlatForest:
+        """Returns the flattened copy of the trained forest, which is built on the first call after training.
+
+        The flattened forest evaluates the trees with NumPy, e.g. to find the leaves of many data points at once or
+        to walk the trees without a call into pyrfr per node.
+
+        Returns
+        -------
+        flat_forest : FlatForest
+        """
+        if self.flat_forest is None:
+            self.flat_forest = FlatForest(self.rf)
+        return self.flat_forest
+
+    def _init_data_container(
+        self, X: np.ndarray, y: np.ndarray, weights: Optional[np.ndarray] = None
+    ) -> regression.default_data_container:
         """Fills a pyrfr default data container, s.t. the forest knows categoricals and bounds for
         continous data.
 
+        The container of the previous training is reused if it holds the first data points of X, y and weights,
+        which is the case if data points were only added since then. Only the new data points are added to it.
+
         Parameters
         ----------
         X : np.ndarray [n_samples, n_features]
             Input data points
         y : np.ndarray [n_samples, ]
             Corresponding target values
+        weights : Optional[np.ndarray] [n_samples, ]
+            Weights of the data points, which default to 1
 
         Returns
         -------
         data : regression.default_data_container
             The filled data container that pyrfr can interpret
         """
-        # retrieve the types and the bounds from the ConfigSpace
-        data = regression.default_data_container(X.shape[1])
-
-        for i, (mn, mx) in enumerate(self.bounds):
-            if np.isnan(mx):
-                data.set_type_of_feature(i, mn)
-            else:
-                data.set_bounds_of_feature(i, mn, mx)
+        data = self._data_container
+        if data is not None and self._starts_with_data_container(X, y, weights):
+            n_old = data.num_data_points()
+        else:
+            # retrieve the types and the bounds from the ConfigSpace
+            data = regression.default_data_container(X.shape[1])
+
+            for i, (mn, mx) in enumerate(self.bounds):
+                if np.isnan(mx):
+                    data.set_type_of_feature(i, mn)
+                else:
+                    data.set_bounds_of_feature(i, mn, mx)
+            n_old = 0
+
+        # Converting the arrays to lists at once is faster than passing each row as an array to pyrfr
+        if weights is None:
+            for row_X, row_y in zip(X[n_old:].tolist(), y[n_old:].tolist()):
+                data.add_data_point(row_X, row_y)
+        else:
+            weights = np.array(weights, dtype=np.float64)
+            for row_X, row_y, weight in zip(X[n_old:].tolist(), y[n_old:].tolist(), weights[n_old:].tolist()):
+                data.add_data_point(row_X, row_y, weight)
 
-        for row_X, row_y in zip(X, y):
-            data.add_data_point(row_X, row_y)
+        self._data_container = data
+        self._data_container_content = (X, y, weights)
         return data
 
+    def _starts_with_data_container(self, X: np.ndarray, y: np.ndarray, weights: Optional[np.ndarray]) -> bool:
+        """Returns whether the data points in the data container are the first data points of X, y and weights."""
+        assert self._data_container_content is not None  # please mypy
+        old_X, old_y, old_weights = self._data_container_content
+        n_old = old_X.shape[0]
+        if X.shape[0] < n_old or X.shape[1] != old_X.shape[1] or (weights is None) != (old_weights is None):
+            return False
+
+        return (
+            np.array_equal(X[:n_old], old_X, equal_nan=True)
+            and np.array_equal(y[:n_old], old_y, equal_nan=True)
+            and (weights is None or (old_weights is not None and np.array_equal(weights[:n_old], old_weights)))
+        )
+
     def _predict(self, X: np.ndarray, cov_return_type: Optional[str] = "diagonal_cov") -> Tuple[np.ndarray, np.ndarray]:
         """Predict means and variances for given X.
 
@@ -219,22 +336,32 @@ class RandomForestWithInstances(BaseModel):
 
         X = self._impute_inactive(X)
 
-        if self.log_y:
-            all_preds = []
-            third_dimension = 0
+        # Building the flat forest costs about as much as predicting a few data points per training data point
+        # with pyrfr, hence it only pays off once enough data points are predicted
+        if self.flat_forest is None:
+            self._n_predicted_by_rf += X.shape[0]
+            if self._n_predicted_by_rf >= self.X.shape[0]:
+                self.flat_forest = FlatForest(self.rf)
 
-            # Gather data in a list of 2d arrays and get statistics about the required size of the 3d array
-            for row_X in X:
-                preds_per_tree = self.rf.all_leaf_values(row_X)
-                all_preds.append(preds_per_tree)
-                max_num_leaf_data = max(map(len, preds_per_tree))
-                third_dimension = max(max_num_leaf_data, third_dimension)
-
-            # Transform list of 2d arrays into a 3d array
-            preds_as_array = np.zeros((X.shape[0], self.rf_opts.num_trees, third_dimension)) * np.NaN
-            for i, preds_per_tree in enumerate(all_preds):
-                for j, pred in enumerate(preds_per_tree):
-                    preds_as_array[i, j, : len(pred)] = pred
+        if self.log_y:
+            if self.flat_forest is not None:
+                preds_as_array = self.flat_forest.all_leaf_values(X)
+            else:
+                all_preds = []
+                third_dimension = 0
+
+                # Gather data in a list of 2d arrays and get statistics about the required size of the 3d array
+                for row_X in X:
+                    preds_per_tree = self.rf.all_leaf_values(row_X)
+                    all_preds.append(preds_per_tree)
+                    max_num_leaf_data = max(map(len, preds_per_tree))
+                    third_dimension = max(max_num_leaf_data, third_dimension)
+
+                # Transform list of 2d arrays into a 3d array
+                preds_as_array = np.zeros((X.shape[0], self.rf_opts.num_trees, third_dimension)) * np.NaN
+                for i, preds_per_tree in enumerate(all_preds):
+                    for j, pred in enumerate(preds_per_tree):
+                        preds_as_array[i, j, : len(pred)] = pred
 
             # Do all necessary computation with vectorized functions
             preds_as_array = np.log(np.nanmean(np.exp(preds_as_array), axis=2) + VERY_SMALL_NUMBER)
@@ -242,6 +369,8 @@ class RandomForestWithInstances(BaseModel):
             # Compute the mean and the variance across the different trees
             means = preds_as_array.mean(axis=1)
             vars_ = preds_as_array.var(axis=1)
+        elif self.flat_forest is not None:
+            means, vars_ = self.flat_forest.predict_mean_var(X)
         else:
             means, vars_ = [], []
             for row_X in X:
@@ -294,29 +423,13 @@ class RandomForestWithInstances(BaseModel):
             raise ValueError("Rows in X should have %d entries but have %d!" % (len(self.bounds), X.shape[1]))
 
         X = self._impute_inactive(X)
+        instance_features = self._get_reduced_instance_features()
 
-        dat_ = np.zeros((X.shape[0], self.rf_opts.num_trees))  # marginalized predictions for each tree
-        for i, x in enumerate(X):
-
-            # marginalize over instances
-            # 1. get all leaf values for each tree
-            preds_trees = [[] for i in range(self.rf_opts.num_trees)]  # type: List[List[float]]
-
-            for feat in self.instance_features:
-                x_ = np.concatenate([x, feat])
-                preds_per_tree = self.rf.all_leaf_values(x_)
-                for tree_id, preds in enumerate(preds_per_tree):
-                    preds_trees[tree_id] += preds
-
-            # 2. average in each tree
-            if self.log_y:
-                for tree_id in range(self.rf_opts.num_trees):
-                    dat_[i, tree_id] = np.log(np.exp(np.array(preds_trees[tree_id])).mean())
-            else:
-                for tree_id in range(self.rf_opts.num_trees):
-                    dat_[i, tree_id] = np.array(preds_trees[tree_id]).mean()
+        # Each configuration is evaluated on all instances, hence the forest is always flattened. The responses in
+        # the leaves of all instances are averaged in each tree
+        dat_ = self.get_flat_forest().marginalize_over_instances(X, instance_features, log_y=self.log_y)
 
-        # 3. compute statistics across trees
+        # Compute statistics across trees
         mean_ = dat_.mean(axis=1)
         var = dat_.var(axis=1)
 
@@ -264,17 +264,30 @@ class PSMAC(object):
         Dict(Config -> Dict(inst_id(str) -> float))
 
         """
-        config_cost_per_inst = {}
-        results = []
-        for incumbent in incs:
-            cost_per_inst = new_rh.get_instance_costs_for_config(config=incumbent)
-            config_cost_per_inst[incumbent] = cost_per_inst
-            values = list(cost_per_inst.values())
-            if values:
-                results.append(np.mean(values))
-            else:
-                results.append(np.nan)
-        return results, config_cost_per_inst
+        costs = new_rh.get_costs(incs)
+
+        # Average the costs of each incumbent per instance (across seeds, see `get_instance_costs_for_config`)
+        # and then across instances
+        instances = {}  # type: Dict[str, int]
+        instance_indices = np.array([instances.setdefault(k.instance, len(instances)) for k in costs.keys], dtype=int)
+        groups = np.repeat(np.arange(len(incs)), costs.n_runs) * len(instances) + instance_indices
+        size = len(incs) * len(instances)
+        counts = np.bincount(groups, minlength=size).reshape(len(incs), len(instances))
+        sums = np.bincount(groups, weights=np.mean(costs.costs, axis=1), minlength=size).reshape(counts.shape)
+        # Instances without runs have a cost of zero, which does not change the sum
+        cost_per_inst = sums / np.maximum(counts, 1)
+
+        has_runs = counts > 0
+        with np.errstate(invalid="ignore"):
+            results = np.sum(cost_per_inst, axis=1) / np.sum(has_runs, axis=1)
+
+        config_cost_per_inst = {
+            incumbent: {
+                instance: float(inst_costs[index]) for instance, index in instances.items() if inst_has_runs[index]
+            }
+            for incumbent, inst_costs, inst_has_runs in zip(incs, cost_per_inst, has_runs)
+        }
+        return results.tolist(), config_cost_per_inst
 
     def _get_solver(self):
         # TODO: specify one output dir or no output dir
@@ -273,7 +273,7 @@ class Intensifier(AbstractRacer):
                 )
                 incumbent = challenger
             else:
-                inc_runs = run_history.get_runs_for_config(incumbent, only_max_observed_budget=True)
+                inc_runs = run_history.get_runs_view_for_config(incumbent).max_budget_runs
                 if len(inc_runs) > 0:
                     self.logger.debug("Skipping RUN_FIRST_CONFIG stage since " "incumbent has already been ran")
                     self.stage = IntensifierStage.RUN_INCUMBENT
@@ -285,7 +285,7 @@ class Intensifier(AbstractRacer):
             # A modified version, that not only checks for maxR
             # but also makes sure that there are runnable instances,
             # that is, instances has not been exhausted
-            inc_runs = run_history.get_runs_for_config(incumbent, only_max_observed_budget=True)
+            inc_runs = run_history.get_runs_view_for_config(incumbent).max_budget_runs
 
             # Line 4
             available_insts = self._get_inc_available_inst(incumbent, run_history)
@@ -624,7 +624,7 @@ class Intensifier(AbstractRacer):
         """
         # Line 4
         # find all instances that have the most runs on the inc
-        inc_runs = run_history.get_runs_for_config(incumbent, only_max_observed_budget=True)
+        inc_runs = run_history.get_runs_view_for_config(incumbent).max_budget_runs
         inc_inst = [s.instance for s in inc_runs]
         inc_inst = list(Counter(inc_inst).items())
 
@@ -662,7 +662,7 @@ class Intensifier(AbstractRacer):
             Whether to log changes of incumbents in trajectory
         """
         # output estimated performance of incumbent
-        inc_runs = run_history.get_runs_for_config(incumbent, only_max_observed_budget=True)
+        inc_runs = run_history.get_runs_view_for_config(incumbent).max_budget_runs
         inc_perf = run_history.get_cost(incumbent)
         format_value = format_array(inc_perf)
         self.logger.info(f"Updated estimated cost of incumbent on {len(inc_runs)} runs: {format_value}")
@@ -791,7 +791,7 @@ class Intensifier(AbstractRacer):
         new_incumbent: Optional[Configuration]
             Either challenger or incumbent
         """
-        chal_runs = run_history.get_runs_for_config(challenger, only_max_observed_budget=True)
+        chal_runs = run_history.get_runs_view_for_config(challenger).max_budget_runs
         chal_perf = run_history.get_cost(challenger)
 
         # if all <instance, seed> have been run, compare challenger performance
@@ -879,8 +879,8 @@ class Intensifier(AbstractRacer):
         """
         # get next instances left for the challenger
         # Line 8
-        inc_inst_seeds = set(run_history.get_runs_for_config(incumbent, only_max_observed_budget=True))
-        chall_inst_seeds = set(run_history.get_runs_for_config(challenger, only_max_observed_budget=True))
+        inc_inst_seeds = run_history.get_runs_view_for_config(incumbent).max_budget_run_set
+        chall_inst_seeds = run_history.get_runs_view_for_config(challenger).max_budget_run_set
         # Line 10
         missing_runs = sorted(inc_inst_seeds - chall_inst_seeds)
 
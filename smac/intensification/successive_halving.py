@@ -626,7 +626,7 @@ class _SuccessiveHalving(AbstractRacer):
         #   - there is no incumbent performance for the first ever 'intensify' run (from initial design)
         #   - during the 1st intensify run, the incumbent shouldn't be capped after being compared against itself
         if incumbent and incumbent != challenger:
-            inc_runs = run_history.get_runs_for_config(incumbent, only_max_observed_budget=True)
+            inc_runs = run_history.get_runs_view_for_config(incumbent).max_budget_runs
             inc_sum_cost = run_history.sum_cost(config=incumbent, instance_seed_budget_keys=inc_runs, normalize=True)
         else:
             inc_sum_cost = np.inf
@@ -831,8 +831,8 @@ class _SuccessiveHalving(AbstractRacer):
             return new_incumbent
 
         # get runs for both configurations
-        inc_runs = run_history.get_runs_for_config(incumbent, only_max_observed_budget=True)
-        chall_runs = run_history.get_runs_for_config(challenger, only_max_observed_budget=True)
+        inc_runs = run_history.get_runs_view_for_config(incumbent).max_budget_runs
+        chall_runs = run_history.get_runs_view_for_config(challenger).max_budget_runs
 
         if len(inc_runs) > 1:
             raise ValueError(
@@ -1016,23 +1016,22 @@ class _SuccessiveHalving(AbstractRacer):
         List[Configuration]
             top challenger configurations, sorted in increasing costs
         """
-        # extracting costs for each given configuration
-        config_costs = {}
         # sample list instance-seed-budget key to act as base
-        run_key = run_history.get_runs_for_config(configs[0], only_max_observed_budget=True)
+        run_key = run_history.get_runs_view_for_config(configs[0])
         for c in configs:
             # ensuring that all configurations being compared are run on the same set of instance, seed & budget
-            cur_run_key = run_history.get_runs_for_config(c, only_max_observed_budget=True)
+            cur_run_key = run_history.get_runs_view_for_config(c)
 
-            # Move to compare set -- get_runs_for_config queries form a dictionary
-            # which is not an ordered structure. Some queries to that dictionary returned unordered
-            # list which wrongly trigger the below if
-            if set(cur_run_key) != set(run_key):
+            # Compare sets because the runs of the configurations might have been added in a different order
+            if cur_run_key.max_budget_run_set != run_key.max_budget_run_set:
                 raise ValueError(
                     "Cannot compare configs that were run on different instances-seeds-budgets: %s vs %s"
-                    % (run_key, cur_run_key)
+                    % (list(run_key.max_budget_runs), list(cur_run_key.max_budget_runs))
                 )
-            config_costs[c] = run_history.get_cost(c)
+
+        # extracting costs for each given configuration at once
+        costs = run_history.get_costs(configs, normalize=True).mean
+        config_costs = dict(zip(configs, costs.tolist()))
 
         configs_sorted = [k for k, v in sorted(config_costs.items(), key=lambda item: item[1])]
         # select top configurations only
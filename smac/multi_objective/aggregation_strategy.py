@@ -32,6 +32,22 @@ class AggregationStrategy(AbstractMultiObjectiveAlgorithm):
         """
         raise NotImplementedError
 
+    def aggregate(self, costs: np.ndarray) -> np.ndarray:
+        """
+        Transform many multi-objective losses at once, like calling the strategy for each row.
+
+        Parameters
+        ----------
+        costs : np.ndarray
+            Normalized values of shape (number of losses, number of objectives).
+
+        Returns
+        -------
+        costs : np.ndarray
+            Combined costs of shape (number of losses,).
+        """
+        return np.array([self(row) for row in costs.tolist()], dtype=float).reshape(len(costs))
+
 
 class MeanAggregationStrategy(AggregationStrategy):
     """
@@ -54,3 +70,19 @@ class MeanAggregationStrategy(AggregationStrategy):
             Combined cost.
         """
         return np.mean(values, axis=0)
+
+    def aggregate(self, costs: np.ndarray) -> np.ndarray:
+        """
+        Transform many multi-objective losses at once.
+
+        Parameters
+        ----------
+        costs : np.ndarray
+            Normalized values of shape (number of losses, number of objectives).
+
+        Returns
+        -------
+        costs : np.ndarray
+            Combined costs of shape (number of losses,).
+        """
+        return np.mean(costs, axis=1)
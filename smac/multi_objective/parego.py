@@ -39,3 +39,23 @@ class ParEGO(AggregationStrategy):
         # Weight the values
         theta_f = theta * values
         return np.max(theta_f, axis=0) + self.rho * np.sum(theta_f, axis=0)
+
+    def aggregate(self, costs: np.ndarray) -> np.ndarray:
+        """
+        Transform many multi-objective losses at once. Each loss gets its own weights, which are drawn in
+        the same order as by calling the strategy for each row.
+
+        Parameters
+        ----------
+        costs : np.ndarray
+            Normalized values of shape (number of losses, number of objectives).
+
+        Returns
+        -------
+        costs : np.ndarray
+            Combined costs of shape (number of losses,).
+        """
+        theta = self.rng.rand(*costs.shape)
+        theta = theta / (np.sum(theta, axis=1, keepdims=True) + 1e-10)
+        theta_f = theta * costs
+        return np.max(theta_f, axis=1) + self.rho * np.sum(theta_f, axis=1)
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import numpy as np
+
 
 def normalize_costs(values: list[float], bounds: list[tuple[float, float]] | None = None) -> list[float]:
     """
@@ -38,3 +40,33 @@ def normalize_costs(values: list[float], bounds: list[tuple[float, float]] | Non
         costs += [cost]
 
     return costs
+
+
+def normalize_cost_matrix(costs: np.ndarray, bounds: list[tuple[float, float]] | None = None) -> np.ndarray:
+    """
+    Normalizes many costs at once, like `normalize_costs` does for a single cost.
+
+    Parameters
+    ----------
+    costs : np.ndarray
+        Costs of shape (..., number of objectives).
+    bounds : list[tuple[float, float]] | None, optional
+        List of tuple of bounds. By default None. If no bounds are passed, the costs are returned
+        unnormalized.
+
+    Returns
+    -------
+    normalized_costs : np.ndarray
+        Normalized costs of the same shape. The objectives with the same min and max bound are set to 1.
+    """
+    if bounds is None:
+        return costs
+
+    if costs.shape[-1] != len(bounds):
+        raise ValueError("Number of values and bounds must be equal.")
+
+    lower, upper = np.array(bounds, dtype=float).T
+    q = upper - lower
+    constant = q < 1e-10
+
+    return np.where(constant, 1.0, (costs - lower) / np.where(constant, 1.0, q))
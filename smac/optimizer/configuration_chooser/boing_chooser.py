@@ -458,12 +458,8 @@ class BOinGChooser(EPMChooser):
     def _collect_all_data_to_train_model(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
         """Similar to the implementaiton of EPMChooser, however, we also return the raw values here."""
         # if we use a float value as a budget, we want to train the model only on the highest budget
-        available_budgets = []
-        for run_key in self.runhistory.data.keys():
-            available_budgets.append(run_key.budget)
-
         # Sort available budgets from highest to lowest budget
-        available_budgets = sorted(list(set(available_budgets)), reverse=True)
+        available_budgets = self.runhistory.get_budgets()[::-1]
 
         # Get #points per budget and if there are enough samples, then build a model
         for b in available_budgets:
@@ -539,10 +535,10 @@ def subspace_extraction(
     in_ss_dims:
         indices of the points that lie inside the subregion
     """
-    trees = model.rf.get_all_trees()
-    trees = [tree for tree in trees]
-    num_trees = len(trees)
-    node_indices = [0] * num_trees
+    # The trees are walked in their flattened form, which avoids calling into pyrfr for every node
+    forest = model.get_flat_forest()
+    num_trees = forest.num_trees
+    node_indices = forest.roots.tolist()
 
     indices_trees = np.arange(num_trees)
     np.random.shuffle(indices_trees)
@@ -573,30 +569,29 @@ def subspace_extraction(
         for i in indices_trees:
             if stop_update[i]:
                 continue
-            tree = trees[int(i)]
             node_idx = node_indices[i]
-            node = tree.get_node(node_idx)
+            feature_idx = forest.features[node_idx]
 
-            if node.is_a_leaf():
+            if feature_idx < 0:
+                # the node is a leaf
                 stop_update[i] = True
                 continue
 
-            feature_idx = node.get_feature_index()
             cont_feature_idx = np.where(feature_idx == cont_dims)[0]
             if cont_feature_idx.size == 0:
                 # This node split the subspace w.r.t. the categorical hyperparameters
                 cat_feature_idx = np.where(feature_idx == cat_dims)[0][0]
-                split_value = node.get_cat_split()
+                split_value = np.flatnonzero(forest.categories_left[forest.categorical_splits[node_idx]]).astype(float)
                 intersect = np.intersect1d(ss_bounds_cat[cat_feature_idx], split_value, assume_unique=True)
 
                 if len(intersect) == len(ss_bounds_cat[cat_feature_idx]):
                     # will fall into the left child
                     temp_child_idx = 0
-                    node_indices[i] = node.get_child_index(temp_child_idx)
+                    node_indices[i] = forest.children[node_idx, temp_child_idx]
                 elif len(intersect) == 0:
                     # will fall into the left child
                     temp_child_idx = 1
-                    node_indices[i] = node.get_child_index(temp_child_idx)
+                    node_indices[i] = forest.children[node_idx, temp_child_idx]
                 else:
                     if challenger[feature_idx] in intersect:
                         temp_child_idx = 0
@@ -610,17 +605,17 @@ def subspace_extraction(
                         # number of points inside subspace is still greater than num_min, we could go deeper
                         ss_bounds_cat[cat_feature_idx] = temp_bound_ss
                         ss_indices = temp_node_indices
-                        node_indices[i] = node.get_child_index(temp_child_idx)
+                        node_indices[i] = forest.children[node_idx, temp_child_idx]
                     else:
                         if check_num_min:
                             stop_update[i] = True
                         else:
                             # if we don't check the num_min, we will stay go deeper into the child nodes without
                             # splitting the subspace
-                            node_indices[i] = node.get_child_index(temp_child_idx)
+                            node_indices[i] = forest.children[node_idx, temp_child_idx]
             else:
                 # This node split the subspace w.r.t. the continuous hyperparameters
-                split_value = node.get_num_split_value()
+                split_value = forest.thresholds[node_idx]
                 cont_feature_idx = cont_feature_idx.item()
                 if ss_bounds_cont[cont_feature_idx][0] <= split_value <= ss_bounds_cont[cont_feature_idx][1]:
                     # the subspace can be further split
@@ -636,15 +631,15 @@ def subspace_extraction(
                         # number of points inside subspace is still greater than num_min
                         ss_bounds_cont[cont_feature_idx] = temp_bound_ss
                         ss_indices = temp_node_indices
-                        node_indices[i] = node.get_child_index(temp_child_idx)
+                        node_indices[i] = forest.children[node_idx, temp_child_idx]
                     else:
                         if check_num_min:
                             stop_update[i] = True
                         else:
-                            node_indices[i] = node.get_child_index(temp_child_idx)
+                            node_indices[i] = forest.children[node_idx, temp_child_idx]
                 else:
                     temp_child_idx = 1 if challenger[feature_idx] >= split_value else 0
-                    node_indices[i] = node.get_child_index(temp_child_idx)
+                    node_indices[i] = forest.children[node_idx, temp_child_idx]
 
     while sum(stop_update) < num_trees:
         traverse_forest()
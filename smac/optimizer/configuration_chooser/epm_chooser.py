@@ -16,6 +16,10 @@ from smac.optimizer.configuration_chooser.random_chooser import (
     ChooserNoCoolDown,
     RandomChooser,
 )
+from smac.optimizer.configuration_chooser.training_set import (
+    KeepAll,
+    TrainingSetPolicy,
+)
 from smac.runhistory.runhistory import RunHistory
 from smac.runhistory.runhistory2epm import AbstractRunHistory2EPM
 from smac.scenario.scenario import Scenario
@@ -54,6 +58,9 @@ class EPMChooser:
         Choose x_best for computing the acquisition function via the model instead of via the observations.
     min_samples_model: int
         Minimum number of samples to build a model
+    training_set_policy: Optional[TrainingSetPolicy]
+        Policy which selects the data points the model is trained on, e.g. to cap the training time in long runs.
+        By default (None), the model is trained on all data points.
     epm_chooser_kwargs: Any:
         additional arguments passed to EPMChooser (Might be used by its subclasses)
     """
@@ -72,6 +79,7 @@ class EPMChooser:
         random_configuration_chooser: RandomChooser = ChooserNoCoolDown(modulus=2.0),
         predict_x_best: bool = True,
         min_samples_model: int = 1,
+        training_set_policy: Optional[TrainingSetPolicy] = None,
         **epm_chooser_kwargs: Any,
     ):
         self.logger = logging.getLogger(self.__module__ + "." + self.__class__.__name__)
@@ -98,18 +106,15 @@ class EPMChooser:
         self.predict_x_best = predict_x_best
 
         self.min_samples_model = min_samples_model
+        self.training_set_policy = training_set_policy if training_set_policy is not None else KeepAll()
         self.currently_considered_budgets = [
             0.0,
         ]
 
     def _collect_data_to_train_model(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
         # if we use a float value as a budget, we want to train the model only on the highest budget
-        available_budgets = []
-        for run_key in self.runhistory.data.keys():
-            available_budgets.append(run_key.budget)
-
         # Sort available budgets from highest to lowest budget
-        available_budgets = sorted(list(set(available_budgets)), reverse=True)
+        available_budgets = self.runhistory.get_budgets()[::-1]
 
         # Get #points per budget and if there are enough samples, then build a model
         for b in available_budgets:
@@ -163,7 +168,15 @@ class EPMChooser:
             # Only return a single point to avoid an overly high number of
             # random search iterations
             return self._random_search.maximize(runhistory=self.runhistory, stats=self.stats, num_points=1)
-        self.model.train(X, Y)
+        # The rows are weighted by the number of runs they aggregate if the runhistory transformer aggregates seeds
+        weights = self.rh2EPM.weights
+        indices = self.training_set_policy.select(X, Y, self.rng, positions=self.rh2EPM.run_positions)
+        if indices is not None:
+            self.logger.debug("Training model on %d of %d data points" % (len(indices), X.shape[0]))
+            X, Y = X[indices], Y[indices]
+            if weights is not None:
+                weights = weights[indices]
+        self.model.train(X, Y, weights=weights)
 
         if incumbent_value is not None:
             best_observation = incumbent_value
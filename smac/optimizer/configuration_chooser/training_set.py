@@ -0,0 +1,194 @@
+from abc import ABC, abstractmethod
+from typing import List, Optional
+
+import numpy as np
+
+__copyright__ = "Copyright 2022, AutoML.org Freiburg-Hannover"
+__license__ = "3-clause BSD"
+
+
+class TrainingSetPolicy(ABC):
+    """Abstract base of policies which select the data points the EPM is trained on from the data points
+    returned by the runhistory transformer (see `EPMChooser`).
+
+    The data points are in the order of the runs in the runhistory, i.e. the most recent runs are last.
+    TIMEOUT (and imputed censored) runs are appended after the successful runs, though, hence policies which
+    depend on the recency of the data points use the positions of their runs in the runhistory instead (see
+    `AbstractRunHistory2EPM.run_positions`). Policies which sample use the random number generator they are
+    called with, which is the one of SMAC, hence the selection is reproducible.
+    """
+
+    @abstractmethod
+    def select(
+        self,
+        X: np.ndarray,
+        Y: np.ndarray,
+        rng: np.random.RandomState,
+        positions: Optional[np.ndarray] = None,
+    ) -> Optional[np.ndarray]:
+        """Returns the indices of the data points to train on in ascending order, or None to train on all.
+
+        Parameters
+        ----------
+        X : np.ndarray [n_samples, n_features]
+            Data points.
+        Y : np.ndarray [n_samples, n_objectives]
+            Transformed costs of the data points. Lower is better.
+        rng : np.random.RandomState
+            Random number generator for sampling.
+        positions : Optional[np.ndarray] [n_samples]
+            Positions of the runs of the data points in the runhistory, larger is more recent. If None, the data
+            points are assumed to be in the order of their runs.
+
+        Returns
+        -------
+        indices : Optional[np.ndarray]
+        """
+        raise NotImplementedError
+
+
+class KeepAll(TrainingSetPolicy):
+    """Trains on all data points."""
+
+    def select(
+        self,
+        X: np.ndarray,
+        Y: np.ndarray,
+        rng: np.random.RandomState,
+        positions: Optional[np.ndarray] = None,
+    ) -> Optional[np.ndarray]:
+        """Returns None."""
+        return None
+
+
+class KeepRecent(TrainingSetPolicy):
+    """Trains on the data points of the most recent runs (a sliding window).
+
+    Parameters
+    ----------
+    max_size : int
+        Number of data points to keep.
+    """
+
+    def __init__(self, max_size: int):
+        if max_size < 1:
+            raise ValueError("max_size must be positive, but is %d." % max_size)
+        self.max_size = max_size
+
+    def select(
+        self,
+        X: np.ndarray,
+        Y: np.ndarray,
+        rng: np.random.RandomState,
+        positions: Optional[np.ndarray] = None,
+    ) -> Optional[np.ndarray]:
+        """Returns the indices of the ``max_size`` data points of the most recent runs."""
+        n_samples = X.shape[0]
+        if n_samples <= self.max_size:
+            return None
+        if positions is None:
+            return np.arange(n_samples - self.max_size, n_samples)
+        return np.sort(np.argsort(positions, kind="stable")[n_samples - self.max_size :])
+
+
+class KeepTopAndSubsample(TrainingSetPolicy):
+    """Trains on the best data points by cost and on a uniform subsample of the others.
+
+    Parameters
+    ----------
+    max_size : int
+        Number of data points to keep.
+    top_fraction : float, defaults to 0.5
+        Fraction of ``max_size`` which is filled with the data points with the lowest costs (of the first
+        objective). The remaining data points are sampled uniformly without replacement from the others.
+    """
+
+    def __init__(self, max_size: int, top_fraction: float = 0.5):
+        if max_size < 1:
+            raise ValueError("max_size must be positive, but is %d." % max_size)
+        if not 0 <= top_fraction <= 1:
+            raise ValueError("top_fraction must be in [0, 1], but is %f." % top_fraction)
+        self.max_size = max_size
+        self.top_fraction = top_fraction
+
+    def select(
+        self,
+        X: np.ndarray,
+        Y: np.ndarray,
+        rng: np.random.RandomState,
+        positions: Optional[np.ndarray] = None,
+    ) -> Optional[np.ndarray]:
+        """Returns the indices of the ``top_fraction * max_size`` best data points and of a uniform
+        subsample of the others."""
+        n_samples = X.shape[0]
+        if n_samples <= self.max_size:
+            return None
+
+        n_top = int(round(self.top_fraction * self.max_size))
+        # A stable sort keeps earlier data points first among equal costs
+        order = np.argsort(Y.reshape(n_samples, -1)[:, 0], kind="stable")
+        top, rest = order[:n_top], order[n_top:]
+        sample = rng.choice(rest, size=self.max_size - n_top, replace=False)
+        return np.sort(np.concatenate((top, sample)))
+
+
+class Reservoir(TrainingSetPolicy):
+    """Trains on a uniform sample of at most ``max_size`` data points, which is maintained by reservoir
+    sampling. In contrast to drawing a new sample in each iteration, the sample only changes by the data
+    points which replace sampled ones, hence the model sees mostly the same data in subsequent iterations.
+
+    Data points are identified by their index, hence the reservoir is only kept if the data points of the
+    previous iteration (and their costs) are the first data points of this iteration. Otherwise, the reservoir
+    is sampled anew, e.g. if a successful run was added before the TIMEOUT runs, if the transformed costs
+    changed (e.g. by rescaling or imputation) or if the model is trained on another budget.
+
+    Parameters
+    ----------
+    max_size : int
+        Number of data points to keep.
+    """
+
+    def __init__(self, max_size: int):
+        if max_size < 1:
+            raise ValueError("max_size must be positive, but is %d." % max_size)
+        self.max_size = max_size
+        self._reservoir = []  # type: List[int]
+        # The data points of the previous iteration
+        self._X = np.empty((0, 0))
+        self._Y = np.empty((0, 0))
+
+    def select(
+        self,
+        X: np.ndarray,
+        Y: np.ndarray,
+        rng: np.random.RandomState,
+        positions: Optional[np.ndarray] = None,
+    ) -> Optional[np.ndarray]:
+        """Adds the new data points to the reservoir and returns the indices of the data points in it."""
+        n_samples = X.shape[0]
+        n_seen = self._X.shape[0]
+        if not self._is_appended(X, Y):
+            self._reservoir, n_seen = [], 0
+
+        reservoir = self._reservoir
+        for index in range(n_seen, n_samples):
+            if len(reservoir) < self.max_size:
+                reservoir.append(index)
+            else:
+                replace = rng.randint(index + 1)
+                if replace < self.max_size:
+                    reservoir[replace] = index
+        self._X, self._Y = X.copy(), Y.copy()
+
+        if n_samples <= self.max_size:
+            return None
+        return np.sort(np.array(reservoir, dtype=np.int64))
+
+    def _is_appended(self, X: np.ndarray, Y: np.ndarray) -> bool:
+        """Returns whether the data points of the previous iteration are the first data points of X and Y."""
+        n_seen = self._X.shape[0]
+        if X.shape[0] < n_seen or X.shape[1:] != self._X.shape[1:] or Y.shape[1:] != self._Y.shape[1:]:
+            return False
+        return np.array_equal(X[:n_seen], self._X, equal_nan=True) and np.array_equal(
+            Y[:n_seen], self._Y, equal_nan=True
+        )
@@ -4,10 +4,10 @@ import glob
 import logging
 import os
 import re
-import tempfile
 
 from smac.configspace import ConfigurationSpace
 from smac.runhistory.runhistory import RunHistory
+from smac.runhistory.sqlite import SQLiteRunHistory
 
 __copyright__ = "Copyright 2021, AutoML.org Freiburg-Hannover"
 __license__ = "3-clause BSD"
@@ -26,6 +26,9 @@ def read(
 ) -> None:
     """Update runhistory with run results from concurrent runs of pSMAC.
 
+    A `SQLiteRunHistory` reads the runs which the other processes wrote to its database since the last call
+    instead, the output directories are not searched.
+
     Parameters
     ----------
     run_history : smac.runhistory.RunHistory
@@ -40,6 +43,11 @@ def read(
         A ConfigurationSpace object to check if loaded configurations are valid.
     logger : logging.Logger
     """
+    if isinstance(run_history, SQLiteRunHistory):
+        n_runs = run_history.read(configuration_space)
+        logger.info("Shared model mode: Finished loading new runs, read %d new or updated runs." % n_runs)
+        return
+
     numruns_in_runhistory = len(run_history.data)
     initial_numruns_in_runhistory = numruns_in_runhistory
 
@@ -70,7 +78,9 @@ def read(
 def write(run_history: RunHistory, output_directory: str, logger: logging.Logger) -> None:
     """Write the runhistory to the output directory.
 
-    Overwrites previously outputted runhistories.
+    Only the runs added since the last call are appended to the journal of the runhistory file, which is
+    periodically compacted into a complete runhistory file. See `RunHistory.save_json`. A `SQLiteRunHistory`
+    has written its runs to its database already, hence nothing is written.
 
     Parameters
     ----------
@@ -81,12 +91,11 @@ def write(run_history: RunHistory, output_directory: str, logger: logging.Logger
 
     logger : logging.Logger
     """
+    if isinstance(run_history, SQLiteRunHistory):
+        return
+
     output_filename = os.path.join(output_directory, RUNHISTORY_FILEPATTERN)
 
     logger.debug("Saving runhistory to %s" % output_filename)
 
-    with tempfile.NamedTemporaryFile("wb", dir=output_directory, delete=False) as fh:
-        temporary_filename = fh.name
-
-    run_history.save_json(temporary_filename, save_external=False)
-    os.rename(temporary_filename, output_filename)
+    run_history.save_json(output_filename, save_external=False, append=True)
@@ -531,14 +531,21 @@ class SMBO(object):
                 self._stop = True
 
         if self.scenario.save_instantly:  # type: ignore[attr-defined] # noqa F821
-            self.save()
+            self.save(append=True)
 
         return
 
-    def save(self) -> None:
-        """Saves the current stats and runhistory."""
+    def save(self, append: bool = False) -> None:
+        """Saves the current stats and runhistory.
+
+        Parameters
+        ----------
+        append : bool
+            If True, only the runs added since the last save are appended to the journal of the runhistory
+            instead of rewriting the complete runhistory file. See `RunHistory.save_json`.
+        """
         self.stats.save()
 
         output_dir = self.scenario.output_dir_for_this_run
         if output_dir is not None:
-            self.runhistory.save_json(fn=os.path.join(output_dir, "runhistory.json"))
+            self.runhistory.save_json(fn=os.path.join(output_dir, "runhistory.json"), append=append)
@@ -0,0 +1,277 @@
+from typing import (
+    Any,
+    Dict,
+    ItemsView,
+    Iterable,
+    Iterator,
+    Mapping,
+    Optional,
+    Set,
+    Tuple,
+    ValuesView,
+)
+
+import weakref
+
+import numpy as np
+
+from smac.configspace import Configuration, ConfigurationSpace
+
+__copyright__ = "Copyright 2022, AutoML.org Freiburg-Hannover"
+__license__ = "3-clause BSD"
+
+
+class ConfigurationStore:
+    """Stores the configurations of a runhistory as rows of a vector matrix, which is indexed by config id.
+
+    Configurations are looked up by the bytes of their vector, which is much cheaper than hashing the
+    configuration. Equal configurations with different vectors (e.g. created from values, which are rounded
+    differently than sampled ones) are found by the hash of the configuration, and their vector is added to
+    the index afterwards.
+
+    By default, the configurations are kept as they were added. If ``lazy`` is set, only configurations which
+    can not be created exactly from their vector (e.g. those created from values) are kept. The others are
+    created on access and only kept as long as they are referenced elsewhere.
+
+    Parameters
+    ----------
+    lazy : bool, defaults to False
+        Whether to create configurations from their vector on access instead of keeping them.
+    capacity : int, defaults to 64
+        Initial number of rows of the vector matrix, which is doubled in size whenever it is full.
+    """
+
+    def __init__(self, lazy: bool = False, capacity: int = 64) -> None:
+        self.lazy = lazy
+        self._initial_capacity = max(1, capacity)
+        self.clear()
+
+    def clear(self) -> None:
+        """Removes all configurations."""
+        self._cs = None  # type: Optional[ConfigurationSpace]
+        self._vectors = np.empty((0, 0), dtype=np.float64)
+
+        # Ids in the order they were added, mapped to the origin of their configuration
+        self._origins = {}  # type: Dict[int, Optional[str]]
+        self._by_vector = {}  # type: Dict[bytes, int]
+        self._by_hash = {}  # type: Dict[int, int]
+        # Ids of configurations which were added again under another id, see `add`
+        self._aliases = set()  # type: Set[int]
+
+        self._configs = {}  # type: Dict[int, Configuration]
+        self._cache = weakref.WeakValueDictionary()  # type: weakref.WeakValueDictionary[int, Configuration]
+
+    def __len__(self) -> int:
+        return len(self._origins)
+
+    def __contains__(self, config_id: object) -> bool:
+        return config_id in self._origins
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._origins)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = dict(self.__dict__)
+        del state["_cache"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._cache = weakref.WeakValueDictionary()
+
+    @property
+    def vectors(self) -> np.ndarray:
+        """Read-only view of the vector matrix, row ``i`` is the vector of config id ``i``. Rows of unused ids
+        are undefined."""
+        view = self._vectors[: max(self._origins, default=-1) + 1]
+        view.flags.writeable = False
+        return view
+
+    def get_vector(self, config_id: int) -> np.ndarray:
+        """Returns a read-only view of the vector of a configuration."""
+        if config_id not in self._origins:
+            raise KeyError(config_id)
+
+        view = self._vectors[config_id]
+        view.flags.writeable = False
+        return view
+
+    def get_vectors(self, config_ids: Iterable[int]) -> np.ndarray:
+        """Returns the vectors of the configurations as a matrix with one row per config id."""
+        config_ids = np.fromiter(config_ids, dtype=np.int64)
+        for config_id in config_ids.tolist():
+            if config_id not in self._origins:
+                raise KeyError(config_id)
+
+        return self._vectors[config_ids].reshape(len(config_ids), self._vectors.shape[1])
+
+    def get_configuration(self, config_id: int) -> Configuration:
+        """Returns the configuration of an id, which is created from its vector if it is not kept."""
+        config = self._configs.get(config_id)
+        if config is not None:
+            return config
+
+        config = self._cache.get(config_id)
+        if config is None:
+            if config_id not in self._origins:
+                raise KeyError(config_id)
+
+            config = Configuration(self._cs, vector=self._vectors[config_id].copy(), origin=self._origins[config_id])
+            self._cache[config_id] = config
+
+        return config
+
+    def find(self, config: Any) -> Optional[int]:
+        """Returns the id of a configuration or None if the configuration is unknown."""
+        return self._find(config)[0]
+
+    def _find(self, config: Any) -> Tuple[Optional[int], Optional[np.ndarray], Optional[int]]:
+        """Returns the id of a configuration (or None), its vector and its hash (if it was computed)."""
+        if not isinstance(config, Configuration):
+            return None, None, None
+
+        vector = config.get_array()
+        config_id = self._by_vector.get(vector.tobytes())
+        if config_id is not None:
+            return config_id, vector, None
+
+        config_hash = hash(config)
+        config_id = self._by_hash.get(config_hash)
+        if config_id is not None and self.get_configuration(config_id) == config:
+            self._by_vector[vector.tobytes()] = config_id
+            return config_id, vector, config_hash
+
+        return None, vector, config_hash
+
+    def add(self, config: Configuration, config_id: int) -> None:
+        """Adds a configuration under an id, which must not be used yet.
+
+        A configuration can be added under several ids (e.g. when it is contained multiple times in a file), in
+        which case it is found under the id it was added with last.
+        """
+        if config_id in self._origins:
+            raise ValueError("Config id %d is used already." % config_id)
+
+        previous_id, vector, config_hash = self._find(config)
+        if vector is None:
+            raise TypeError("Expected a configuration, got %s." % type(config).__name__)
+        if config_hash is None:
+            config_hash = hash(config)
+
+        if self._cs is None:
+            self._cs = config.configuration_space
+            self._vectors = np.empty((max(self._initial_capacity, config_id + 1), len(vector)), dtype=np.float64)
+        elif len(vector) != self._vectors.shape[1]:
+            raise ValueError(
+                "Configuration has %d hyperparameters, but the configurations of the runhistory have %d."
+                % (len(vector), self._vectors.shape[1])
+            )
+
+        if config_id >= len(self._vectors):
+            self._grow(config_id + 1)
+
+        self._vectors[config_id] = vector
+        self._origins[config_id] = config.origin
+        self._by_vector[vector.tobytes()] = config_id
+        self._by_hash[config_hash] = config_id
+        if previous_id is not None:
+            self._aliases.add(previous_id)
+            self._by_vector[self._vectors[previous_id].tobytes()] = config_id
+
+        if (
+            not self.lazy
+            or config.configuration_space is not self._cs
+            or Configuration(self._cs, vector=vector.copy()) != config
+        ):
+            self._configs[config_id] = config
+        else:
+            self._cache[config_id] = config
+
+    def _grow(self, n_rows: int) -> None:
+        capacity = len(self._vectors)
+        while capacity < n_rows:
+            capacity *= 2
+
+        vectors = np.empty((capacity, self._vectors.shape[1]), dtype=np.float64)
+        vectors[: len(self._vectors)] = self._vectors
+        self._vectors = vectors
+
+    def iter_config_ids(self) -> Iterator[int]:
+        """Iterates over the ids under which the configurations were added last, i.e. one id per
+        configuration."""
+        if not self._aliases:
+            return iter(self._origins)
+        return (config_id for config_id in self._origins if config_id not in self._aliases)
+
+    def n_configs(self) -> int:
+        """Returns the number of distinct configurations."""
+        return len(self._origins) - len(self._aliases)
+
+
+class IdsConfigView(Mapping[int, Configuration]):
+    """Mapping from config id to configuration (``RunHistory.ids_config``) backed by a `ConfigurationStore`."""
+
+    def __init__(self, store: ConfigurationStore) -> None:
+        self._store = store
+
+    def __getitem__(self, config_id: int) -> Configuration:
+        return self._store.get_configuration(config_id)
+
+    def __contains__(self, config_id: object) -> bool:
+        return config_id in self._store
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._store)
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+    def __repr__(self) -> str:
+        return "%s(%r)" % (self.__class__.__name__, dict(self.items()))
+
+
+class ConfigIdsView(Mapping[Configuration, int]):
+    """Mapping from configuration to config id (``RunHistory.config_ids``) backed by a `ConfigurationStore`."""
+
+    def __init__(self, store: ConfigurationStore) -> None:
+        self._store = store
+
+    def __getitem__(self, config: Configuration) -> int:
+        config_id = self._store.find(config)
+        if config_id is None:
+            raise KeyError(config)
+        return config_id
+
+    def __iter__(self) -> Iterator[Configuration]:
+        return (self._store.get_configuration(config_id) for config_id in self._store.iter_config_ids())
+
+    def __len__(self) -> int:
+        return self._store.n_configs()
+
+    def values(self) -> ValuesView[int]:
+        return _ConfigIdsValues(self)
+
+    def items(self) -> ItemsView[Configuration, int]:
+        return _ConfigIdsItems(self)
+
+    def __repr__(self) -> str:
+        return "%s(%r)" % (self.__class__.__name__, dict(self.items()))
+
+
+class _ConfigIdsValues(ValuesView[int]):
+    """Iterates over the ids without looking up the configurations."""
+
+    _mapping: ConfigIdsView
+
+    def __iter__(self) -> Iterator[int]:
+        return self._mapping._store.iter_config_ids()
+
+
+class _ConfigIdsItems(ItemsView[Configuration, int]):
+    """Iterates over configurations and ids without looking up the configurations."""
+
+    _mapping: ConfigIdsView
+
+    def __iter__(self) -> Iterator[Tuple[Configuration, int]]:
+        store = self._mapping._store
+        return ((store.get_configuration(config_id), config_id) for config_id in store.iter_config_ids())
@@ -1,30 +1,51 @@
 from __future__ import annotations
 
 from typing import (
+    TYPE_CHECKING,
     Any,
     Dict,
+    FrozenSet,
     Iterable,
     Iterator,
     List,
     Mapping,
     Optional,
+    Sequence,
+    Set,
     Tuple,
     Type,
     Union,
-    cast,
 )
 
+import bisect
 import collections
 import json
+import os
+import tempfile
+from array import array
 from enum import Enum
 
 import numpy as np
 
 from smac.configspace import Configuration, ConfigurationSpace
-from smac.multi_objective.utils import normalize_costs
+from smac.multi_objective.utils import normalize_cost_matrix, normalize_costs
+from smac.runhistory.configurations import (
+    ConfigIdsView,
+    ConfigurationStore,
+    IdsConfigView,
+)
 from smac.tae import StatusType
+from smac.utils.io.serialization import (
+    Serializer,
+    decode_enums,
+    encode_enums,
+    get_serializer,
+)
 from smac.utils.logging import PickableLoggerAdapter
 
+if TYPE_CHECKING:
+    from smac.runhistory.snapshot import RunHistorySnapshot
+
 __author__ = "Marius Lindauer"
 __copyright__ = "Copyright 2015, ML4AAD"
 __license__ = "3-clause BSD"
@@ -34,6 +55,18 @@ __version__ = "0.0.1"
 
 logger = PickableLoggerAdapter(__name__)
 
+# The journal of a runhistory file is stored next to it with this suffix (see `RunHistory.save_json`)
+JOURNAL_SUFFIX = ".journal"
+# The journal is compacted into a new snapshot once it contains more runs than the snapshot, but not before
+# it contains at least this number of runs
+JOURNAL_MIN_COMPACTION_SIZE = 1000
+
+# When to check that runs can be written to json, see `RunHistory`
+JSON_VALIDATION_STRICT = "strict"
+JSON_VALIDATION_DEFERRED = "deferred"
+JSON_VALIDATION_OFF = "off"
+JSON_VALIDATION_MODES = (JSON_VALIDATION_STRICT, JSON_VALIDATION_DEFERRED, JSON_VALIDATION_OFF)
+
 
 # NOTE class instead of collection to have a default value for budget in RunKey
 class RunKey(collections.namedtuple("RunKey", ["config_id", "instance_id", "seed", "budget"])):
@@ -102,8 +135,75 @@ InstSeedKey = collections.namedtuple("InstSeedKey", ["instance", "seed"])
 
 InstSeedBudgetKey = collections.namedtuple("InstSeedBudgetKey", ["instance", "seed", "budget"])
 
+
+class ConfigRunsView(object):
+    """Instance-seed-budget keys of the runs of a configuration, see `RunHistory.get_runs_view_for_config`.
+
+    The runhistory caches one view per configuration until a new run of the configuration is added, hence
+    views must not be modified.
+
+    Parameters
+    ----------
+    inst_seed_budgets : Mapping[InstSeedKey, List[float]]
+        Budgets of the runs per instance-seed pair
+
+    Attributes
+    ----------
+    runs : Tuple[InstSeedBudgetKey, ...]
+        Runs on all budgets
+    max_budget_runs : Tuple[InstSeedBudgetKey, ...]
+        Run on the highest budget of each instance-seed pair
+    """
+
+    __slots__ = ("runs", "max_budget_runs", "_run_set", "_max_budget_run_set")
+
+    def __init__(self, inst_seed_budgets: Mapping[InstSeedKey, List[float]]) -> None:
+        self.runs = tuple(
+            InstSeedBudgetKey(k.instance, k.seed, budget)
+            for k, budgets in inst_seed_budgets.items()
+            for budget in budgets
+        )  # type: Tuple[InstSeedBudgetKey, ...]
+        if len(self.runs) == len(inst_seed_budgets):
+            # Only one budget per instance-seed pair
+            self.max_budget_runs = self.runs
+        else:
+            self.max_budget_runs = tuple(
+                InstSeedBudgetKey(k.instance, k.seed, max(budgets)) for k, budgets in inst_seed_budgets.items()
+            )
+        self._run_set = None  # type: Optional[FrozenSet[InstSeedBudgetKey]]
+        self._max_budget_run_set = None  # type: Optional[FrozenSet[InstSeedBudgetKey]]
+
+    @property
+    def run_set(self) -> FrozenSet[InstSeedBudgetKey]:
+        """Runs on all budgets as a set."""
+        if self._run_set is None:
+            self._run_set = frozenset(self.runs)
+        return self._run_set
+
+    @property
+    def max_budget_run_set(self) -> FrozenSet[InstSeedBudgetKey]:
+        """Runs on the highest budget of each instance-seed pair as a set."""
+        if self._max_budget_run_set is None:
+            if self.max_budget_runs is self.runs:
+                self._max_budget_run_set = self.run_set
+            else:
+                self._max_budget_run_set = frozenset(self.max_budget_runs)
+        return self._max_budget_run_set
+
+
 RunValue = collections.namedtuple("RunValue", ["cost", "time", "status", "starttime", "endtime", "additional_info"])
 
+# Costs of the runs of several configurations and their aggregates, see `RunHistory.get_costs`
+AggregatedCosts = collections.namedtuple("AggregatedCosts", ["costs", "n_runs", "keys", "mean", "sum", "min"])
+
+
+def _decode_status(status: Any) -> StatusType:
+    """Decodes a status type which is encoded by `EnumEncoder` (or given by its value)."""
+    if isinstance(status, dict):
+        status = StatusType.enum_hook(status)
+
+    return StatusType(status)
+
 
 class EnumEncoder(json.JSONEncoder):
     """Custom encoder for enum-serialization (implemented for StatusType from tae).
@@ -162,14 +262,30 @@ class RunHistory(Mapping[RunKey, RunValue]):
         If set to ``True`` and a run of a configuration on an instance-budget-seed-pair already exists,
         it is overwritten. Allows to overwrites old results if pairs of algorithm-instance-seed were measured
         multiple times
+    json_validation : str, defaults to "strict"
+        When to check that the runs can be written to json:
+
+        * ``"strict"``: In `add`, which raises a ValueError for runs that can not be encoded.
+        * ``"deferred"``: In `save_json`. If a run can not be encoded, the ValueError names its RunKey.
+        * ``"off"``: Never. Saving fails with the error of the serializer.
+    compact : bool (default=False)
+        If set to ``True``, the costs of multi-objective runs are stored as ``array.array("d")`` instead of
+        lists of floats, and all run keys share their config id, instance, seed and budget objects (e.g.
+        an instance name is stored only once instead of once per run), see
+        ``scripts/benchmark_runhistory.py memory``.
+    lazy_configs : bool (default=False)
+        If set to ``True``, configurations which can be created exactly from their vector (e.g. sampled ones)
+        are not kept, but created on access. Configurations which are referenced elsewhere (e.g. by the
+        intensifier) are still returned as the same object. See
+        :class:`~smac.runhistory.configurations.ConfigurationStore`.
 
     Attributes
     ----------
     data : collections.OrderedDict()
         Internal data representation
-    config_ids : dict
+    config_ids : Mapping
         Maps config -> id
-    ids_config : dict
+    ids_config : Mapping
         Maps id -> config
     num_runs_per_config : dict
         Maps config_id -> number of runs
@@ -178,21 +294,41 @@ class RunHistory(Mapping[RunKey, RunValue]):
     def __init__(
         self,
         overwrite_existing_runs: bool = False,
+        json_validation: str = JSON_VALIDATION_STRICT,
+        compact: bool = False,
+        lazy_configs: bool = False,
     ) -> None:
         self.logger = PickableLoggerAdapter(self.__module__ + "." + self.__class__.__name__)
 
+        if json_validation not in JSON_VALIDATION_MODES:
+            raise ValueError(
+                "Unknown json validation %s, choose one of %s." % (json_validation, ", ".join(JSON_VALIDATION_MODES))
+            )
+        self.json_validation = json_validation
+        # Configurations which were checked to be json serializable, only used with strict validation
+        self._json_valid_config_ids = set()  # type: Set[int]
+
         # By having the data in a deterministic order we can do useful tests
         # when we serialize the data and can assume it's still in the same
         # order as it was added.
         self.data = collections.OrderedDict()  # type: Dict[RunKey, RunValue]
 
+        self.compact = compact
+        # Objects shared by the run keys, see `_intern_key`
+        self._intern_keys = compact
+        self._interned = {}  # type: Dict[Tuple[type, Any], Any]
+
         # for fast access, we have also an unordered data structure
         # to get all instance seed pairs of a configuration.
         # This does not include capped runs.
         self._configid_to_inst_seed_budget = {}  # type: Dict[int, Dict[InstSeedKey, List[float]]]
+        # Views of the data structure above, which are removed when a run of the configuration is added
+        self._config_runs_views = {}  # type: Dict[int, ConfigRunsView]
 
-        self.config_ids = {}  # type: Dict[Configuration, int]
-        self.ids_config = {}  # type: Dict[int, Configuration]
+        # The configurations are stored as vectors, which are indexed by config id
+        self._configs = ConfigurationStore(lazy=lazy_configs)
+        self.config_ids = ConfigIdsView(self._configs)  # type: Mapping[Configuration, int]
+        self.ids_config = IdsConfigView(self._configs)  # type: Mapping[int, Configuration]
         self._n_id = 0
 
         # Stores cost for each configuration ID
@@ -207,10 +343,47 @@ class RunHistory(Mapping[RunKey, RunValue]):
         # a JSON file. Can be chosen to not be written to disk
         self.external = {}  # type: Dict[RunKey, DataOrigin]
 
+        # Secondary indexes for `get_runs` and friends. The run keys map to the position at which the run was
+        # added, which restores the order of the data when runs from several buckets are combined.
+        self._runs_per_budget = {}  # type: Dict[float, Dict[RunKey, int]]
+        self._runs_per_status = {}  # type: Dict[StatusType, Dict[RunKey, int]]
+        self._config_ids_per_budget = {}  # type: Dict[float, Dict[int, None]]
+        self._budgets = []  # type: List[float]
+        # Keys of the runs in the order in which they were stored, i.e. new runs and updated runs, see `get_version`
+        self._change_log = []  # type: List[RunKey]
+
         self.overwrite_existing_runs = overwrite_existing_runs
         self.num_obj = -1  # type: int
         self.objective_bounds = []  # type: List[Tuple[float, float]]
 
+        # Runs which were added or updated since the last time the journal was written (see `save_json`)
+        self._journal_fn = None  # type: Optional[str]
+        self._journal_save_external = False
+        self._journal_serializer = None  # type: Optional[str]
+        self._journal_pending = collections.OrderedDict()  # type: Dict[RunKey, None]
+        self._journal_config_ids = set()  # type: Set[int]
+        self._journal_n_runs = 0
+        self._journal_snapshot_n_runs = 0
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        """Restores a pickled runhistory. Runhistories pickled by older versions lack the caches and indexes,
+        which are initialized, respectively rebuilt, in that case."""
+        RunHistory.__init__(self, overwrite_existing_runs=state.get("overwrite_existing_runs", False))
+        indexed = "_runs_per_budget" in state
+        if "_change_log" not in state:
+            state = dict(state, _change_log=list(state["data"]))
+        if "_configs" not in state:
+            # Older versions kept the configurations in dictionaries
+            state = dict(state)
+            del state["config_ids"]
+            for config_id, config in state.pop("ids_config").items():
+                self._configs.add(config, config_id)
+        self.__dict__.update(state)
+
+        if not indexed:
+            for position, (k, v) in enumerate(self.data.items()):
+                self._index(k, v.status, None, position)
+
     def __contains__(self, k: object) -> bool:
         """Dictionary semantics for `k in runhistory`"""
         return k in self.data
@@ -241,6 +414,30 @@ class RunHistory(Mapping[RunKey, RunValue]):
         """
         return len(self.data) == 0
 
+    def get_version(self) -> int:
+        """Return the version of the runhistory, which is increased whenever a run is added or updated.
+
+        Returns
+        -------
+        version : int
+        """
+        return len(self._change_log)
+
+    def get_changed_runs(self, version: int) -> List[RunKey]:
+        """Return the runs which were added or updated since a version (see `get_version`).
+
+        Parameters
+        ----------
+        version : int
+
+        Returns
+        -------
+        run_keys : List[RunKey]
+            Keys of the runs in the order in which they were stored. A run which was stored several times is
+            contained several times.
+        """
+        return self._change_log[version:]
+
     def _check_json_serializable(
         self,
         key: str,
@@ -257,8 +454,47 @@ class RunHistory(Mapping[RunKey, RunValue]):
                 "please see the error above.\nRunKey: %s\nRunValue %s" % (key, str(obj), type(obj), runkey, runvalue)
             ) from e
 
+    def _validate_run(self, config: Configuration, k: RunKey, v: RunValue) -> None:
+        """Checks that a run can be encoded to json.
+
+        The run is encoded as a whole, only if this fails, each field is checked separately to raise a helpful
+        error. Configurations are checked once.
+        """
+        try:
+            json.dumps(self._serialize_run(k, v), cls=EnumEncoder)
+            encodable = True
+        except Exception:
+            encodable = False
+
+        if not encodable:
+            for key, value in (
+                ("config", config.get_dictionary()),
+                ("config_id", k.config_id),
+                ("instance_id", k.instance_id),
+                ("seed", k.seed),
+                ("budget", k.budget),
+                ("cost", v.cost.tolist() if isinstance(v.cost, array) else v.cost),
+                ("time", v.time),
+                ("status", v.status),
+                ("starttime", v.starttime),
+                ("endtime", v.endtime),
+                ("additional_info", v.additional_info),
+                ("origin", config.origin),
+            ):
+                self._check_json_serializable(key, value, EnumEncoder, k, v)
+        elif k.config_id not in self._json_valid_config_ids:
+            for key, value in (("config", config.get_dictionary()), ("origin", config.origin)):
+                self._check_json_serializable(key, value, EnumEncoder, k, v)
+            self._json_valid_config_ids.add(k.config_id)
+
     def _update_objective_bounds(self) -> None:
-        """Update the objective bounds based on the data in the runhistory."""
+        """Recompute the objective bounds from scratch based on the data in the runhistory.
+
+        Note
+        ----
+        This requires a full scan of the runhistory and is therefore only used if a successful run is
+        overwritten. Otherwise, the bounds are updated incrementally by `_extend_objective_bounds`.
+        """
         all_costs = []
         for (costs, _, status, _, _, _) in self.data.values():
             if status == StatusType.SUCCESS:
@@ -281,20 +517,47 @@ class RunHistory(Mapping[RunKey, RunValue]):
         for min_v, max_v in zip(min_values, max_values):
             self.objective_bounds += [(min_v, max_v)]
 
-    def _add(self, k: RunKey, v: RunValue, status: StatusType, origin: DataOrigin) -> None:
+    def _extend_objective_bounds(self, v: RunValue) -> None:
+        """Update the objective bounds with a single new run in O(num_obj).
+
+        Parameters
+        ----------
+        v : RunValue
+            Value of the newly added run. Only successful runs change the bounds.
+        """
+        if len(self.objective_bounds) != self.num_obj:
+            self.objective_bounds = [(np.inf, -np.inf)] * self.num_obj
+
+        if v.status != StatusType.SUCCESS:
+            return
+
+        costs = v.cost
+        if isinstance(costs, (int, float)):
+            costs = [costs]
+
+        assert len(costs) == self.num_obj
+        self.objective_bounds = [
+            (min(min_v, cost), max(max_v, cost)) for (min_v, max_v), cost in zip(self.objective_bounds, costs)
+        ]
+
+    def _add(self, k: RunKey, v: RunValue, status: StatusType, origin: DataOrigin) -> RunKey:
         """
-        Actual function to add new entry to data structures.
+        Actual function to add new entry to data structures. Returns the stored key, which might be an
+        interned copy of `k`.
 
         Note
         ----
         This method always calls `update_cost` in the multi-
         objective setting.
         """
-        self.data[k] = v
-        self.external[k] = origin
+        k, previous = self._store(k, v, origin)
 
-        # Update objective bounds based on raw data
-        self._update_objective_bounds()
+        # Update objective bounds based on raw data. A successful run which is overwritten might
+        # have defined a bound, hence we have to recompute them from scratch in that case.
+        if previous is not None and previous.status == StatusType.SUCCESS:
+            self._update_objective_bounds()
+        else:
+            self._extend_objective_bounds(v)
 
         # Capped data is added above
         # Do not register the cost until the run has completed
@@ -303,27 +566,242 @@ class RunHistory(Mapping[RunKey, RunValue]):
             DataOrigin.EXTERNAL_SAME_INSTANCES,
         ) and status not in [StatusType.CAPPED, StatusType.RUNNING]:
             # also add to fast data structure
-            is_k = InstSeedKey(k.instance_id, k.seed)
-            self._configid_to_inst_seed_budget[k.config_id] = self._configid_to_inst_seed_budget.get(k.config_id, {})
-            if is_k not in self._configid_to_inst_seed_budget[k.config_id].keys():
-                # add new inst-seed-key with budget to main dict
-                self._configid_to_inst_seed_budget[k.config_id][is_k] = [k.budget]
-            elif k.budget not in is_k:
-                # append new budget to existing inst-seed-key dict
-                self._configid_to_inst_seed_budget[k.config_id][is_k].append(k.budget)
+            self._add_inst_seed_budget(k)
 
             # if budget is used, then update cost instead of incremental updates
             if not self.overwrite_existing_runs and k.budget == 0:
                 # assumes an average across runs as cost function aggregation, this is used for
                 # algorithm configuration (incremental updates are used to save time as getting the
                 # cost for > 100 instances is high)
-                self.incremental_update_cost(self.ids_config[k.config_id], v.cost)
+                self._incremental_update_cost(k.config_id, v.cost)
             else:
                 # this is when budget > 0 (only successive halving and hyperband so far)
-                self.update_cost(config=self.ids_config[k.config_id])
-                if k.budget > 0:
-                    if self.num_runs_per_config[k.config_id] != 1:  # This is updated in update_cost
-                        raise ValueError("This should not happen!")
+                self._update_cost(k.config_id, k.budget > 0)
+
+        return k
+
+    def _add_runs(
+        self,
+        runs: Iterable[Tuple[RunKey, RunValue]],
+        ids_config: Optional[Mapping[int, Configuration]],
+        origin: DataOrigin,
+    ) -> None:
+        """Adds many runs at once.
+
+        The result is the same as calling `add` (without ``force_update``) for each run, but the
+        configurations are only looked up once and the costs of a configuration which are not updated
+        incrementally are only computed once after all runs were added. The runs are not checked for being
+        json serializable because they either come from a runhistory file or from another runhistory.
+
+        Parameters
+        ----------
+        runs : Iterable[Tuple[RunKey, RunValue]]
+            Runs to add. The config ids of the keys refer to ``ids_config``.
+        ids_config : Optional[Mapping[int, Configuration]]
+            Maps the config ids of ``runs`` to configurations. If None, the config ids of ``runs`` are
+            the ones of this runhistory.
+        origin : DataOrigin
+            Defines how data will be used.
+        """
+        config_ids = {}  # type: Dict[int, int]
+        # Configurations whose costs are computed at the end, and whether they have runs with budget > 0
+        outdated = collections.OrderedDict()  # type: Dict[int, bool]
+        successful_costs = []  # type: List[Union[float, List[float], array]]
+        recompute_bounds = False
+        n_skipped = 0
+
+        for key, value in runs:
+            if ids_config is None:
+                config_id = key.config_id
+            else:
+                config_id = config_ids.get(key.config_id)
+                if config_id is None:
+                    config_id = self._get_config_id(ids_config[key.config_id])
+                    config_ids[key.config_id] = config_id
+
+            cost = self._format_cost(value.cost)
+            k = key if config_id == key.config_id else RunKey(config_id, key.instance_id, key.seed, key.budget)
+            v = value if cost is value.cost else value._replace(cost=cost)
+
+            previous = self.data.get(k)
+            if previous is not None:
+                if not self._accepts(k, v.status, cost, force_update=False):
+                    n_skipped += 1
+                    continue
+                elif previous.status == StatusType.SUCCESS:
+                    recompute_bounds = True
+
+            k, _ = self._store(k, v, origin)
+
+            if v.status == StatusType.SUCCESS:
+                successful_costs.append(cost)
+
+            if origin in (
+                DataOrigin.INTERNAL,
+                DataOrigin.EXTERNAL_SAME_INSTANCES,
+            ) and v.status not in [StatusType.CAPPED, StatusType.RUNNING]:
+                self._add_inst_seed_budget(k)
+                if not self.overwrite_existing_runs and k.budget == 0:
+                    # The moving average continues from the costs of all previous runs
+                    if config_id in outdated:
+                        self._update_cost(config_id, outdated.pop(config_id))
+                    self._incremental_update_cost(config_id, cost)
+                else:
+                    outdated[config_id] = outdated.get(config_id, False) or k.budget > 0
+
+        if recompute_bounds:
+            self._update_objective_bounds()
+        else:
+            if len(self.objective_bounds) != self.num_obj:
+                self.objective_bounds = [(np.inf, -np.inf)] * self.num_obj
+
+            if len(successful_costs) > 0:
+                costs = np.array(successful_costs, dtype=float).reshape(len(successful_costs), self.num_obj)
+                self.objective_bounds = [
+                    (min(min_v, cost_min), max(max_v, cost_max))
+                    for (min_v, max_v), cost_min, cost_max in zip(
+                        self.objective_bounds, np.min(costs, axis=0).tolist(), np.max(costs, axis=0).tolist()
+                    )
+                ]
+
+        for config_id, has_budget in outdated.items():
+            self._update_cost(config_id, has_budget)
+
+        if n_skipped > 0:
+            logger.info(
+                "%d entries were not added to the runhistory because existing runs will not be overwritten.",
+                n_skipped,
+            )
+
+    def _store(self, k: RunKey, v: RunValue, origin: DataOrigin) -> Tuple[RunKey, Optional[RunValue]]:
+        """Writes a run to the data and returns the stored key and the run it replaces (if any)."""
+        previous = self.data.get(k)
+        if previous is None and self._intern_keys:
+            k = self._intern_key(k)
+        self.data[k] = v
+        self.external[k] = origin
+        if self._journal_fn is not None:
+            self._journal_pending[k] = None
+        self._index(k, v.status, previous)
+        self._change_log.append(k)
+
+        return k, previous
+
+    def _intern_key(self, k: RunKey) -> RunKey:
+        """Returns a key equal to `k` which shares its config id, instance, seed and budget objects with the
+        keys of the other runs."""
+        interned = self._interned
+        # The type is part of the key because 1 == 1.0 share the same hash
+        fields = [interned.setdefault((type(field), field), field) for field in k]
+        if all(field is original for field, original in zip(fields, k)):
+            return k
+
+        return RunKey(*fields)
+
+    def _index(self, k: RunKey, status: StatusType, previous: Optional[RunValue], position: int = -1) -> None:
+        """Registers a run which was just written to the data in the budget and status indexes. By default,
+        a new run is at the last position of the data."""
+        if previous is None:
+            if position == -1:
+                position = len(self.data) - 1
+            runs = self._runs_per_budget.get(k.budget)
+            if runs is None:
+                runs = self._runs_per_budget[k.budget] = {}
+                self._config_ids_per_budget[k.budget] = {}
+                bisect.insort(self._budgets, k.budget)
+            runs[k] = position
+            self._config_ids_per_budget[k.budget][k.config_id] = None
+        elif previous.status != status:
+            position = self._runs_per_status[previous.status].pop(k)
+        else:
+            return
+
+        self._runs_per_status.setdefault(status, {})[k] = position
+
+    def _add_inst_seed_budget(self, k: RunKey) -> None:
+        """Registers a run in the fast data structure used by `get_runs_for_config`."""
+        is_k = InstSeedKey(k.instance_id, k.seed)
+        self._config_runs_views.pop(k.config_id, None)
+        inst_seed_budgets = self._configid_to_inst_seed_budget.setdefault(k.config_id, {})
+        budgets = inst_seed_budgets.get(is_k)
+        if budgets is None:
+            # add new inst-seed-key with budget to main dict
+            inst_seed_budgets[is_k] = [k.budget]
+        elif k.budget not in is_k:
+            # append new budget to existing inst-seed-key dict
+            budgets.append(k.budget)
+
+    def _get_config_id(self, config: Configuration) -> int:
+        """Returns the id of a configuration, a new id is assigned to unknown configurations."""
+        config_id = self._configs.find(config)
+        if config_id is None:
+            self._n_id += 1
+            config_id = self._n_id
+            self._configs.add(config, config_id)
+
+        return config_id
+
+    def _format_cost(self, cost: Union[int, float, list, np.ndarray]) -> Union[float, List[float], array]:
+        """Converts a cost to a float (single objective) or a list of floats (multiple objectives, an array for
+        compact runhistories) and checks that it has as many entries as the runhistory has objectives."""
+        if isinstance(cost, (int, float)):
+            num_obj = 1
+            c = float(cost)  # type: Union[float, List[float]]
+        elif isinstance(cost, list) and len(cost) > 1 and all(isinstance(i, (int, float)) for i in cost):
+            num_obj = len(cost)
+            c = [float(i) for i in cost]
+        else:
+            # Squeeze is important to reduce arrays with one element
+            # to scalars.
+            cost_array = np.asarray(cost).squeeze()
+            num_obj = np.size(cost_array)
+
+            # Let's always work with floats; Makes it easier to deal with later on
+            # array.tolist() returns a scalar if the array has one element.
+            c = cost_array.tolist()
+            if num_obj == 1:
+                c = float(c)  # type: ignore
+            else:
+                c = [float(i) for i in c]  # type: ignore
+
+        if self.num_obj == -1:
+            self.num_obj = num_obj
+        elif self.num_obj != num_obj:
+            raise ValueError(
+                f"Cost is not of the same length ({num_obj}) as the number " f"of objectives ({self.num_obj})"
+            )
+
+        if self.compact and num_obj > 1:
+            return array("d", c)  # type: ignore[arg-type]
+
+        return c
+
+    def _accepts(
+        self,
+        k: RunKey,
+        status: StatusType,
+        cost: Union[float, List[float], array],
+        force_update: bool,
+    ) -> bool:
+        """Whether a run is written to the runhistory. Each runkey is supposed to be used only once.
+        Repeated tries to add the same runkey will be ignored silently if not capped."""
+        if self.overwrite_existing_runs or force_update:
+            return True
+
+        previous = self.data.get(k)
+        if previous is None:
+            return True
+        elif status != StatusType.CAPPED and previous.status == StatusType.CAPPED:
+            # overwrite capped runs with uncapped runs
+            return True
+        elif status == StatusType.CAPPED and previous.status == StatusType.CAPPED:
+            if self.num_obj > 1:
+                raise RuntimeError("Not supported yet.")
+
+            # Overwrite if censored with a larger cutoff
+            return cost > previous.cost  # type: ignore
+
+        return False
 
     def _cost(
         self,
@@ -352,7 +830,7 @@ class RunHistory(Mapping[RunKey, RunValue]):
             return []
 
         if instance_seed_budget_keys is None:
-            instance_seed_budget_keys = self.get_runs_for_config(config, only_max_observed_budget=True)
+            instance_seed_budget_keys = self._get_runs_view(id_).max_budget_runs
 
         costs = []
         for i, r, b in instance_seed_budget_keys:
@@ -414,70 +892,17 @@ class RunHistory(Mapping[RunKey, RunValue]):
                 "Configuration to add to the runhistory is not of type Configuration, but %s" % type(config)
             )
 
-        # Squeeze is important to reduce arrays with one element
-        # to scalars.
-        cost_array = np.asarray(cost).squeeze()
-        num_obj = np.size(cost_array)
-
-        # Get the config id
-        config_id_tmp = self.config_ids.get(config)
-        if config_id_tmp is None:
-            self._n_id += 1
-            self.config_ids[config] = self._n_id
-            config_id = cast(int, self.config_ids.get(config))
-            self.ids_config[self._n_id] = config
-        else:
-            config_id = cast(int, config_id_tmp)
-
-        if self.num_obj == -1:
-            self.num_obj = num_obj
-        elif self.num_obj != num_obj:
-            raise ValueError(
-                f"Cost is not of the same length ({num_obj}) as the number " f"of objectives ({self.num_obj})"
-            )
-
-        # Let's always work with floats; Makes it easier to deal with later on
-        # array.tolist() returns a scalar if the array has one element.
-        c = cost_array.tolist()
-        if self.num_obj == 1:
-            c = float(c)
-        else:
-            c = [float(i) for i in c]
+        config_id = self._get_config_id(config)
+        c = self._format_cost(cost)
 
         k = RunKey(config_id, instance_id, seed, budget)
         v = RunValue(c, time, status, starttime, endtime, additional_info)
 
-        # Construct keys and values for the data dictionary
-        for key, value in (
-            ("config", config.get_dictionary()),
-            ("config_id", config_id),
-            ("instance_id", instance_id),
-            ("seed", seed),
-            ("budget", budget),
-            ("cost", c),
-            ("time", time),
-            ("status", status),
-            ("starttime", starttime),
-            ("endtime", endtime),
-            ("additional_info", additional_info),
-            ("origin", config.origin),
-        ):
-            self._check_json_serializable(key, value, EnumEncoder, k, v)
+        if self.json_validation == JSON_VALIDATION_STRICT:
+            self._validate_run(config, k, v)
 
-        # Each runkey is supposed to be used only once. Repeated tries to add
-        # the same runkey will be ignored silently if not capped.
-        if self.overwrite_existing_runs or force_update or self.data.get(k) is None:
+        if self._accepts(k, status, c, force_update):
             self._add(k, v, status, origin)
-        elif status != StatusType.CAPPED and self.data[k].status == StatusType.CAPPED:
-            # overwrite capped runs with uncapped runs
-            self._add(k, v, status, origin)
-        elif status == StatusType.CAPPED and self.data[k].status == StatusType.CAPPED:
-            if self.num_obj > 1:
-                raise RuntimeError("Not supported yet.")
-
-            # Overwrite if censored with a larger cutoff
-            if cost > self.data[k].cost:
-                self._add(k, v, status, origin)
         else:
             logger.info("Entry was not added to the runhistory because existing runs will not overwritten.")
 
@@ -495,15 +920,25 @@ class RunHistory(Mapping[RunKey, RunValue]):
             configuration to update cost based on all runs in runhistory
         """
         config_id = self.config_ids[config]
+        view = self._get_runs_view(config_id)
 
-        # Removing duplicates while keeping the order
-        inst_seed_budgets = list(dict.fromkeys(self.get_runs_for_config(config, only_max_observed_budget=True)))
+        # There is one run on the highest budget per instance-seed pair, hence no duplicates
+        inst_seed_budgets = view.max_budget_runs
         self._cost_per_config[config_id] = self.average_cost(config, inst_seed_budgets)
         self.num_runs_per_config[config_id] = len(inst_seed_budgets)
 
-        all_inst_seed_budgets = list(dict.fromkeys(self.get_runs_for_config(config, only_max_observed_budget=False)))
+        # Removing duplicates while keeping the order
+        all_inst_seed_budgets = list(dict.fromkeys(view.runs))
         self._min_cost_per_config[config_id] = self.min_cost(config, all_inst_seed_budgets)
 
+    def _update_cost(self, config_id: int, has_budget: bool) -> None:
+        """Calls `update_cost` and checks that a configuration evaluated on budgets (successive halving
+        and hyperband) is only evaluated once per budget."""
+        self.update_cost(config=self.ids_config[config_id])
+        if has_budget:
+            if self.num_runs_per_config[config_id] != 1:  # This is updated in update_cost
+                raise ValueError("This should not happen!")
+
     def incremental_update_cost(self, config: Configuration, cost: Union[np.ndarray, list, float, int]) -> None:
         """Incrementally updates the performance of a configuration by using a moving average.
 
@@ -514,16 +949,18 @@ class RunHistory(Mapping[RunKey, RunValue]):
         cost: float
             cost of new run of config
         """
-        config_id = self.config_ids[config]
+        self._incremental_update_cost(self.config_ids[config], cost)
+
+    def _incremental_update_cost(self, config_id: int, cost: Union[np.ndarray, list, array, float, int]) -> None:
         n_runs = self.num_runs_per_config.get(config_id, 0)
 
         if self.num_obj > 1:
-            costs = np.array(cost)
-            old_costs = self._cost_per_config.get(config_id, np.array([0.0 for _ in range(self.num_obj)]))
-            old_costs = np.array(old_costs)
-
-            new_costs = ((old_costs * n_runs) + costs) / (n_runs + 1)  # type: ignore
-            self._cost_per_config[config_id] = new_costs.tolist()
+            # Element-wise with floats instead of arrays, which is faster for a few objectives
+            old_costs = self._cost_per_config.get(config_id, [0.0 for _ in range(self.num_obj)])
+            self._cost_per_config[config_id] = [
+                float(((old_cost * n_runs) + new_cost) / (n_runs + 1))
+                for old_cost, new_cost in zip(old_costs, cost)  # type: ignore
+            ]
         else:
             old_cost = self._cost_per_config.get(config_id, 0.0)
             self._cost_per_config[config_id] = ((old_cost * n_runs) + cost) / (n_runs + 1)  # type: ignore
@@ -716,6 +1153,97 @@ class RunHistory(Mapping[RunKey, RunValue]):
 
         return np.nan
 
+    def get_costs(
+        self,
+        configs: List[Configuration],
+        instance_seed_budget_keys: Optional[Iterable[InstSeedBudgetKey]] = None,
+        normalize: bool = False,
+    ) -> AggregatedCosts:
+        """Return the costs of several configurations and their mean, sum and minimum, like `average_cost`,
+        `sum_cost` and `min_cost` for each configuration, but aggregated with one NumPy operation each.
+
+        Parameters
+        ----------
+        configs : List[Configuration]
+            Configurations to get the costs for.
+        instance_seed_budget_keys : Optional[Iterable[InstSeedBudgetKey]]
+            If given, only the runs on these instance-seed-budget keys are used. Configurations do not need
+            to have a run on each of them. By default, all runs are used. In both cases, only the run on the
+            highest budget of each instance-seed pair is used.
+        normalize : bool, optional (default=False)
+            Normalizes the aggregated costs wrt objective bounds in the multi-objective setting and averages
+            them across the objectives.
+
+        Returns
+        -------
+        AggregatedCosts
+            Named tuple with the fields
+
+            * ``costs``: Costs of the runs of all configurations, one after the other, with shape
+              (number of runs, number of objectives).
+            * ``n_runs``: Number of runs of each configuration.
+            * ``keys``: Instance-seed-budget keys of the runs in ``costs``.
+            * ``mean``, ``sum`` and ``min``: Aggregated costs of each configuration. Their shape is
+              (number of configurations,) for a single objective or if the costs are normalized, otherwise
+              (number of configurations, number of objectives). The mean and the minimum of a configuration
+              without runs are NaN, the sum is zero (before normalization).
+        """
+        config_ids = [self.config_ids.get(config) for config in configs]
+        keys_per_config = [
+            () if config_id is None else self._get_runs_view(config_id).max_budget_runs for config_id in config_ids
+        ]  # type: List[Sequence[InstSeedBudgetKey]]
+        if instance_seed_budget_keys is not None:
+            selected = set(instance_seed_budget_keys)
+            keys_per_config = [[k for k in keys if k in selected] for keys in keys_per_config]
+
+        costs = self._aggregate_costs(config_ids, keys_per_config)
+        if self.num_obj > 1 and normalize:
+            costs = costs._replace(
+                **{
+                    aggregate: np.mean(normalize_cost_matrix(getattr(costs, aggregate), self.objective_bounds), axis=1)
+                    for aggregate in ("mean", "sum", "min")
+                }
+            )
+
+        return costs
+
+    def _aggregate_costs(
+        self,
+        config_ids: Sequence[Optional[int]],
+        keys_per_config: List[Sequence[InstSeedBudgetKey]],
+    ) -> AggregatedCosts:
+        """Collects the costs of the given runs of each configuration and aggregates them, see `get_costs`."""
+        num_obj = max(self.num_obj, 1)
+        n_runs = np.array([len(keys) for keys in keys_per_config], dtype=int)
+        keys = [k for keys_ in keys_per_config for k in keys_]
+        data = self.data
+        # Plain tuples are equal to the run keys and faster to create
+        costs = np.array(  # type: ignore[type-var] # noqa F821
+            [
+                data[(config_id,) + k].cost  # type: ignore[index] # noqa F821
+                for config_id, keys_ in zip(config_ids, keys_per_config)
+                for k in keys_
+            ],
+            dtype=float,
+        ).reshape(len(keys), num_obj)
+
+        # Runs of a configuration are consecutive, hence they can be reduced at the start of each configuration.
+        # Configurations without runs are left out because `reduceat` does not handle empty segments.
+        has_runs = n_runs > 0
+        starts = (np.cumsum(n_runs) - n_runs)[has_runs]
+        sums = np.zeros((len(config_ids), num_obj))
+        mins = np.full((len(config_ids), num_obj), np.nan)
+        if len(starts) > 0:
+            sums[has_runs] = np.add.reduceat(costs, starts, axis=0)
+            mins[has_runs] = np.minimum.reduceat(costs, starts, axis=0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means = sums / n_runs[:, np.newaxis]
+
+        if self.num_obj <= 1:
+            means, sums, mins = means[:, 0], sums[:, 0], mins[:, 0]
+
+        return AggregatedCosts(costs, n_runs, keys, means, sums, mins)
+
     def compute_all_costs(self, instances: Optional[List[str]] = None) -> None:
         """Computes the cost of all configurations from scratch and overwrites self.cost_perf_config
         and self.runs_per_config accordingly.
@@ -731,16 +1259,21 @@ class RunHistory(Mapping[RunKey, RunValue]):
         """
         self._cost_per_config = {}
         self.num_runs_per_config = {}
-        for config, config_id in self.config_ids.items():
-            # removing duplicates while keeping the order
-            inst_seed_budgets = list(dict.fromkeys(self.get_runs_for_config(config, only_max_observed_budget=True)))
-            if instances is not None:
-                inst_seed_budgets = list(filter(lambda x: x.instance in cast(List, instances), inst_seed_budgets))
 
-            if inst_seed_budgets:  # can be empty if never saw any runs on <instances>
-                self._cost_per_config[config_id] = self.average_cost(config, inst_seed_budgets)
-                self._min_cost_per_config[config_id] = self.min_cost(config, inst_seed_budgets)
-                self.num_runs_per_config[config_id] = len(inst_seed_budgets)
+        config_ids = list(self.config_ids.values())
+        keys_per_config = [
+            self._get_runs_view(config_id).max_budget_runs for config_id in config_ids
+        ]  # type: List[Sequence[InstSeedBudgetKey]]
+        if instances is not None:
+            selected = set(instances)
+            keys_per_config = [[k for k in keys if k.instance in selected] for keys in keys_per_config]
+
+        costs = self._aggregate_costs(config_ids, keys_per_config)
+        for config_id, n_runs, mean, min_ in zip(config_ids, costs.n_runs.tolist(), costs.mean, costs.min):
+            if n_runs > 0:  # can be empty if never saw any runs on <instances>
+                self._cost_per_config[config_id] = mean.tolist()
+                self._min_cost_per_config[config_id] = min_.tolist()
+                self.num_runs_per_config[config_id] = n_runs
 
     def get_instance_costs_for_config(self, config: Configuration) -> Dict[str, List[float]]:
         """Returns the average cost per instance (across seeds) for a configuration. If the
@@ -759,7 +1292,7 @@ class RunHistory(Mapping[RunKey, RunValue]):
         -------
         cost_per_inst: Dict<instance name<str>, cost<float>>
         """
-        runs_ = self.get_runs_for_config(config, only_max_observed_budget=True)
+        runs_ = self.get_runs_view_for_config(config).max_budget_runs
         cost_per_inst = {}  # type: Dict[str, List[float]]
         for inst, seed, budget in runs_:
             cost_per_inst[inst] = cost_per_inst.get(inst, [])
@@ -786,17 +1319,132 @@ class RunHistory(Mapping[RunKey, RunValue]):
         -------
         instance_seed_budget_pairs : list<tuples of instance, seed, budget>
         """
+        view = self.get_runs_view_for_config(config)
+        return list(view.max_budget_runs if only_max_observed_budget else view.runs)
+
+    def get_runs_view_for_config(self, config: Configuration) -> ConfigRunsView:
+        """Return the runs (instance-seed-budget keys) of a configuration on all budgets and on the highest
+        budget of each instance-seed pair, without copying them like `get_runs_for_config`.
+
+        Note
+        ----
+        This method ignores capped runs.
+
+        Parameters
+        ----------
+        config : Configuration from ConfigSpace
+            Parameter configuration
+
+        Returns
+        -------
+        view : ConfigRunsView
+            Must not be modified.
+        """
         config_id = self.config_ids.get(config)
-        runs = self._configid_to_inst_seed_budget.get(config_id, {}).copy()  # type: ignore[arg-type] # noqa F821
+        if config_id is None:
+            return ConfigRunsView({})
+
+        return self._get_runs_view(config_id)
+
+    def _get_runs_view(self, config_id: int) -> ConfigRunsView:
+        """Returns the cached view of the runs of a configuration, see `get_runs_view_for_config`."""
+        view = self._config_runs_views.get(config_id)
+        if view is None:
+            view = ConfigRunsView(self._configid_to_inst_seed_budget.get(config_id, {}))
+            self._config_runs_views[config_id] = view
+
+        return view
+
+    def get_runs(
+        self,
+        statuses: Optional[Iterable[StatusType]] = None,
+        budgets: Optional[Iterable[float]] = None,
+    ) -> Dict[RunKey, RunValue]:
+        """Return all runs which have one of the given statuses and were run on one of the given
+        budgets. The runs are returned in the order they were added.
+
+        Parameters
+        ----------
+        statuses : Optional[Iterable[StatusType]]
+            Statuses to select. If None, runs of all statuses are returned.
+        budgets : Optional[Iterable[float]]
+            Budgets to select. If None, runs of all budgets are returned.
+
+        Returns
+        -------
+        runs : Dict[RunKey, RunValue]
+        """
+        return {k: self.data[k] for k in self._get_run_keys(statuses, budgets)}
+
+    def _get_run_keys(
+        self,
+        statuses: Optional[Iterable[StatusType]] = None,
+        budgets: Optional[Iterable[float]] = None,
+    ) -> List[RunKey]:
+        """Like `get_runs`, but only returns the keys of the runs. Uses the budget and status indexes, hence
+        the time depends on the number of selected runs rather than the size of the runhistory."""
+        if statuses is None and budgets is None:
+            return list(self.data.keys())
+
+        # Select the runs from the smaller one of the two indexes and filter them with the other one
+        runs_per_budget = None
+        if budgets is not None:
+            runs_per_budget = [self._runs_per_budget[b] for b in set(budgets) if b in self._runs_per_budget]
+        runs_per_status = None
+        if statuses is not None:
+            runs_per_status = [self._runs_per_status[s] for s in set(statuses) if s in self._runs_per_status]
+
+        if runs_per_budget is not None and (
+            runs_per_status is None or sum(map(len, runs_per_budget)) <= sum(map(len, runs_per_status))
+        ):
+            buckets, filters = runs_per_budget, runs_per_status
+            # The runs of a single budget are in the order of the data
+            ordered = len(buckets) <= 1
+        else:
+            assert runs_per_status is not None
+            buckets, filters = runs_per_status, runs_per_budget
+            # Runs move to the end of a status if their status changes
+            ordered = False
+
+        if filters is None:
+            selected = buckets
+        elif len(filters) == 1:
+            selected = [{k: position for k, position in bucket.items() if k in filters[0]} for bucket in buckets]
+        else:
+            selected = [
+                {k: position for k, position in bucket.items() if any(k in f for f in filters)} for bucket in buckets
+            ]
+
+        if ordered:
+            return list(selected[0]) if len(selected) > 0 else []
+
+        positions = {}  # type: Dict[RunKey, int]
+        for bucket in selected:
+            positions.update(bucket)
+        return sorted(positions, key=positions.__getitem__)
+
+    def get_budgets(self) -> List[float]:
+        """Return the budgets of all runs in ascending order.
+
+        Returns
+        -------
+        budgets : List[float]
+        """
+        return list(self._budgets)
 
-        # select only the max budget run if specified
-        if only_max_observed_budget:
-            for k, v in runs.items():
-                runs[k] = [max(v)]
+    def get_config_ids_per_budget(self, budget: float) -> List[int]:
+        """Return the ids of all configurations which have been run on the given budget, in the order they
+        were first run on it.
+
+        Parameters
+        ----------
+        budget : float
 
-        # convert to inst-seed-budget key
-        rval = [InstSeedBudgetKey(k.instance, k.seed, budget) for k, v in runs.items() for budget in v]
-        return rval
+        Returns
+        -------
+        config_ids : List[int]
+        """
+        return list(self._config_ids_per_budget.get(budget, ()))
 
     def get_all_configs(self) -> List[Configuration]:
         """Return all configurations in this RunHistory object.
@@ -820,59 +1468,238 @@ class RunHistory(Mapping[RunKey, RunValue]):
         Returns
         -------
             parameter configurations: list
+                One configuration per run, in the order the runs were added.
         """
         if budget_subset is None:
             return self.get_all_configs()
-        configs = []
-        for c, i, s, b in self.data.keys():
-            if b in budget_subset:
-                configs.append(self.ids_config[c])
-        return configs
+        return [self.ids_config[k.config_id] for k in self._get_run_keys(budgets=budget_subset)]
+
+    def get_config_vector(self, config_id: int) -> np.ndarray:
+        """Return the vector of a configuration, as given by ``Configuration.get_array``, without creating the
+        configuration.
+
+        Parameters
+        ----------
+        config_id : int
+
+        Returns
+        -------
+        vector : np.ndarray
+            Read-only view of the row of the configuration in the vector matrix of the runhistory.
+        """
+        return self._configs.get_vector(config_id)
 
-    def save_json(self, fn: str = "runhistory.json", save_external: bool = False) -> None:
+    def get_config_vectors(self, config_ids: Iterable[int]) -> np.ndarray:
+        """Return the vectors of configurations, as given by ``convert_configurations_to_array``, without
+        creating the configurations.
+
+        Parameters
+        ----------
+        config_ids : Iterable[int]
+
+        Returns
+        -------
+        vectors : np.ndarray
+            One row per config id.
+        """
+        return self._configs.get_vectors(config_ids)
+
+    def save_json(
+        self,
+        fn: str = "runhistory.json",
+        save_external: bool = False,
+        append: bool = False,
+        serializer: Optional[str] = None,
+    ) -> None:
         """Saves runhistory on disk.
 
+        The runhistory is written atomically, i.e. into a temporary file which then replaces `fn`.
+
         Parameters
         ----------
         fn : str
             file name.
         save_external : bool
             Whether to save external data in the runhistory file.
+        append : bool
+            If True, only the runs which were added or updated since the last call and their configurations
+            are appended as one line to a journal next to the runhistory file (``fn + ".journal"``). The first
+            call and every call after the journal has grown larger than the runhistory file write a complete
+            snapshot to `fn` and remove the journal. `load_json` replays snapshot and journal.
+        serializer : Optional[str]
+            Serialization backend, see `smac.utils.io.serialization.get_serializer`. By default, json is
+            written unless `fn` ends with ``.msgpack``.
         """
-        data = [
-            (
-                [
-                    int(k.config_id),
-                    str(k.instance_id) if k.instance_id is not None else None,
-                    int(k.seed),
-                    float(k.budget) if k[3] is not None else 0,
-                ],
-                [v.cost, v.time, v.status, v.starttime, v.endtime, v.additional_info],
-            )
-            for k, v in self.data.items()
-            if save_external or self.external[k] == DataOrigin.INTERNAL
-        ]
-        config_ids_to_serialize = set([entry[0][0] for entry in data])
-        configs = {
-            id_: conf.get_dictionary() for id_, conf in self.ids_config.items() if id_ in config_ids_to_serialize
-        }
-        config_origins = {
-            id_: conf.origin
-            for id_, conf in self.ids_config.items()
-            if (id_ in config_ids_to_serialize and conf.origin is not None)
-        }
+        if (
+            append
+            and self._journal_fn == fn
+            and self._journal_serializer == serializer
+            and self._journal_save_external == save_external
+            and self._journal_n_runs < max(JOURNAL_MIN_COMPACTION_SIZE, self._journal_snapshot_n_runs)
+            and os.path.exists(fn)
+        ):
+            self._append_to_journal()
+            return
 
-        with open(fn, "w") as fp:
-            json.dump(
-                {"data": data, "config_origins": config_origins, "configs": configs},
-                fp,
-                cls=EnumEncoder,
-                indent=2,
-            )
+        keys = self._get_keys_to_save(self.data.keys(), save_external)
+        config_ids_to_serialize = set([k.config_id for k in keys])
+        content = self._dumps(keys, config_ids_to_serialize, get_serializer(serializer, fn))
+
+        dirname = os.path.dirname(os.path.abspath(fn))
+        with tempfile.NamedTemporaryFile("wb", dir=dirname, delete=False) as fp:
+            temporary_fn = fp.name
+            fp.write(content)
+        os.replace(temporary_fn, fn)
+
+        # A journal from before does not belong to the new snapshot anymore
+        if os.path.exists(fn + JOURNAL_SUFFIX):
+            os.remove(fn + JOURNAL_SUFFIX)
+
+        if append:
+            self._journal_fn = fn
+            self._journal_save_external = save_external
+            self._journal_serializer = serializer
+            self._journal_pending = collections.OrderedDict()
+            self._journal_config_ids = config_ids_to_serialize
+            self._journal_n_runs = 0
+            self._journal_snapshot_n_runs = len(keys)
+        elif fn == self._journal_fn:
+            self._journal_fn = None
+            self._journal_pending = collections.OrderedDict()
+
+    def _get_keys_to_save(self, keys: Iterable[RunKey], save_external: bool) -> List[RunKey]:
+        """Returns the keys of the runs which are saved, i.e. of all internal runs unless `save_external`."""
+        if save_external:
+            return list(keys)
+
+        return [k for k in keys if self.external[k] == DataOrigin.INTERNAL]
+
+    def _dumps(self, keys: List[RunKey], config_ids: Iterable[int], serializer: Serializer) -> bytes:
+        """Returns the serialized runhistory file with the runs with the given keys and the given configurations."""
+        configs, config_origins = self._serialize_configs(config_ids)
+        try:
+            data = self._serialize_runs(keys)
+            if serializer.native_enums:
+                data = [(k, v[:5] + [encode_enums(v[5])]) for k, v in data]
+
+            return serializer.dumps({"data": data, "config_origins": config_origins, "configs": configs})
+        except Exception as e:
+            if self.json_validation == JSON_VALIDATION_DEFERRED:
+                # Look for the run which can not be encoded to give a helpful error message
+                for k in keys:
+                    v = self.data[k]
+                    try:
+                        serializer.dumps(self._serialize_run(k, v))
+                    except Exception as run_error:
+                        raise ValueError(
+                            "Cannot save run to runhistory because it raises an error during %s encoding, please see "
+                            "the error above.\nRunKey: %s\nRunValue %s" % (serializer.name, k, v)
+                        ) from run_error
+            raise e
+
+    def _serialize_runs(self, keys: Iterable[RunKey]) -> List[Tuple[List[Any], List[Any]]]:
+        """Returns the json representation of the runs with the given keys."""
+        return [self._serialize_run(k, self.data[k]) for k in keys]
+
+    @staticmethod
+    def _serialize_run(k: RunKey, v: RunValue) -> Tuple[List[Any], List[Any]]:
+        """Returns the json representation of a run. The status is encoded as by `EnumEncoder`, status types in
+        the additional info are encoded by the serializer (unless it has `native_enums`)."""
+        return (
+            [
+                int(k.config_id),
+                str(k.instance_id) if k.instance_id is not None else None,
+                int(k.seed),
+                float(k.budget) if k[3] is not None else 0,
+            ],
+            [
+                v.cost.tolist() if isinstance(v.cost, array) else v.cost,
+                v.time,
+                {"__enum__": str(v.status)},
+                v.starttime,
+                v.endtime,
+                v.additional_info,
+            ],
+        )
 
-    def load_json(self, fn: str, cs: ConfigurationSpace) -> None:
+    def _serialize_configs(self, config_ids: Iterable[int]) -> Tuple[Dict[int, Dict], Dict[int, str]]:
+        """Returns the json representation of the configurations and their origins."""
+        configs = {}
+        config_origins = {}
+        for id_ in sorted(config_ids):
+            conf = self.ids_config[id_]
+            configs[id_] = conf.get_dictionary()
+            if conf.origin is not None:
+                config_origins[id_] = conf.origin
+
+        return configs, config_origins
+
+    def _append_to_journal(self) -> None:
+        """Appends the runs added or updated since the last save and their new configurations as one
+        line to the journal.
+        """
+        assert self._journal_fn is not None
+        keys = self._get_keys_to_save(self._journal_pending.keys(), self._journal_save_external)
+        self._journal_pending = collections.OrderedDict()
+        if not keys:
+            return
+
+        new_config_ids = set([k.config_id for k in keys]) - self._journal_config_ids
+        serializer = get_serializer(self._journal_serializer, self._journal_fn)
+        entry = serializer.to_entry(self._dumps(keys, new_config_ids, serializer))
+        self._journal_config_ids |= new_config_ids
+        self._journal_n_runs += len(keys)
+
+        with open(self._journal_fn + JOURNAL_SUFFIX, "ab") as fp:
+            fp.write(entry)
+            fp.flush()
+
+    def _read_json(self, fn: str, serializer: Optional[str] = None) -> Dict[str, Any]:
+        """Reads a runhistory file and replays its journal (if there is one).
+
+        Returns
+        -------
+        all_data : Dict[str, Any]
+            The runhistory in the format of the runhistory file. Runs which are contained multiple times
+            are only contained once with their latest values, but at the position they were first added.
+            Status types are not decoded.
+        """
+        backend = get_serializer(serializer, fn)
+        all_data = backend.load(fn)
+
+        journal_fn = fn + JOURNAL_SUFFIX
+        if not os.path.exists(journal_fn):
+            return all_data
+
+        configs = all_data["configs"]
+        config_origins = all_data.get("config_origins", {})
+        data = collections.OrderedDict((tuple(k), v) for k, v in all_data["data"])
+        n_entries = 0
+        with open(journal_fn, "rb") as fp:
+            try:
+                for entry in backend.iter_loads(fp):
+                    configs.update(entry["configs"])
+                    config_origins.update(entry["config_origins"])
+                    for k, v in entry["data"]:
+                        data[tuple(k)] = v
+                    n_entries += 1
+            except ValueError:
+                # Only the last entry can be incomplete, e.g. if the writing process was killed
+                self.logger.warning(
+                    "Could not read entry %d of %s. Ignoring the rest of the journal.", n_entries, journal_fn
+                )
+
+        return {
+            "data": [(list(k), v) for k, v in data.items()],
+            "config_origins": config_origins,
+            "configs": configs,
+        }
+
+    def load_json(self, fn: str, cs: ConfigurationSpace, serializer: Optional[str] = None) -> None:
         """Load and runhistory in json representation from disk.
 
+        If there is a journal next to the file (see `save_json`), it is replayed as well.
+
         Warning
         -------
         Overwrites current runhistory!
@@ -883,10 +1710,12 @@ class RunHistory(Mapping[RunKey, RunValue]):
             file name to load from
         cs : ConfigSpace
             instance of configuration space
+        serializer : Optional[str]
+            Serialization backend, see `smac.utils.io.serialization.get_serializer`. By default, json is
+            read unless `fn` ends with ``.msgpack``.
         """
         try:
-            with open(fn) as fp:
-                all_data = json.load(fp, object_hook=StatusType.enum_hook)
+            all_data = self._read_json(fn, serializer)
         except Exception as e:
             self.logger.warning(
                 "Encountered exception %s while reading runhistory from %s. " "Not adding any runs!",
@@ -897,40 +1726,22 @@ class RunHistory(Mapping[RunKey, RunValue]):
 
         config_origins = all_data.get("config_origins", {})
 
-        self.ids_config = {
-            int(id_): Configuration(cs, values=values, origin=config_origins.get(id_, None))
-            for id_, values in all_data["configs"].items()
-        }
+        self._configs.clear()
+        for id_, values in all_data["configs"].items():
+            self._configs.add(Configuration(cs, values=values, origin=config_origins.get(id_, None)), int(id_))
+        self._n_id = max(self.ids_config, default=0)
 
-        self.config_ids = {config: id_ for id_, config in self.ids_config.items()}
-        self._n_id = len(self.config_ids)
-
-        # important to use add method to use all data structure correctly
-        for k, v in all_data["data"]:
-            # Set num_obj first
-            if self.num_obj == -1:
-                if isinstance(v[0], float) or isinstance(v[0], int):
-                    self.num_obj = 1
-                else:
-                    self.num_obj = len(np.asarray(list(map(float, v[0]))))
-
-            if self.num_obj == 1:
-                cost: Union[np.ndarray, float] = float(v[0])
-            else:
-                cost: Union[np.ndarray, float] = np.asarray(list(map(float, v[0])))  # type: ignore[no-redef]
-
-            self.add(
-                config=self.ids_config[int(k[0])],
-                cost=cost,
-                time=float(v[1]),
-                status=StatusType(v[2]),
-                instance_id=k[1],
-                seed=int(k[2]),
-                budget=float(k[3]) if len(k) == 4 else 0,
-                starttime=v[3],
-                endtime=v[4],
-                additional_info=v[5],
+        runs = (
+            (
+                RunKey(int(k[0]), k[1], int(k[2]), float(k[3]) if len(k) == 4 else 0),
+                RunValue(v[0], float(v[1]), _decode_status(v[2]), v[3], v[4], decode_enums(v[5])),
             )
+            for k, v in all_data["data"]
+        )
+        # The runs already refer to the ids of this runhistory unless the file contains a configuration
+        # multiple times, in which case the last id is used (as `add` would do)
+        ids_config = None if len(self.config_ids) == len(self.ids_config) else self.ids_config
+        self._add_runs(runs, ids_config, DataOrigin.INTERNAL)
 
     def update_from_json(
         self,
@@ -955,38 +1766,23 @@ class RunHistory(Mapping[RunKey, RunValue]):
 
     def update(
         self,
-        runhistory: "RunHistory",
+        runhistory: Union[RunHistory, RunHistorySnapshot],
         origin: DataOrigin = DataOrigin.EXTERNAL_SAME_INSTANCES,
     ) -> None:
         """Updates the current runhistory by adding new runs from a RunHistory.
 
         Parameters
         ----------
-        runhistory: RunHistory
-            Runhistory with additional data to be added to self
+        runhistory: Union[RunHistory, RunHistorySnapshot]
+            Runhistory with additional data to be added to self. Can also be a snapshot (see
+            `smac.runhistory.snapshot`), whose configurations are only created here.
         origin: DataOrigin
             If set to ``INTERNAL`` or ``EXTERNAL_FULL`` the data will be
             added to the internal data structure self._configid_to_inst_seed_budget
             and be available :meth:`through get_runs_for_config`.
         """
         # Configurations might be already known, but by a different ID. This
-        # does not matter here because the add() method handles this
+        # does not matter here because the _add_runs() method handles this
         # correctly by assigning an ID to unknown configurations and re-using
         #  the ID
-        for key, value in runhistory.data.items():
-            config_id, instance_id, seed, budget = key
-            cost, time, status, start, end, additional_info = value
-            config = runhistory.ids_config[config_id]
-            self.add(
-                config=config,
-                cost=cost,
-                time=time,
-                status=status,
-                instance_id=instance_id,
-                starttime=start,
-                endtime=end,
-                seed=seed,
-                budget=budget,
-                additional_info=additional_info,
-                origin=origin,
-            )
+        self._add_runs(runhistory.data.items(), runhistory.ids_config, origin)
@@ -1,14 +1,15 @@
 import abc
-from typing import Dict, List, Mapping, Optional, Tuple
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
 
+import bisect
 import logging
+import weakref
 
 import numpy as np
 
-from smac.configspace import convert_configurations_to_array
 from smac.epm.base_imputor import BaseImputor
 from smac.multi_objective.aggregation_strategy import AggregationStrategy
-from smac.multi_objective.utils import normalize_costs
+from smac.multi_objective.utils import normalize_cost_matrix
 from smac.runhistory.runhistory import RunHistory, RunKey, RunValue
 from smac.scenario.scenario import Scenario
 from smac.tae import StatusType
@@ -22,6 +23,211 @@ __email__ = "eggenspk@cs.uni-freiburg.de"
 __version__ = "0.0.1"
 
 
+class _RunRows(object):
+    """Rows of the design matrix, costs and times of the runs of a runhistory, which `_build_matrix` reuses
+    across calls. Rows are only added for runs which are requested, and the costs and times of runs which were
+    updated in the runhistory since the last call are refreshed (see `RunHistory.get_changed_runs`).
+
+    Parameters
+    ----------
+    runhistory : RunHistory
+        Runhistory of the runs, which is referenced weakly.
+    n_cols : int
+        Number of columns of the design matrix.
+    num_obj : int
+        Number of objectives, i.e. columns of the costs.
+    """
+
+    def __init__(self, runhistory: RunHistory, n_cols: int, num_obj: int, capacity: int = 64) -> None:
+        self.runhistory = weakref.ref(runhistory)
+        self.version = runhistory.get_version()
+        self.rows = {}  # type: Dict[RunKey, int]
+        self.X = np.empty((capacity, n_cols))
+        self.costs = np.empty((capacity, num_obj))
+        self.times = np.empty((capacity, 1))
+
+    def grow(self, n_rows: int) -> None:
+        capacity = len(self.X)
+        while capacity < n_rows:
+            capacity *= 2
+        for name in ("X", "costs", "times"):
+            column = getattr(self, name)
+            new_column = np.empty((capacity, column.shape[1]))
+            new_column[: len(column)] = column
+            setattr(self, name, new_column)
+
+
+class _ResponseValues(object):
+    """Untransformed and transformed y values of the last call of `_build_matrix` (of a kind, e.g. with
+    ``store_statistics``) and the statistics they were transformed with. If the y values of the next call start
+    with these y values, only the new y values are added to the order statistics and transformed, unless the
+    statistics changed.
+
+    Parameters
+    ----------
+    y : np.ndarray
+        Untransformed y values.
+    y_transformed : np.ndarray
+        Transformed y values.
+    statistics : Tuple[np.ndarray, np.ndarray, np.ndarray]
+        ``min_y``, ``max_y`` and ``perc`` which were used to transform the y values.
+    sorted_y : Optional[np.ndarray]
+        Columns of the y values in ascending order if the statistics were computed from the y values.
+    """
+
+    def __init__(
+        self,
+        y: np.ndarray,
+        y_transformed: np.ndarray,
+        statistics: Tuple[np.ndarray, np.ndarray, np.ndarray],
+        sorted_y: Optional[np.ndarray] = None,
+    ) -> None:
+        self.y = y
+        self.y_transformed = y_transformed
+        self.statistics = statistics
+        self.sorted_y = sorted_y
+
+    def get_prefix_length(self, y: np.ndarray) -> int:
+        """Returns the number of cached y values if y starts with them, or -1 otherwise."""
+        n_rows = self.y.shape[0]
+        if y.shape[0] < n_rows or y.shape[1:] != self.y.shape[1:] or not np.array_equal(y[:n_rows], self.y):
+            return -1
+        return n_rows
+
+
+def _sorted_percentile(sorted_values: np.ndarray, q: float) -> np.ndarray:
+    """Returns the q-th percentile of the columns of sorted values. The values are interpolated linearly like
+    by `np.percentile`, but without partitioning the values again."""
+    n_values = sorted_values.shape[0]
+    index = (n_values - 1) * np.true_divide(q, 100)
+    previous = int(np.floor(index))
+    if previous >= n_values - 1:
+        return sorted_values[-1].copy()
+
+    gamma = index - previous
+    lower, upper = sorted_values[previous], sorted_values[previous + 1]
+    difference = upper - lower
+    if gamma >= 0.5:
+        return upper - difference * (1 - gamma)
+    return lower + difference * gamma
+
+
+class _RunPartition(object):
+    """Positions of the runs of a runhistory (in the order of its data) per budget, partitioned into the runs
+    `transform` selects: successful runs, runs which are considered for higher budgets, TIMEOUT runs which
+    reached the cutoff and censored runs. The runs are partitioned in a single pass, afterwards only runs which
+    were added or updated are partitioned (see `RunHistory.get_changed_runs`).
+
+    Parameters
+    ----------
+    runhistory : RunHistory
+        Runhistory of the runs, which is referenced weakly.
+    success_states : List[StatusType]
+    consider_for_higher_budgets_state : List[StatusType]
+    impute_state : Optional[List[StatusType]]
+        States of censored runs, which are only partitioned if given.
+    cutoff_time : Optional[float]
+    """
+
+    CATEGORIES = ("success", "higher", "timeout", "censored")
+
+    def __init__(
+        self,
+        runhistory: RunHistory,
+        success_states: List[StatusType],
+        consider_for_higher_budgets_state: List[StatusType],
+        impute_state: Optional[List[StatusType]],
+        cutoff_time: Optional[float],
+    ) -> None:
+        self.runhistory = weakref.ref(runhistory)
+        self.version = runhistory.get_version()
+        self.success_states = set(success_states)
+        self.consider_for_higher_budgets_state = set(consider_for_higher_budgets_state)
+        self.impute_state = set(impute_state) if impute_state is not None else set()
+        self.cutoff_time = cutoff_time
+
+        self.keys = []  # type: List[RunKey]
+        self.runs = []  # type: List[RunValue]
+        self.index = {}  # type: Dict[RunKey, int]
+        # Positions of the runs of all budgets and per budget
+        self.positions = {category: [] for category in self.CATEGORIES}  # type: Dict[str, List[int]]
+        self.positions_per_budget = {
+            category: {} for category in self.CATEGORIES
+        }  # type: Dict[str, Dict[float, List[int]]]
+
+        for key, run in runhistory.data.items():
+            self._append(key, run)
+
+    def _categorize(self, run: RunValue) -> List[str]:
+        status = run.status
+        categories = []
+        if status in self.success_states:
+            categories.append("success")
+        if status in self.consider_for_higher_budgets_state:
+            categories.append("higher")
+        if status == StatusType.TIMEOUT and run.time >= self.cutoff_time:
+            categories.append("timeout")
+        if status in self.impute_state and run.time < self.cutoff_time:
+            categories.append("censored")
+        return categories
+
+    def _append(self, key: RunKey, run: RunValue) -> None:
+        position = len(self.keys)
+        self.keys.append(key)
+        self.runs.append(run)
+        self.index[key] = position
+        for category in self._categorize(run):
+            self.positions[category].append(position)
+            per_budget = self.positions_per_budget[category]
+            if key.budget not in per_budget:
+                per_budget[key.budget] = []
+            per_budget[key.budget].append(position)
+
+    def update(self, runhistory: RunHistory) -> None:
+        """Partitions the runs which were added or updated since the last call. New runs are appended, updated
+        runs keep their position in the data and move to the categories of their new status."""
+        data = runhistory.data
+        for key in dict.fromkeys(runhistory.get_changed_runs(self.version)):
+            run = data[key]
+            position = self.index.get(key)
+            if position is None:
+                self._append(key, run)
+                continue
+
+            previous = self._categorize(self.runs[position])
+            self.runs[position] = run
+            categories = self._categorize(run)
+            for category in self.CATEGORIES:
+                if category in previous and category not in categories:
+                    for positions in (self.positions[category], self.positions_per_budget[category][key.budget]):
+                        del positions[bisect.bisect_left(positions, position)]
+                elif category in categories and category not in previous:
+                    per_budget = self.positions_per_budget[category]
+                    if key.budget not in per_budget:
+                        per_budget[key.budget] = []
+                    bisect.insort(self.positions[category], position)
+                    bisect.insort(per_budget[key.budget], position)
+
+        self.version = runhistory.get_version()
+
+    def get_positions(self, category: str, budgets: Optional[Iterable[float]] = None) -> List[int]:
+        """Returns the positions of the runs of a category on the given budgets (all budgets if None) in the
+        order of the runhistory."""
+        if budgets is None:
+            return self.positions[category]
+
+        per_budget = self.positions_per_budget[category]
+        selected = [per_budget[budget] for budget in set(budgets) if budget in per_budget]
+        if len(selected) == 1:
+            return selected[0]
+        return sorted(position for positions in selected for position in positions)
+
+    def get_runs(self, positions: Iterable[int]) -> Dict[RunKey, RunValue]:
+        """Returns the runs at the positions."""
+        keys, runs = self.keys, self.runs
+        return {keys[position]: runs[position] for position in positions}
+
+
 class AbstractRunHistory2EPM(object):
     __metaclass__ = abc.ABCMeta
 
@@ -152,11 +358,43 @@ class AbstractRunHistory2EPM(object):
                 "Given imputor is not an instance of " "smac.epm.base_imputor.BaseImputor, but %s" % type(self.imputor)
             )
 
+        # Weights of the rows of the last call of `transform` if rows aggregate several runs, see
+        # `RunHistory2EPM4Cost`
+        self.weights = None  # type: Optional[np.ndarray]
+        # Positions of the (most recent) runs of the rows of the last call of `transform` in the runhistory. The
+        # TIMEOUT and censored runs are appended after the successful runs, hence the rows are not in the order
+        # of the runs, see `TrainingSetPolicy`
+        self.run_positions = None  # type: Optional[np.ndarray]
+
         # Learned statistics
         self.min_y = np.array([np.NaN] * self.num_obj)
         self.max_y = np.array([np.NaN] * self.num_obj)
         self.perc = np.array([np.NaN] * self.num_obj)
 
+        # Rows of the runs of the last transformed runhistory and the instance features, see `_get_run_rows`
+        self._run_rows = None  # type: Optional[_RunRows]
+        # Partition of the runs of the last transformed runhistory, see `_get_run_partition`
+        self._run_partition = None  # type: Optional[_RunPartition]
+        self._instance_features = None  # type: Optional[Tuple[Dict[str, int], np.ndarray]]
+        # y values of the last calls of `_build_matrix` per kind of call, see `RunHistory2EPM4Cost`
+        self._response_values = {}  # type: Dict[Tuple[bool, bool], _ResponseValues]
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = dict(self.__dict__)
+        state["_run_rows"] = None
+        state["_run_partition"] = None
+        state["_response_values"] = {}
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self.__dict__.setdefault("_run_rows", None)
+        self.__dict__.setdefault("_run_partition", None)
+        self.__dict__.setdefault("_response_values", {})
+        self.__dict__.setdefault("_instance_features", None)
+        self.__dict__.setdefault("weights", None)
+        self.__dict__.setdefault("run_positions", None)
+
     @abc.abstractmethod
     def _build_matrix(
         self,
@@ -185,34 +423,139 @@ class AbstractRunHistory2EPM(object):
         """
         raise NotImplementedError()
 
+    def _build_weighted_matrix(
+        self,
+        run_dict: Mapping[RunKey, RunValue],
+        runhistory: RunHistory,
+        return_time_as_y: bool = False,
+        store_statistics: bool = False,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Like `_build_matrix`, but additionally returns the weights of the rows, i.e. the number of runs
+        each row aggregates. By default, there is one row per run."""
+        X, Y = self._build_matrix(
+            run_dict=run_dict,
+            runhistory=runhistory,
+            return_time_as_y=return_time_as_y,
+            store_statistics=store_statistics,
+        )
+        return X, Y, np.ones(X.shape[0])
+
+    def _set_weights(self, weights: np.ndarray) -> None:
+        # Only keep the weights if a row aggregates several runs, models are trained as before otherwise
+        self.weights = weights if np.any(weights != 1) else None
+
+    def _get_run_positions(self, run_dict: Mapping[RunKey, RunValue], runhistory: RunHistory) -> np.ndarray:
+        """Returns the positions of the runs in the runhistory, one per row of `_build_weighted_matrix`. If a
+        row aggregates several runs, the position of its most recent run is returned."""
+        index = self._get_run_partition(runhistory).index
+        return np.fromiter((index[key] for key in run_dict), dtype=np.int64, count=len(run_dict))
+
+    def _get_run_rows(
+        self,
+        run_dict: Mapping[RunKey, RunValue],
+        runhistory: RunHistory,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Returns the rows of the design matrix (configuration vector and instance features), the costs and
+        the times of the runs. The rows of the runs of the last transformed runhistory are cached, hence only
+        runs which were not requested before are converted, all at once.
+
+        Parameters
+        ----------
+        run_dict: dict(RunKey -> RunValue)
+            dictionary from RunHistory.RunKey to RunHistory.RunValue
+        runhistory: RunHistory
+            runhistory object
+
+        Returns
+        -------
+        X: np.ndarray
+        costs: np.ndarray
+            Costs with one column per objective.
+        times: np.ndarray
+            Times as column vector.
+        """
+        cache = self._run_rows
+        if cache is None or cache.runhistory() is not runhistory:
+            cache = self._run_rows = _RunRows(runhistory, self.num_params + self.n_feats, self.num_obj)
+        else:
+            # Refresh the costs and times of updated runs
+            for key in runhistory.get_changed_runs(cache.version):
+                row = cache.rows.get(key)
+                if row is not None:
+                    run = runhistory.data[key]
+                    cache.costs[row] = run.cost
+                    cache.times[row] = run.time
+            cache.version = runhistory.get_version()
+
+        rows = cache.rows
+        new_keys = [key for key in run_dict if key not in rows]
+        if new_keys:
+            start = len(rows)
+            end = start + len(new_keys)
+            if end > len(cache.X):
+                cache.grow(end)
+
+            # Scaling is automatically done in configSpace
+            cache.X[start:end, : self.num_params] = runhistory.get_config_vectors([key.config_id for key in new_keys])
+            if self.n_feats:
+                instance_index, features = self._get_instance_features()
+                cache.X[start:end, self.num_params :] = features[[instance_index[key.instance_id] for key in new_keys]]
+
+            new_runs = [run_dict[key] for key in new_keys]
+            cache.costs[start:end] = np.array([run.cost for run in new_runs], dtype=float).reshape(len(new_keys), -1)
+            cache.times[start:end, 0] = [run.time for run in new_runs]
+            rows.update(zip(new_keys, range(start, end)))
+
+        indices = [rows[key] for key in run_dict]
+        return cache.X[indices], cache.costs[indices], cache.times[indices]
+
+    def _get_instance_features(self) -> Tuple[Dict[str, int], np.ndarray]:
+        """Returns the rows of the instances in the instance feature matrix and the matrix."""
+        if self._instance_features is None:
+            assert self.instance_features is not None  # please mypy
+            instance_index = {instance: row for row, instance in enumerate(self.instance_features)}
+            features = np.array(list(self.instance_features.values()), dtype=float).reshape(
+                len(instance_index), self.n_feats
+            )
+            self._instance_features = instance_index, features
+        return self._instance_features
+
+    def _get_run_partition(self, runhistory: RunHistory) -> _RunPartition:
+        """Returns the partition of the runs of the runhistory, which is updated with the runs which changed
+        since the last call. Hence, `transform` and `get_configurations` can be called for each budget without
+        passing over all runs."""
+        partition = self._run_partition
+        if partition is not None and partition.runhistory() is runhistory:
+            if partition.version != runhistory.get_version():
+                partition.update(runhistory)
+        else:
+            partition = self._run_partition = _RunPartition(
+                runhistory,
+                success_states=self.success_states,
+                consider_for_higher_budgets_state=self.consider_for_higher_budgets_state,
+                impute_state=self.impute_state if self.impute_censored_data else None,
+                cutoff_time=self.cutoff_time,
+            )
+        return partition
+
     def _get_s_run_dict(
         self,
         runhistory: RunHistory,
         budget_subset: Optional[List] = None,
     ) -> Dict[RunKey, RunValue]:
+        partition = self._get_run_partition(runhistory)
         # Get only successfully finished runs
         if budget_subset is not None:
             if len(budget_subset) != 1:
                 raise ValueError("Cannot yet handle getting runs from multiple budgets")
-            s_run_dict = {
-                run: runhistory.data[run]
-                for run in runhistory.data.keys()
-                if run.budget in budget_subset and runhistory.data[run].status in self.success_states
-            }
+            s_run_dict = partition.get_runs(partition.get_positions("success", budget_subset))
             # Additionally add these states from lower budgets
-            add = {
-                run: runhistory.data[run]
-                for run in runhistory.data.keys()
-                if runhistory.data[run].status in self.consider_for_higher_budgets_state
-                and run.budget < budget_subset[0]
-            }
-            s_run_dict.update(add)
+            if self.consider_for_higher_budgets_state:
+                lower_budgets = [budget for budget in runhistory.get_budgets() if budget < budget_subset[0]]
+                if len(lower_budgets) > 0:
+                    s_run_dict.update(partition.get_runs(partition.get_positions("higher", lower_budgets)))
         else:
-            s_run_dict = {
-                run: runhistory.data[run]
-                for run in runhistory.data.keys()
-                if runhistory.data[run].status in self.success_states
-            }
+            s_run_dict = partition.get_runs(partition.get_positions("success"))
         return s_run_dict
 
     def _get_t_run_dict(
@@ -220,21 +563,18 @@ class AbstractRunHistory2EPM(object):
         runhistory: RunHistory,
         budget_subset: Optional[List] = None,
     ) -> Dict[RunKey, RunValue]:
-        if budget_subset is not None:
-            t_run_dict = {
-                run: runhistory.data[run]
-                for run in runhistory.data.keys()
-                if runhistory.data[run].status == StatusType.TIMEOUT
-                and runhistory.data[run].time >= self.cutoff_time
-                and run.budget in budget_subset
-            }
-        else:
-            t_run_dict = {
-                run: runhistory.data[run]
-                for run in runhistory.data.keys()
-                if runhistory.data[run].status == StatusType.TIMEOUT and runhistory.data[run].time >= self.cutoff_time
-            }
-        return t_run_dict
+        # Get TIMEOUT runs which reached the cutoff
+        partition = self._get_run_partition(runhistory)
+        return partition.get_runs(partition.get_positions("timeout", budget_subset))
+
+    def _get_c_run_dict(
+        self,
+        runhistory: RunHistory,
+        budget_subset: Optional[List] = None,
+    ) -> Dict[RunKey, RunValue]:
+        # Get censored runs, i.e. runs with one of the impute states and time < cutoff
+        partition = self._get_run_partition(runhistory)
+        return partition.get_runs(partition.get_positions("censored", budget_subset))
 
     def get_configurations(
         self,
@@ -259,9 +599,7 @@ class AbstractRunHistory2EPM(object):
         t_runs = self._get_t_run_dict(runhistory, budget_subset)
         t_config_ids = set(t_run.config_id for t_run in t_runs)
         config_ids = s_config_ids | t_config_ids
-        configurations = [runhistory.ids_config[config_id] for config_id in config_ids]
-        configs_array = convert_configurations_to_array(configurations)
-        return configs_array
+        return runhistory.get_config_vectors(config_ids)
 
     def transform(
         self,
@@ -282,18 +620,19 @@ class AbstractRunHistory2EPM(object):
         X: numpy.ndarray
             configuration vector x instance features
         Y: numpy.ndarray
-            cost values
+            cost values. If runs are aggregated, the weights of the rows are stored in `weights`. The positions
+            of the runs of the rows in the runhistory are stored in `run_positions`.
         """
         self.logger.debug("Transform runhistory into X,y format")
 
         s_run_dict = self._get_s_run_dict(runhistory, budget_subset)
-        X, Y = self._build_matrix(run_dict=s_run_dict, runhistory=runhistory, store_statistics=True)
+        X, Y, weights = self._build_weighted_matrix(run_dict=s_run_dict, runhistory=runhistory, store_statistics=True)
 
         # Get real TIMEOUT runs
         t_run_dict = self._get_t_run_dict(runhistory, budget_subset)
         # use penalization (e.g. PAR10) for EPM training
         store_statistics = True if np.any(np.isnan(self.min_y)) else False
-        tX, tY = self._build_matrix(
+        tX, tY, t_weights = self._build_weighted_matrix(
             run_dict=t_run_dict,
             runhistory=runhistory,
             store_statistics=store_statistics,
@@ -302,35 +641,29 @@ class AbstractRunHistory2EPM(object):
         # if we don't have successful runs,
         # we have to return all timeout runs
         if not s_run_dict:
+            self._set_weights(t_weights)
+            self.run_positions = self._get_run_positions(t_run_dict, runhistory)
             return tX, tY
 
+        positions = self._get_run_positions(s_run_dict, runhistory)
+        t_positions = self._get_run_positions(t_run_dict, runhistory)
+
         if self.impute_censored_data:
             # Get all censored runs
-            if budget_subset is not None:
-                c_run_dict = {
-                    run: runhistory.data[run]
-                    for run in runhistory.data.keys()
-                    if runhistory.data[run].status in self.impute_state
-                    and runhistory.data[run].time < self.cutoff_time
-                    and run.budget in budget_subset
-                }
-            else:
-                c_run_dict = {
-                    run: runhistory.data[run]
-                    for run in runhistory.data.keys()
-                    if runhistory.data[run].status in self.impute_state and runhistory.data[run].time < self.cutoff_time
-                }
+            c_run_dict = self._get_c_run_dict(runhistory, budget_subset)
 
             if len(c_run_dict) == 0:
                 self.logger.debug("No censored data found, skip imputation")
                 # If we do not impute, we also return TIMEOUT data
                 X = np.vstack((X, tX))
                 Y = np.concatenate((Y, tY))
+                weights = np.concatenate((weights, t_weights))
+                positions = np.concatenate((positions, t_positions))
             else:
 
                 # better empirical results by using PAR1 instead of PAR10
                 # for censored data imputation
-                cen_X, cen_Y = self._build_matrix(
+                cen_X, cen_Y, cen_weights = self._build_weighted_matrix(
                     run_dict=c_run_dict,
                     runhistory=runhistory,
                     return_time_as_y=True,
@@ -338,7 +671,7 @@ class AbstractRunHistory2EPM(object):
                 )
 
                 # Also impute TIMEOUTS
-                tX, tY = self._build_matrix(
+                tX, tY, t_weights = self._build_weighted_matrix(
                     run_dict=t_run_dict,
                     runhistory=runhistory,
                     return_time_as_y=True,
@@ -355,11 +688,17 @@ class AbstractRunHistory2EPM(object):
                 # Shuffle data to mix censored and imputed data
                 X = np.vstack((X, cen_X))
                 Y = np.concatenate((Y, imp_Y))  # type: ignore
+                weights = np.concatenate((weights, cen_weights, t_weights))
+                positions = np.concatenate((positions, self._get_run_positions(c_run_dict, runhistory), t_positions))
         else:
             # If we do not impute, we also return TIMEOUT data
             X = np.vstack((X, tX))
             Y = np.concatenate((Y, tY))
+            weights = np.concatenate((weights, t_weights))
+            positions = np.concatenate((positions, t_positions))
 
+        self._set_weights(weights)
+        self.run_positions = positions
         self.logger.debug("Converted %d observations" % (X.shape[0]))
         return X, Y
 
@@ -420,7 +759,29 @@ class AbstractRunHistory2EPM(object):
 
 
 class RunHistory2EPM4Cost(AbstractRunHistory2EPM):
-    """TODO."""
+    """Uses the costs of the runs as y values.
+
+    Parameters
+    ----------
+    aggregate_seeds : bool, defaults to False
+        Whether to aggregate the runs of a configuration on an instance (and budget) with different seeds into
+        a single row with the mean cost. The number of runs of each row is stored in `weights` by `transform`,
+        which models supporting weights use in training. For deterministic scenarios, i.e. with a single
+        seed per instance, the rows are unchanged.
+    **kwargs
+        See `AbstractRunHistory2EPM`.
+    """
+
+    # Whether `transform_response_values` depends on the statistics of the y values
+    _scales_response_values = False
+
+    def __init__(self, aggregate_seeds: bool = False, **kwargs):  # type: ignore[no-untyped-def] # noqa F723
+        super().__init__(**kwargs)
+        self.aggregate_seeds = aggregate_seeds
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        super().__setstate__(state)
+        self.__dict__.setdefault("aggregate_seeds", False)
 
     def _build_matrix(
         self,
@@ -447,49 +808,151 @@ class RunHistory2EPM4Cost(AbstractRunHistory2EPM):
         X: np.ndarray
         Y: np.ndarray
         """
-        # First build nan-matrix of size #configs x #params+1
-        n_rows = len(run_dict)
-        n_cols = self.num_params
-        X = np.ones([n_rows, n_cols + self.n_feats]) * np.nan
+        X, y, _ = self._build_weighted_matrix(
+            run_dict=run_dict,
+            runhistory=runhistory,
+            return_time_as_y=return_time_as_y,
+            store_statistics=store_statistics,
+        )
+        return X, y
+
+    def _build_weighted_matrix(
+        self,
+        run_dict: Mapping[RunKey, RunValue],
+        runhistory: RunHistory,
+        return_time_as_y: bool = False,
+        store_statistics: bool = False,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        X, costs, times = self._get_run_rows(run_dict, runhistory)
 
         # For now we keep it as 1
         # TODO: Extend for native multi-objective
-        y = np.ones([n_rows, 1])
+        if self.num_obj > 1:
+            assert self.multi_objective_algorithm is not None
+
+            # Let's normalize y here
+            # We use the objective_bounds calculated by the runhistory
+            # The aggregated costs are not cached, since the objective bounds and the aggregation change
+            y = np.ones([len(run_dict), 1])
+            if len(run_dict) > 0:
+                y_ = normalize_cost_matrix(costs, runhistory.objective_bounds)
+                y[:, 0] = self.multi_objective_algorithm.aggregate(y_)
+        elif return_time_as_y:
+            y = times
+        else:
+            y = costs
 
-        # Then populate matrix
-        for row, (key, run) in enumerate(run_dict.items()):
-            # Scaling is automatically done in configSpace
-            conf = runhistory.ids_config[key.config_id]
-            conf_vector = convert_configurations_to_array([conf])[0]
-            if self.n_feats:
-                feats = self.instance_features[key.instance_id]
-                X[row, :] = np.hstack((conf_vector, feats))  # type: ignore
-            else:
-                X[row, :] = conf_vector
-            # run_array[row, -1] = instances[row]
+        weights = np.ones(len(run_dict))
+        if self.aggregate_seeds:
+            X, y, weights = self._aggregate_seeds(run_dict, X, y)
 
-            if self.num_obj > 1:
-                assert self.multi_objective_algorithm is not None
+        y = self._get_response_values(y, return_time_as_y=return_time_as_y, store_statistics=store_statistics)
+        return X, y, weights
 
-                # Let's normalize y here
-                # We use the objective_bounds calculated by the runhistory
-                y_ = normalize_costs(run.cost, runhistory.objective_bounds)
-                y_agg = self.multi_objective_algorithm(y_)
-                y[row] = y_agg
-            else:
-                if return_time_as_y:
-                    y[row, 0] = run.time
-                else:
-                    y[row] = run.cost
+    def _get_response_values(self, y: np.ndarray, return_time_as_y: bool, store_statistics: bool) -> np.ndarray:
+        """Stores the statistics of the y values if requested and returns the transformed y values.
+
+        The y values of the last call of the same kind are cached. If y starts with them, only the new y values
+        are added to the statistics and transformed, unless the statistics changed and the transformation scales
+        the y values.
+        """
+        kind = (return_time_as_y, store_statistics)
+        cache = self._response_values.get(kind)
+        n_cached = -1 if cache is None else cache.get_prefix_length(y)
 
+        sorted_y = None
         if y.size > 0:
             if store_statistics:
-                self.perc = np.percentile(y, self.scale_perc, axis=0)
-                self.min_y = np.min(y, axis=0)
-                self.max_y = np.max(y, axis=0)
+                sorted_y = self._store_statistics(y, cache, n_cached)
+
+        statistics = (self.min_y.copy(), self.max_y.copy(), self.perc.copy())
+        if (
+            cache is not None
+            and n_cached >= 0
+            and (
+                not self._scales_response_values
+                or all(np.array_equal(new, old, equal_nan=True) for new, old in zip(statistics, cache.statistics))
+            )
+        ):
+            y_transformed = np.concatenate(
+                (cache.y_transformed, self.transform_response_values(values=y[n_cached:].copy()))
+            )
+        else:
+            y_transformed = self.transform_response_values(values=y.copy())
+        self._response_values[kind] = _ResponseValues(y, y_transformed, statistics, sorted_y)
+        return y_transformed.copy()
+
+    def _store_statistics(self, y: np.ndarray, cache: Optional[_ResponseValues], n_cached: int) -> Optional[np.ndarray]:
+        """Stores the minimum, the maximum and the ``scale_perc`` percentile of the y values. If they start with
+        the cached y values, the new y values are merged into the sorted cached ones and the statistics are read
+        off. Returns the sorted y values if they were computed."""
+        # NaNs are never cached since they are not equal to themselves
+        if cache is None or n_cached < 0 or np.isnan(y[n_cached:]).any():
+            self.perc = np.percentile(y, self.scale_perc, axis=0)
+            self.min_y = np.min(y, axis=0)
+            self.max_y = np.max(y, axis=0)
+            return None
+
+        # The cached y values are sorted once the statistics are computed incrementally
+        sorted_y = cache.sorted_y if cache.sorted_y is not None else np.sort(cache.y, axis=0)
+        if n_cached < y.shape[0]:
+            new_y = np.sort(y[n_cached:], axis=0)
+            sorted_y = np.column_stack(
+                [
+                    np.insert(
+                        sorted_y[:, column], np.searchsorted(sorted_y[:, column], new_y[:, column]), new_y[:, column]
+                    )
+                    for column in range(y.shape[1])
+                ]
+            )
 
-        y = self.transform_response_values(values=y)
-        return X, y
+        self.perc = _sorted_percentile(sorted_y, self.scale_perc)
+        self.min_y = sorted_y[0].copy()
+        self.max_y = sorted_y[-1].copy()
+        return sorted_y
+
+    def _group_seeds(self, run_dict: Mapping[RunKey, RunValue]) -> Tuple[np.ndarray, int]:
+        """Returns the group of each run, i.e. of its configuration, instance and budget, and the number of
+        groups. The groups are numbered in the order of their first run."""
+        groups = {}  # type: Dict[Tuple[int, Optional[str], float], int]
+        inverse = np.fromiter(
+            (groups.setdefault((key.config_id, key.instance_id, key.budget), len(groups)) for key in run_dict),
+            dtype=np.int64,
+            count=len(run_dict),
+        )
+        return inverse, len(groups)
+
+    def _get_run_positions(self, run_dict: Mapping[RunKey, RunValue], runhistory: RunHistory) -> np.ndarray:
+        positions = super()._get_run_positions(run_dict, runhistory)
+        if not self.aggregate_seeds:
+            return positions
+
+        inverse, n_groups = self._group_seeds(run_dict)
+        if n_groups == len(run_dict):
+            return positions
+        group_positions = np.full(n_groups, -1, dtype=np.int64)
+        np.maximum.at(group_positions, inverse, positions)
+        return group_positions
+
+    def _aggregate_seeds(
+        self,
+        run_dict: Mapping[RunKey, RunValue],
+        X: np.ndarray,
+        y: np.ndarray,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Collapses the rows of the runs of a configuration on an instance and budget into one row with the
+        mean of their y values, in the order of their first run. Returns the rows, the y values and the number
+        of runs per row."""
+        inverse, n_groups = self._group_seeds(run_dict)
+        if n_groups == len(run_dict):
+            return X, y, np.ones(len(run_dict))
+
+        # The groups are numbered in the order of their first run
+        _, first, weights = np.unique(inverse, return_index=True, return_counts=True)
+        weights = weights.astype(float)
+        sums = np.zeros((n_groups, y.shape[1]))
+        np.add.at(sums, inverse, y)
+        return X[first], sums / weights[:, np.newaxis], weights
 
     def transform_response_values(self, values: np.ndarray) -> np.ndarray:
         """Transform function response values. Returns the input values.
@@ -536,6 +999,8 @@ class RunHistory2EPM4LogCost(RunHistory2EPM4Cost):
 class RunHistory2EPM4ScaledCost(RunHistory2EPM4Cost):
     """TODO."""
 
+    _scales_response_values = True
+
     def transform_response_values(self, values: np.ndarray) -> np.ndarray:
         """Transform function response values. Transforms the response values by linearly scaling
         them between zero and one.
@@ -562,6 +1027,8 @@ class RunHistory2EPM4ScaledCost(RunHistory2EPM4Cost):
 class RunHistory2EPM4InvScaledCost(RunHistory2EPM4Cost):
     """TODO."""
 
+    _scales_response_values = True
+
     def __init__(self, **kwargs):  # type: ignore[no-untyped-def] # noqa F723
         super().__init__(**kwargs)
         if self.instance_features is not None:
@@ -596,6 +1063,8 @@ class RunHistory2EPM4InvScaledCost(RunHistory2EPM4Cost):
 class RunHistory2EPM4SqrtScaledCost(RunHistory2EPM4Cost):
     """TODO."""
 
+    _scales_response_values = True
+
     def __init__(self, **kwargs):  # type: ignore[no-untyped-def]  # noqa F723
         super().__init__(**kwargs)
         if self.instance_features is not None:
@@ -630,6 +1099,8 @@ class RunHistory2EPM4SqrtScaledCost(RunHistory2EPM4Cost):
 class RunHistory2EPM4LogScaledCost(RunHistory2EPM4Cost):
     """TODO."""
 
+    _scales_response_values = True
+
     def transform_response_values(self, values: np.ndarray) -> np.ndarray:
         """Transform function response values.
 
@@ -675,35 +1146,21 @@ class RunHistory2EPM4EIPS(AbstractRunHistory2EPM):
             # store_statistics is currently not necessary
             pass
 
-        # First build nan-matrix of size #configs x #params+1
-        n_rows = len(run_dict)
-        n_cols = self.num_params
-        X = np.ones([n_rows, n_cols + self.n_feats]) * np.nan
-        y = np.ones([n_rows, 2])
+        X, costs, times = self._get_run_rows(run_dict, runhistory)
 
-        # Then populate matrix
-        for row, (key, run) in enumerate(run_dict.items()):
-            # Scaling is automatically done in configSpace
-            conf = runhistory.ids_config[key.config_id]
-            conf_vector = convert_configurations_to_array([conf])[0]
-            if self.n_feats:
-                feats = self.instance_features[key.instance_id]
-                X[row, :] = np.hstack((conf_vector, feats))  # type: ignore
-            else:
-                X[row, :] = conf_vector
-
-            if self.num_obj > 1:
-                assert self.multi_objective_algorithm is not None
-
-                # Let's normalize y here
-                # We use the objective_bounds calculated by the runhistory
-                y_ = normalize_costs(run.cost, runhistory.objective_bounds)
-                y_agg = self.multi_objective_algorithm(y_)
-                y[row, 0] = y_agg
-            else:
-                y[row, 0] = run.cost
+        if self.num_obj > 1:
+            assert self.multi_objective_algorithm is not None
+
+            # Let's normalize y here
+            # We use the objective_bounds calculated by the runhistory
+            y_agg = np.ones([len(run_dict), 1])
+            if len(run_dict) > 0:
+                y_agg[:, 0] = self.multi_objective_algorithm.aggregate(
+                    normalize_cost_matrix(costs, runhistory.objective_bounds)
+                )
+            costs = y_agg
 
-            y[row, 1] = run.time
+        y = np.hstack((costs, times))
 
         y_transformed = self.transform_response_values(values=y)
 
@@ -0,0 +1,404 @@
+from __future__ import annotations
+
+from typing import (
+    Any,
+    Dict,
+    ItemsView,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+)
+
+import json
+import os
+import struct
+import tempfile
+
+import numpy as np
+from ConfigSpace.read_and_write import json as csjson
+
+from smac.configspace import Configuration, ConfigurationSpace
+from smac.runhistory.runhistory import EnumEncoder, RunHistory, RunKey, RunValue
+from smac.tae import StatusType
+from smac.utils.io.serialization import decode_enums
+
+__copyright__ = "Copyright 2022, AutoML.org Freiburg-Hannover"
+__license__ = "3-clause BSD"
+
+
+# A snapshot file starts with these bytes, followed by the size of the json header as unsigned 64 bit integer,
+# the header and the sections, each of which starts at a multiple of SECTION_ALIGNMENT.
+SNAPSHOT_MAGIC = b"SMACRHS1"
+SNAPSHOT_SUFFIX = ".snapshot"
+SECTION_ALIGNMENT = 64
+
+# Runs are converted to keys and values in chunks of this many rows while iterating
+_CHUNK_SIZE = 10000
+
+# Index of None in the string table
+_NO_STRING = -1
+# Seed of runs without a seed
+_NO_SEED = np.iinfo(np.int64).min
+
+# Status codes are stored as small integers; this maps them back without calling the Enum machinery
+_STATUS_BY_CODE = {status.value: status for status in StatusType}
+
+
+def _align(size: int) -> int:
+    """Rounds up to the next multiple of SECTION_ALIGNMENT."""
+    return -(-size // SECTION_ALIGNMENT) * SECTION_ALIGNMENT
+
+
+def write_snapshot(runhistory: RunHistory, fn: str) -> None:
+    """Writes the runs and configurations of a runhistory to a snapshot file, which can be opened with
+    `RunHistorySnapshot`.
+
+    The file contains a json header and the sections, which are little-endian arrays:
+
+    * The run table with one column per field of `RunKey` and `RunValue` (``config_id``, ``instance``, ``seed``,
+      ``budget``, ``cost`` with shape (n_runs, num_obj), ``time``, ``status``, ``starttime``, ``endtime``).
+      Instances are indices into the string table (-1 for None), missing seeds are the smallest int64.
+    * The additional infos, encoded as json one after the other (``additional_info``), and the offsets of
+      each run in them (``additional_info_offsets``).
+    * The configurations as returned by `convert_configurations_to_array` (``config_vectors``), their ids
+      (``config_vector_ids``) and their origins as indices into the string table (``config_origins``).
+
+    The header contains the string table with all instances and origins, the configuration space (if it can
+    be written to json) and the dtype, shape and offset of each section. The file is written atomically.
+
+    Parameters
+    ----------
+    runhistory : RunHistory
+        Runhistory to write. All runs are written, including external ones.
+    fn : str
+        File name, by convention ending with ``.snapshot``.
+    """
+    strings = {}  # type: Dict[Any, int]
+
+    def string_index(value: Any) -> int:
+        if value is None:
+            return _NO_STRING
+        return strings.setdefault(value, len(strings))
+
+    n_runs = len(runhistory.data)
+    num_obj = max(runhistory.num_obj, 1)
+    columns = {
+        "config_id": np.empty(n_runs, dtype="<i8"),
+        "instance": np.empty(n_runs, dtype="<i4"),
+        "seed": np.empty(n_runs, dtype="<i8"),
+        "budget": np.empty(n_runs, dtype="<f8"),
+        "cost": np.empty((n_runs, num_obj), dtype="<f8"),
+        "time": np.empty(n_runs, dtype="<f8"),
+        "status": np.empty(n_runs, dtype="<i1"),
+        "starttime": np.empty(n_runs, dtype="<f8"),
+        "endtime": np.empty(n_runs, dtype="<f8"),
+        "additional_info_offsets": np.zeros(n_runs + 1, dtype="<i8"),
+    }
+    additional_infos = []  # type: List[bytes]
+    for row, (k, v) in enumerate(runhistory.data.items()):
+        columns["config_id"][row] = k.config_id
+        columns["instance"][row] = string_index(k.instance_id)
+        columns["seed"][row] = _NO_SEED if k.seed is None else k.seed
+        columns["budget"][row] = np.nan if k.budget is None else k.budget
+        columns["cost"][row] = v.cost
+        columns["time"][row] = v.time
+        columns["status"][row] = StatusType(v.status).value
+        columns["starttime"][row] = v.starttime
+        columns["endtime"][row] = v.endtime
+        additional_infos.append(json.dumps(v.additional_info, cls=EnumEncoder).encode())
+    columns["additional_info"] = np.frombuffer(b"".join(additional_infos), dtype=np.uint8)
+    np.cumsum([len(info) for info in additional_infos], out=columns["additional_info_offsets"][1:])
+
+    config_ids = sorted(runhistory.ids_config)
+    configs = [runhistory.ids_config[config_id] for config_id in config_ids]
+    n_hyperparameters = len(configs[0].get_array()) if configs else 0
+    columns["config_vector_ids"] = np.array(config_ids, dtype="<i8")
+    columns["config_vectors"] = np.array([config.get_array() for config in configs], dtype="<f8").reshape(
+        len(configs), n_hyperparameters
+    )
+    columns["config_origins"] = np.array([string_index(config.origin) for config in configs], dtype="<i4")
+
+    configspace = None
+    if configs:
+        try:
+            configspace = csjson.write(configs[0].configuration_space)
+        except Exception:
+            # The configuration space has to be passed when opening the snapshot
+            pass
+
+    # The offsets are relative to the start of the sections, which is the first multiple of SECTION_ALIGNMENT
+    # after the header
+    sections = {}  # type: Dict[str, Tuple[str, Tuple[int, ...], int]]
+    offset = 0
+    for name, column in columns.items():
+        sections[name] = (column.dtype.str, column.shape, offset)
+        offset = _align(offset + column.nbytes)
+    header = {
+        "num_obj": runhistory.num_obj,
+        "strings": list(strings),
+        "configspace": configspace,
+        "sections": sections,
+    }
+    encoded_header = json.dumps(header).encode()
+    prefix = SNAPSHOT_MAGIC + struct.pack("<Q", len(encoded_header)) + encoded_header
+    start = _align(len(prefix))
+
+    dirname = os.path.dirname(os.path.abspath(fn))
+    with tempfile.NamedTemporaryFile("wb", dir=dirname, delete=False) as fp:
+        temporary_fn = fp.name
+        fp.write(prefix)
+        for name, column in columns.items():
+            fp.seek(start + sections[name][2])
+            fp.write(np.ascontiguousarray(column).tobytes())
+        # Padding of the last section
+        fp.truncate(start + offset)
+    os.replace(temporary_fn, fn)
+
+
+class RunHistorySnapshot(Mapping[RunKey, RunValue]):
+    """Read-only view of a runhistory written with `write_snapshot`.
+
+    The sections of the file are opened with `np.memmap`, i.e. they are read on access and processes which
+    open the same snapshot share its memory through the page cache. Keys, values and configurations are only
+    created when they are accessed.
+
+    The view behaves like the data of a runhistory (a mapping from `RunKey` to `RunValue`) and provides
+    `ids_config`, `get_runs` and `get_all_configs` like `RunHistory`. Hence, it can be passed to
+    `RunHistory.update`, e.g. to warm-start from it, and to `merge_foreign_data`.
+
+    Parameters
+    ----------
+    fn : str
+        File name of the snapshot.
+    cs : Optional[ConfigurationSpace]
+        Configuration space of the configurations. By default, the one stored in the snapshot is used.
+
+    Attributes
+    ----------
+    config_vectors : np.ndarray
+        The configurations as returned by `convert_configurations_to_array` with shape
+        (n_configs, n_hyperparameters), ordered by config id.
+    config_vector_ids : np.ndarray
+        The config ids of the rows of `config_vectors`.
+    num_obj : int
+        Number of objectives, -1 if the snapshot has no runs.
+    """
+
+    def __init__(self, fn: str, cs: Optional[ConfigurationSpace] = None) -> None:
+        with open(fn, "rb") as fp:
+            if fp.read(len(SNAPSHOT_MAGIC)) != SNAPSHOT_MAGIC:
+                raise ValueError("%s is not a runhistory snapshot." % fn)
+            (header_size,) = struct.unpack("<Q", fp.read(8))
+            header = json.loads(fp.read(header_size))
+        start = _align(len(SNAPSHOT_MAGIC) + 8 + header_size)
+
+        self.fn = fn
+        self.num_obj = header["num_obj"]  # type: int
+        self._strings = header["strings"]  # type: List[Any]
+        if cs is None:
+            if header["configspace"] is None and header["sections"]["config_vector_ids"][1][0] > 0:
+                raise ValueError("The configuration space of %s could not be stored and has to be passed." % fn)
+            cs = csjson.read(header["configspace"]) if header["configspace"] is not None else None
+        self.cs = cs
+
+        columns = {}  # type: Dict[str, np.ndarray]
+        for name, (dtype, shape, offset) in header["sections"].items():
+            if np.prod(shape) == 0:
+                # Empty memory maps are not supported
+                columns[name] = np.empty(shape, dtype=dtype)
+            else:
+                columns[name] = np.memmap(fn, dtype=dtype, mode="r", offset=start + offset, shape=tuple(shape))
+        self._columns = columns
+
+        self.config_vectors = columns["config_vectors"]
+        self.config_vector_ids = columns["config_vector_ids"]
+        if self.cs is not None and self.config_vectors.shape[1] not in (0, len(self.cs.get_hyperparameters())):
+            raise ValueError("The configuration space does not match the configurations of %s." % fn)
+
+        self.ids_config = _LazyConfigurations(self)
+        # Maps the keys to their rows, which is only built if runs are accessed by their key
+        self._rows = None  # type: Optional[Dict[RunKey, int]]
+
+    def __len__(self) -> int:
+        return len(self._columns["config_id"])
+
+    def __iter__(self) -> Iterator[RunKey]:
+        for rows in self._chunks():
+            yield from self._get_keys(rows)
+
+    def __getitem__(self, k: RunKey) -> RunValue:
+        return self._get_values(np.array([self._get_rows()[k]]))[0]
+
+    def __contains__(self, k: object) -> bool:
+        return k in self._get_rows()
+
+    def __repr__(self) -> str:
+        return "%s(%s, %d runs)" % (self.__class__.__name__, self.fn, len(self))
+
+    def items(self) -> ItemsView[RunKey, RunValue]:
+        """Returns the runs, which are created in chunks while iterating."""
+        return _SnapshotItems(self)
+
+    @property
+    def data(self) -> RunHistorySnapshot:
+        """The snapshot itself, such that it can be used like ``RunHistory.data``."""
+        return self
+
+    @property
+    def run_config_ids(self) -> np.ndarray:
+        """Config ids of all runs (read-only)."""
+        return self._columns["config_id"]
+
+    @property
+    def budgets(self) -> np.ndarray:
+        """Budgets of all runs (read-only)."""
+        return self._columns["budget"]
+
+    @property
+    def costs(self) -> np.ndarray:
+        """Costs of all runs with shape (n_runs, num_obj) (read-only)."""
+        return self._columns["cost"]
+
+    @property
+    def times(self) -> np.ndarray:
+        """Runtimes of all runs (read-only)."""
+        return self._columns["time"]
+
+    @property
+    def status_codes(self) -> np.ndarray:
+        """Status of all runs as ``StatusType.value`` (read-only)."""
+        return self._columns["status"]
+
+    def empty(self) -> bool:
+        """Check whether the snapshot has no runs."""
+        return len(self) == 0
+
+    def get_runs(
+        self,
+        statuses: Optional[Iterable[StatusType]] = None,
+        budgets: Optional[Iterable[float]] = None,
+    ) -> Dict[RunKey, RunValue]:
+        """Returns the runs which have one of the given statuses and were run on one of the given budgets, see
+        `RunHistory.get_runs`. The runs are selected with vectorized mask operations."""
+        mask = np.ones(len(self), dtype=bool)
+        if statuses is not None:
+            mask &= np.isin(self.status_codes, [StatusType(s).value for s in statuses])
+        if budgets is not None:
+            mask &= np.isin(self.budgets, np.asarray(list(budgets), dtype=np.float64))
+
+        rows = np.flatnonzero(mask)
+        return dict(zip(self._get_keys(rows), self._get_values(rows)))
+
+    def get_all_configs(self) -> List[Configuration]:
+        """Returns all configurations, which are created if they were not accessed before."""
+        return [self.ids_config[config_id] for config_id in self.config_vector_ids.tolist()]
+
+    def _chunks(self) -> Iterator[np.ndarray]:
+        for start in range(0, len(self), _CHUNK_SIZE):
+            yield np.arange(start, min(start + _CHUNK_SIZE, len(self)))
+
+    def _get_rows(self) -> Dict[RunKey, int]:
+        if self._rows is None:
+            self._rows = {k: row for row, k in enumerate(self)}
+        return self._rows
+
+    def _get_keys(self, rows: np.ndarray) -> List[RunKey]:
+        columns = self._columns
+        strings = self._strings
+        return [
+            RunKey(
+                config_id,
+                None if instance == _NO_STRING else strings[instance],
+                None if seed == _NO_SEED else seed,
+                budget,
+            )
+            for config_id, instance, seed, budget in zip(
+                columns["config_id"][rows].tolist(),
+                columns["instance"][rows].tolist(),
+                columns["seed"][rows].tolist(),
+                columns["budget"][rows].tolist(),
+            )
+        ]
+
+    def _get_values(self, rows: np.ndarray) -> List[RunValue]:
+        columns = self._columns
+        if self.num_obj == 1:
+            costs = columns["cost"][rows, 0].tolist()
+        else:
+            costs = columns["cost"][rows].tolist()
+
+        additional_info = memoryview(columns["additional_info"])  # type: ignore[arg-type] # noqa F821
+        offsets = columns["additional_info_offsets"]
+        return [
+            RunValue(
+                cost,
+                time,
+                _STATUS_BY_CODE[status],
+                starttime,
+                endtime,
+                _decode_additional_info(additional_info[start:end]),
+            )
+            for cost, time, status, starttime, endtime, start, end in zip(
+                costs,
+                columns["time"][rows].tolist(),
+                columns["status"][rows].tolist(),
+                columns["starttime"][rows].tolist(),
+                columns["endtime"][rows].tolist(),
+                offsets[rows].tolist(),
+                offsets[rows + 1].tolist(),
+            )
+        ]
+
+
+def _decode_additional_info(encoded: memoryview) -> Any:
+    # Most runs have no additional info
+    if encoded == b"null":
+        return None
+
+    return decode_enums(json.loads(bytes(encoded)))
+
+
+class _SnapshotItems(ItemsView):
+    """Items of a snapshot, which are created in chunks instead of looking up each key."""
+
+    _mapping: RunHistorySnapshot
+
+    def __iter__(self) -> Iterator[Tuple[RunKey, RunValue]]:
+        snapshot = self._mapping
+        for rows in snapshot._chunks():
+            yield from zip(snapshot._get_keys(rows), snapshot._get_values(rows))
+
+
+class _LazyConfigurations(Mapping[int, Configuration]):
+    """Maps the config ids of a snapshot to their configurations, which are created on first access."""
+
+    def __init__(self, snapshot: RunHistorySnapshot) -> None:
+        self._snapshot = snapshot
+        self._rows = {config_id: row for row, config_id in enumerate(snapshot.config_vector_ids.tolist())}
+        self._configs = {}  # type: Dict[int, Configuration]
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._rows)
+
+    def __contains__(self, config_id: object) -> bool:
+        return config_id in self._rows
+
+    def __getitem__(self, config_id: int) -> Configuration:
+        config = self._configs.get(config_id)
+        if config is None:
+            snapshot = self._snapshot
+            row = self._rows[config_id]
+            origin = snapshot._columns["config_origins"][row]
+            config = self._configs[config_id] = Configuration(
+                snapshot.cs,
+                vector=np.array(snapshot.config_vectors[row]),
+                origin=None if origin == _NO_STRING else snapshot._strings[origin],
+            )
+
+        return config
@@ -0,0 +1,308 @@
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+import json
+import sqlite3
+import uuid
+from array import array
+from contextlib import contextmanager
+
+from smac.configspace import Configuration, ConfigurationSpace
+from smac.runhistory.runhistory import (
+    JSON_VALIDATION_STRICT,
+    DataOrigin,
+    EnumEncoder,
+    RunHistory,
+    RunKey,
+    RunValue,
+)
+from smac.tae import StatusType
+from smac.utils.io.serialization import decode_enums
+
+__copyright__ = "Copyright 2022, AutoML.org Freiburg-Hannover"
+__license__ = "3-clause BSD"
+
+
+# Runs are never updated in place, but deleted and inserted again. AUTOINCREMENT guarantees that the new row has a
+# larger rowid than all rows before, hence other processes find the updated run when reading incrementally.
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS configs (
+    id INTEGER PRIMARY KEY,
+    config TEXT NOT NULL UNIQUE,
+    origin TEXT
+);
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    worker TEXT NOT NULL,
+    config_id INTEGER NOT NULL REFERENCES configs(id),
+    instance_id TEXT,
+    seed INTEGER,
+    budget REAL NOT NULL,
+    cost TEXT NOT NULL,
+    time REAL,
+    status INTEGER NOT NULL,
+    starttime REAL,
+    endtime REAL,
+    additional_info TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_config_id ON runs(config_id);
+CREATE INDEX IF NOT EXISTS runs_budget ON runs(budget);
+CREATE INDEX IF NOT EXISTS runs_status ON runs(status);
+"""
+
+_INSERT_RUN = (
+    "INSERT INTO runs (worker, config_id, instance_id, seed, budget, cost, time, status, starttime, endtime, "
+    "additional_info) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+_DELETE_RUN = "DELETE FROM runs WHERE worker = ? AND config_id = ? AND instance_id IS ? AND seed IS ? AND budget = ?"
+_SELECT_RUNS = (
+    "SELECT id, worker, config_id, instance_id, seed, budget, cost, time, status, starttime, endtime, "
+    "additional_info FROM runs WHERE id > ? ORDER BY id"
+)
+
+
+class SQLiteRunHistory(RunHistory):
+    """Runhistory which additionally stores its runs in a SQLite database, which can be shared by several
+    SMAC processes.
+
+    Each run is committed to the database when it is added, hence a crash loses at most the run which is
+    added in that moment. The database is used in write-ahead logging (WAL) mode, in which processes can
+    read while another one writes. Each process writes its runs as a separate worker and reads the runs of
+    the other workers with `read`, which only fetches the runs added or updated since its last call. Reading
+    also restores the runs written by a previous process with the same worker name, e.g. after a crash.
+
+    The runs are kept in memory as well, i.e. the runhistory behaves like a `RunHistory` and can be passed to
+    the facades, e.g. ``SMAC4AC(scenario, runhistory=SQLiteRunHistory, runhistory_kwargs={"database": fn})``.
+    The database contains the tables ``configs`` (``id``, ``config`` as json and ``origin``) and ``runs`` (one
+    row per run and worker) with indexes on config id, budget and status for queries of other tools.
+
+    Note
+    ----
+    Only internal runs are written to the database, like `save_json` does by default. Instance ids are stored
+    as strings, like in the json file.
+
+    Parameters
+    ----------
+    database : str
+        File name of the SQLite database, which is created if it does not exist.
+    worker : Optional[str]
+        Name under which the runs are written. Defaults to a random name, i.e. each runhistory is a new
+        worker.
+    timeout : float, defaults to 60
+        Seconds to wait for other processes which lock the database.
+    overwrite_existing_runs, json_validation, compact, lazy_configs
+        See `RunHistory`.
+    """
+
+    def __init__(
+        self,
+        database: str,
+        worker: Optional[str] = None,
+        timeout: float = 60.0,
+        overwrite_existing_runs: bool = False,
+        json_validation: str = JSON_VALIDATION_STRICT,
+        compact: bool = False,
+        lazy_configs: bool = False,
+    ) -> None:
+        super().__init__(
+            overwrite_existing_runs=overwrite_existing_runs,
+            json_validation=json_validation,
+            compact=compact,
+            lazy_configs=lazy_configs,
+        )
+        self.database = database
+        self.worker = worker if worker is not None else uuid.uuid4().hex
+        self.timeout = timeout
+
+        # Maps the config ids of this runhistory to the ones of the database, and the ones of the database to
+        # the configurations read from it
+        self._db_config_ids = {}  # type: Dict[int, int]
+        self._db_configs = {}  # type: Dict[int, Configuration]
+        # Rows up to this id were read by `read`
+        self._last_read_id = 0
+        # Rows of this worker after this id were written by this runhistory and are not read again
+        self._restore_until_id = 0
+        # While reading, runs which are stored are not written to the database
+        self._reading = False
+
+        self._connect()
+
+    def _connect(self) -> None:
+        # Transactions are started explicitly, see `_transaction`
+        self._connection = sqlite3.connect(self.database, timeout=self.timeout, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        # In WAL mode, this is safe against crashes of the process, but not against a power loss
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(_SCHEMA)
+        last_id = self._connection.execute("SELECT max(id) FROM runs").fetchone()[0]
+        self._restore_until_id = max(self._restore_until_id, last_id or 0)
+
+    def close(self) -> None:
+        """Closes the connection to the database. Runs which are added afterwards can not be written."""
+        self._connection.close()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = dict(self.__dict__)
+        del state["_connection"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        super().__setstate__(state)
+        self._connect()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[None]:
+        """Runs the statements of the block in one write transaction, unless a transaction is open already."""
+        if self._connection.in_transaction:
+            yield
+            return
+
+        # Take the write lock right away instead of failing to upgrade a read lock if another process writes
+        self._connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._connection.execute("ROLLBACK")
+            raise
+        self._connection.execute("COMMIT")
+
+    def add(self, *args: Any, **kwargs: Any) -> None:
+        """Adds a run and commits it to the database, see `RunHistory.add`."""
+        with self._transaction():
+            super().add(*args, **kwargs)
+
+    def _add_runs(self, *args: Any, **kwargs: Any) -> None:
+        """Adds many runs and commits them to the database in one transaction, see `RunHistory._add_runs`."""
+        with self._transaction():
+            super()._add_runs(*args, **kwargs)
+
+    def _store(self, k: RunKey, v: RunValue, origin: DataOrigin) -> Tuple[RunKey, Optional[RunValue]]:
+        """Writes an internal run to the database in addition to the data."""
+        if self._reading or origin != DataOrigin.INTERNAL:
+            return super()._store(k, v, origin)
+
+        # Encoded first such that a run which can not be encoded is not stored at all
+        row = self._encode_row(k, v)
+        k, previous = super()._store(k, v, origin)
+        if previous is not None:
+            self._connection.execute(_DELETE_RUN, row[:5])
+        self._connection.execute(_INSERT_RUN, row)
+
+        return k, previous
+
+    def _accepts(
+        self,
+        k: RunKey,
+        status: StatusType,
+        cost: Union[float, List[float], array],
+        force_update: bool,
+    ) -> bool:
+        """While reading, a finished run also replaces the run which was running when it was read before."""
+        if self._reading and status != StatusType.RUNNING:
+            previous = self.data.get(k)
+            if previous is not None and previous.status == StatusType.RUNNING:
+                return True
+
+        return super()._accepts(k, status, cost, force_update)
+
+    def _encode_row(self, k: RunKey, v: RunValue) -> Tuple[Any, ...]:
+        """Returns the row of a run in the runs table."""
+        db_config_id = self._db_config_ids.get(k.config_id)
+        if db_config_id is None:
+            db_config_id = self._db_config_ids[k.config_id] = self._get_db_config_id(self.ids_config[k.config_id])
+
+        # Runs without a seed are stored with a NULL seed
+        return (
+            self.worker,
+            db_config_id,
+            str(k.instance_id) if k.instance_id is not None else None,
+            int(k.seed) if k.seed is not None else None,
+            float(k.budget) if k.budget is not None else 0,
+            json.dumps(v.cost.tolist() if isinstance(v.cost, array) else v.cost),
+            v.time,
+            v.status.value,
+            v.starttime,
+            v.endtime,
+            json.dumps(v.additional_info, cls=EnumEncoder),
+        )
+
+    def _get_db_config_id(self, config: Configuration) -> int:
+        """Returns the id of a configuration in the database, where it is inserted if it is unknown."""
+        encoded = json.dumps(config.get_dictionary(), sort_keys=True)
+        self._connection.execute(
+            "INSERT OR IGNORE INTO configs (config, origin) VALUES (?, ?)", (encoded, config.origin)
+        )
+        return self._connection.execute("SELECT id FROM configs WHERE config = ?", (encoded,)).fetchone()[0]
+
+    def read(self, cs: ConfigurationSpace, origin: DataOrigin = DataOrigin.EXTERNAL_SAME_INSTANCES) -> int:
+        """Adds the runs which other workers wrote to the database since the last call.
+
+        Runs which a previous runhistory with the same worker name wrote (before this runhistory was
+        connected) are added as internal runs. Like for `update`, existing runs are only overwritten by
+        uncapped runs, and additionally by finished runs if they were running.
+
+        Parameters
+        ----------
+        cs : ConfigurationSpace
+            Configuration space of the configurations in the database.
+        origin : DataOrigin
+            Origin of the runs of other workers.
+
+        Returns
+        -------
+        n_runs : int
+            Number of runs which were read.
+        """
+        # One read transaction, such that each run refers to a configuration which is read as well
+        self._connection.execute("BEGIN")
+        try:
+            rows = self._connection.execute(_SELECT_RUNS, (self._last_read_id,)).fetchall()
+            unknown_config_ids = tuple(set([row[2] for row in rows]) - set(self._db_configs))
+            configs = self._connection.execute(
+                "SELECT id, config, origin FROM configs WHERE id IN (%s)" % ", ".join("?" * len(unknown_config_ids)),
+                unknown_config_ids,
+            ).fetchall()
+        finally:
+            self._connection.execute("COMMIT")
+
+        for db_config_id, encoded, config_origin in configs:
+            self._db_configs[db_config_id] = Configuration(cs, values=json.loads(encoded), origin=config_origin)
+
+        internal = []  # type: List[Tuple[RunKey, RunValue]]
+        external = []  # type: List[Tuple[RunKey, RunValue]]
+        for row in rows:
+            if row[1] != self.worker:
+                external.append(self._decode_row(row))
+            elif row[0] <= self._restore_until_id:
+                internal.append(self._decode_row(row))
+        if rows:
+            self._last_read_id = rows[-1][0]
+
+        self._reading = True
+        try:
+            # The runs are already in the database, hence no transaction is needed
+            RunHistory._add_runs(self, internal, self._db_configs, DataOrigin.INTERNAL)
+            RunHistory._add_runs(self, external, self._db_configs, origin)
+        finally:
+            self._reading = False
+
+        # Restored runs of this worker are not written again if their configuration is run again
+        for db_config_id in set([k.config_id for k, _ in internal]):
+            self._db_config_ids.setdefault(self.config_ids[self._db_configs[db_config_id]], db_config_id)
+
+        return len(internal) + len(external)
+
+    @staticmethod
+    def _decode_row(row: Tuple[Any, ...]) -> Tuple[RunKey, RunValue]:
+        """Returns the run of a row of the runs table. The key refers to the config id of the database."""
+        _, _, config_id, instance_id, seed, budget, cost, time, status, starttime, endtime, additional_info = row
+        return (
+            RunKey(config_id, instance_id, seed, budget),
+            RunValue(
+                json.loads(cost),
+                time,
+                StatusType(status),
+                starttime,
+                endtime,
+                decode_enums(json.loads(additional_info)),
+            ),
+        )
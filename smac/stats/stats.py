@@ -1,6 +1,5 @@
 from typing import Optional
 
-import json
 import logging
 import os
 import time
@@ -8,6 +7,7 @@ import time
 import numpy as np
 
 from smac.scenario.scenario import Scenario
+from smac.utils.io.serialization import get_serializer
 
 __author__ = "Marius Lindauer"
 __copyright__ = "Copyright 2016, ML4AAD"
@@ -71,8 +71,7 @@ class Stats(object):
 
         path = os.path.join(self.__scenario.output_dir_for_this_run, "stats.json")
         self._logger.debug("Saving stats to %s", path)
-        with open(path, "w") as fh:
-            json.dump(data, fh)
+        get_serializer(fn=path).dump(data, path)
 
     def load(self, fn: Optional[str] = None) -> None:
         """Load all attributes from dictionary in file into stats-object.
@@ -86,8 +85,7 @@ class Stats(object):
         if not fn:
             assert self.__scenario.output_dir_for_this_run is not None  # please mypy
             fn = os.path.join(self.__scenario.output_dir_for_this_run, "stats.json")
-        with open(fn, "r") as fh:
-            data = json.load(fh)
+        data = get_serializer(fn=fn).load(fn)
 
         # Set attributes
         for key in data:
@@ -37,12 +37,20 @@ class StatusType(Enum):
         """
         if "__enum__" in obj:
             # object is marked as enum
+            status = _STATUS_BY_NAME.get(obj["__enum__"])
+            if status is not None:
+                return status
+
             name, member = obj["__enum__"].split(".")
             if name == "StatusType":
                 return getattr(globals()[name], member)
         return obj
 
 
+# Avoids parsing the names of status types when reading json files
+_STATUS_BY_NAME = {str(status): status for status in StatusType}
+
+
 class TAEAbortException(Exception):
     """Exception indicating that the target algorithm suggests an ABORT of SMAC, usually because it
     assumes that all further runs will surely fail.
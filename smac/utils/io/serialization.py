@@ -0,0 +1,241 @@
+from typing import IO, Any, Callable, Dict, Iterator, Optional
+
+import json
+from enum import Enum
+
+import numpy as np
+
+from smac.tae import StatusType
+
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None  # type: ignore
+
+__copyright__ = "Copyright 2022, AutoML.org Freiburg-Hannover"
+__license__ = "3-clause BSD"
+
+
+# Objects which might contain status types
+_CONTAINERS = (StatusType, dict, list, tuple)
+
+
+def encode_enums(obj: Any) -> Any:
+    """Replaces all status types in (nested) dictionaries, lists and tuples by ``{"__enum__": str(status)}``,
+    which is how the `EnumEncoder` of the runhistory encodes them.
+    """
+    if isinstance(obj, StatusType):
+        return {"__enum__": str(obj)}
+    elif isinstance(obj, dict):
+        return {key: encode_enums(value) if isinstance(value, _CONTAINERS) else value for key, value in obj.items()}
+    elif isinstance(obj, (list, tuple)):
+        # Lists are often long lists of numbers, which are not passed to the function one by one
+        return [encode_enums(value) if isinstance(value, _CONTAINERS) else value for value in obj]
+
+    return obj
+
+
+def decode_enums(obj: Any) -> Any:
+    """Inverse of `encode_enums`, applies `StatusType.enum_hook` to all (nested) dictionaries."""
+    if isinstance(obj, dict):
+        return StatusType.enum_hook(
+            {key: decode_enums(value) if isinstance(value, (dict, list)) else value for key, value in obj.items()}
+        )
+    elif isinstance(obj, list):
+        return [decode_enums(value) if isinstance(value, (dict, list)) else value for value in obj]
+
+    return obj
+
+
+def _default(obj: Any) -> Any:
+    """Encodes objects which are not supported by the fast backends."""
+    if isinstance(obj, Enum):
+        return {"__enum__": str(obj)}
+    elif isinstance(obj, np.generic):
+        return obj.item()
+    elif isinstance(obj, np.ndarray):
+        return obj.tolist()
+
+    raise TypeError("Object of type %s is not serializable" % type(obj).__name__)
+
+
+class Serializer(object):
+    """Converts (nested) dictionaries, lists, strings, numbers and None to bytes and back.
+
+    Each backend also supports streams of objects, which are written with `dumps_entry` (or `to_entry`) one
+    after another to the same file and read with `iter_loads`. The runhistory uses them for its journal.
+
+    Attributes
+    ----------
+    name : str
+        Name of the backend, see `get_serializer`.
+    native_enums : bool
+        If True, enums are written as their values. Otherwise, they are written as ``{"__enum__": str(enum)}``
+        like the `EnumEncoder` of the runhistory does (see `encode_enums`).
+    """
+
+    name = ""
+    native_enums = False
+
+    def dumps(self, obj: Any) -> bytes:
+        """Returns the serialized object."""
+        raise NotImplementedError()
+
+    def loads(self, data: bytes) -> Any:
+        """Returns the deserialized object."""
+        raise NotImplementedError()
+
+    def dumps_entry(self, obj: Any) -> bytes:
+        """Returns the serialized object as an entry of a stream."""
+        return self.to_entry(self.dumps(obj))
+
+    def to_entry(self, content: bytes) -> bytes:
+        """Turns a serialized object into an entry of a stream."""
+        return content
+
+    def iter_loads(self, fp: IO[bytes]) -> Iterator[Any]:
+        """Yields the objects of a stream. Raises a ValueError if an entry can not be read, e.g. because
+        the process writing it was killed."""
+        raise NotImplementedError()
+
+    def dump(self, obj: Any, fn: str) -> None:
+        """Writes the serialized object to file `fn`."""
+        with open(fn, "wb") as fp:
+            fp.write(self.dumps(obj))
+
+    def load(self, fn: str) -> Any:
+        """Reads a serialized object from file `fn`."""
+        with open(fn, "rb") as fp:
+            return self.loads(fp.read())
+
+
+class JSONSerializer(Serializer):
+    """Writes json with the standard library. Reads with ``orjson`` if it is installed, which falls back to
+    the standard library for files that contain ``NaN`` or ``Infinity`` (which ``orjson`` rejects).
+
+    Streams are written as one json document per line.
+    """
+
+    name = "json"
+
+    def dumps(self, obj: Any) -> bytes:
+        """Returns the serialized object."""
+        return json.dumps(obj, default=_default).encode()
+
+    def loads(self, data: bytes) -> Any:
+        """Returns the deserialized object."""
+        if orjson is not None:
+            try:
+                return orjson.loads(data)
+            except orjson.JSONDecodeError:
+                pass
+
+        return json.loads(data)
+
+    def to_entry(self, content: bytes) -> bytes:
+        """Turns a serialized object into one line."""
+        return content + b"\n"
+
+    def iter_loads(self, fp: IO[bytes]) -> Iterator[Any]:
+        """Yields the objects of a stream with one json document per line."""
+        for line in fp:
+            yield self.loads(line)
+
+
+class OrjsonSerializer(JSONSerializer):
+    """Reads and writes json with ``orjson``, which is much faster than the standard library.
+
+    Warning
+    -------
+    ``orjson`` writes ``NaN`` and infinite floats as ``null``, and enums as their values (see `native_enums`).
+    """
+
+    name = "orjson"
+    native_enums = True
+
+    def __init__(self) -> None:
+        if orjson is None:
+            raise ImportError("The orjson serializer requires the package orjson (`pip install smac[serialization]`).")
+
+    def dumps(self, obj: Any) -> bytes:
+        """Returns the serialized object."""
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+
+class MsgpackSerializer(Serializer):
+    """Reads and writes the binary format `MessagePack <https://msgpack.org>`_.
+
+    The documents are the same as for json, except that dictionary keys keep their type (e.g. integer ids of
+    configurations), tuples become lists and floats can also be ``NaN`` or infinite. Streams are
+    concatenated documents.
+    """
+
+    name = "msgpack"
+
+    def __init__(self) -> None:
+        if msgpack is None:
+            raise ImportError(
+                "The msgpack serializer requires the package msgpack (`pip install smac[serialization]`)."
+            )
+
+    def dumps(self, obj: Any) -> bytes:
+        """Returns the serialized object."""
+        return msgpack.packb(obj, default=_default, use_bin_type=True)
+
+    def loads(self, data: bytes) -> Any:
+        """Returns the deserialized object."""
+        return msgpack.unpackb(data, raw=False, strict_map_key=False)
+
+    def iter_loads(self, fp: IO[bytes]) -> Iterator[Any]:
+        """Yields the concatenated objects of a stream."""
+        data = fp.read()
+        unpacker = msgpack.Unpacker(raw=False, strict_map_key=False)
+        unpacker.feed(data)
+
+        position = 0
+        try:
+            for obj in unpacker:
+                position = unpacker.tell()
+                yield obj
+        except msgpack.UnpackException as e:
+            raise ValueError(str(e)) from e
+
+        # The unpacker silently stops at an incomplete last entry
+        if position != len(data):
+            raise ValueError("Incomplete entry at byte %d" % position)
+
+
+SERIALIZERS = {
+    JSONSerializer.name: JSONSerializer,
+    OrjsonSerializer.name: OrjsonSerializer,
+    MsgpackSerializer.name: MsgpackSerializer,
+}  # type: Dict[str, Callable[[], Serializer]]
+
+
+def get_serializer(name: Optional[str] = None, fn: Optional[str] = None) -> Serializer:
+    """Returns a serializer.
+
+    Parameters
+    ----------
+    name : Optional[str]
+        One of ``"json"``, ``"orjson"`` and ``"msgpack"``. If None, the backend is chosen by the file extension
+        of `fn`: msgpack for ``.msgpack`` files and json otherwise.
+    fn : Optional[str]
+        File name to choose the backend for.
+
+    Returns
+    -------
+    serializer : Serializer
+    """
+    if name is None:
+        name = MsgpackSerializer.name if fn is not None and fn.endswith(".msgpack") else JSONSerializer.name
+
+    if name not in SERIALIZERS:
+        raise ValueError("Unknown serializer %s, choose one of %s." % (name, sorted(SERIALIZERS)))
+
+    return SERIALIZERS[name]()
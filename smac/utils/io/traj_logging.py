@@ -1,7 +1,6 @@
 from typing import Dict, List, Optional, Union
 
 import collections
-import json
 import logging
 import os
 
@@ -15,6 +14,7 @@ from ConfigSpace.hyperparameters import (
 )
 
 from smac.stats.stats import Stats
+from smac.utils.io.serialization import get_serializer
 from smac.utils.logging import format_array
 
 __author__ = "Marius Lindauer"
@@ -212,9 +212,8 @@ class TrajLogger(object):
             "origin": incumbent.origin,
         }
 
-        with open(self.aclib_traj_fn, "a") as fp:
-            json.dump(traj_entry, fp)
-            fp.write("\n")
+        with open(self.aclib_traj_fn, "ab") as fp:
+            fp.write(get_serializer(fn=self.aclib_traj_fn).dumps_entry(traj_entry))
 
     def _add_in_alljson_format(
         self,
@@ -252,9 +251,8 @@ class TrajLogger(object):
             "origin": incumbent.origin,
         }
 
-        with open(self.alljson_traj_fn, "a") as fp:
-            json.dump(traj_entry, fp)
-            fp.write("\n")
+        with open(self.alljson_traj_fn, "ab") as fp:
+            fp.write(get_serializer(fn=self.alljson_traj_fn).dumps_entry(traj_entry))
 
     @staticmethod
     def read_traj_alljson_format(
@@ -284,9 +282,8 @@ class TrajLogger(object):
             }
         """
         trajectory = []
-        with open(fn) as fp:
-            for line in fp:
-                entry = json.loads(line)
+        with open(fn, "rb") as fp:
+            for entry in get_serializer(fn=fn).iter_loads(fp):
                 entry["incumbent"] = Configuration(cs, entry["incumbent"])
                 trajectory.append(entry)
 
@@ -319,9 +316,8 @@ class TrajLogger(object):
             }
         """
         trajectory = []
-        with open(fn) as fp:
-            for line in fp:
-                entry = json.loads(line)
+        with open(fn, "rb") as fp:
+            for entry in get_serializer(fn=fn).iter_loads(fp):
                 entry["incumbent"] = TrajLogger._convert_dict_to_config(entry["incumbent"], cs=cs)
                 trajectory.append(entry)
 
@@ -1,7 +1,8 @@
-from typing import List, Tuple
+from typing import List, Sequence, Tuple, Union
 
 from smac.configspace import ConfigurationSpace
 from smac.runhistory.runhistory import DataOrigin, RunHistory
+from smac.runhistory.snapshot import SNAPSHOT_SUFFIX, RunHistorySnapshot
 from smac.scenario.scenario import Scenario
 
 __copyright__ = "Copyright 2021, AutoML.org Freiburg-Hannover"
@@ -28,7 +29,8 @@ def merge_foreign_data_from_file(
     in_scenario_fn_list: List[str]
         input scenario file names
     in_runhistory_fn_list: List[str]
-        list filenames of runhistory dumps
+        list filenames of runhistory dumps. Files ending with ``.snapshot`` are opened as
+        `RunHistorySnapshot`, i.e. their configurations are only created when they are added.
     cs: ConfigurationSpace
         parameter configuration space to read runhistory from file
 
@@ -43,11 +45,14 @@ def merge_foreign_data_from_file(
             " the corresponding scenarios are required. Use option --warmstart_scenario"
         )
     scens = [Scenario(scenario=scen_fn, cmd_options={"output_dir": ""}) for scen_fn in in_scenario_fn_list]
-    rhs = []
+    rhs = []  # type: List[Union[RunHistory, RunHistorySnapshot]]
     for rh_fn in in_runhistory_fn_list:
-        rh = RunHistory()
-        rh.load_json(rh_fn, cs)
-        rhs.append(rh)
+        if rh_fn.endswith(SNAPSHOT_SUFFIX):
+            rhs.append(RunHistorySnapshot(rh_fn, cs))
+        else:
+            rh = RunHistory()
+            rh.load_json(rh_fn, cs)
+            rhs.append(rh)
 
     return merge_foreign_data(scenario, runhistory, in_scenario_list=scens, in_runhistory_list=rhs)
 
@@ -56,7 +61,7 @@ def merge_foreign_data(
     scenario: Scenario,
     runhistory: RunHistory,
     in_scenario_list: List[Scenario],
-    in_runhistory_list: List[RunHistory],
+    in_runhistory_list: Sequence[Union[RunHistory, RunHistorySnapshot]],
 ) -> Tuple[Scenario, RunHistory]:
     """Extend <scenario> and <runhistory> with runhistory data from another.
 
@@ -70,8 +75,8 @@ def merge_foreign_data(
         original runhistory -- will be extended by further data points
     in_scenario_list: List[Scenario]
         input scenario
-    in_runhistory_list: List[RunHistory]
-        list of runhistories wrt <in_scenario>
+    in_runhistory_list: Sequence[Union[RunHistory, RunHistorySnapshot]]
+        list of runhistories (or snapshots) wrt <in_scenario>
 
     Returns
     -------
@@ -22,8 +22,6 @@ class TestRFWithInstances(unittest.TestCase):
 
     def test_apply_pca(self):
         cs = self._get_cs(5)
-        instance_features = np.array([np.random.rand(10) for _ in range(5)])
-        types, bounds = get_types(cs, instance_features)
 
         def get_X_y(num_samples, num_instance_features):
             X = smac.configspace.convert_configurations_to_array(cs.sample_configuration(num_samples))
@@ -33,37 +31,60 @@ class TestRFWithInstances(unittest.TestCase):
             y = np.random.rand(num_samples)
             return X, y
 
-        with unittest.mock.patch.object(BaseEPM, "_train"):
+        def get_epm(instance_features):
+            types, bounds = get_types(cs, instance_features)
+            return BaseEPM(
+                configspace=cs,
+                types=types,
+                bounds=bounds,
+                seed=1,
+                pca_components=7,
+                instance_features=instance_features,
+            )
+
+        with unittest.mock.patch.object(BaseEPM, "_train") as train_mock:
             with unittest.mock.patch.object(BaseEPM, "_predict") as predict_mock:
 
                 predict_mock.side_effect = lambda x, _: (x, x)
 
-                epm = BaseEPM(
-                    configspace=cs,
-                    types=types,
-                    bounds=bounds,
-                    seed=1,
-                    pca_components=7,
-                    instance_features=instance_features,
-                )
-
-                X, y = get_X_y(5, 10)
-                epm.train(X, y)
-                self.assertFalse(epm._apply_pca)
-                X_test, _ = get_X_y(5, None)
-                epm.predict_marginalized_over_instances(X_test)
+                # fewer instances than pca components
+                epm = get_epm(np.array([np.random.rand(10) for _ in range(5)]))
+                for num_samples in (5, 8):
+                    X, y = get_X_y(num_samples, 10)
+                    epm.train(X, y)
+                    self.assertFalse(epm._apply_pca)
+                    self.assertEqual(train_mock.call_args[0][0].shape, (num_samples, 15))
+                    X_test, _ = get_X_y(5, None)
+                    epm.predict_marginalized_over_instances(X_test)
 
-                # more data points than pca components
-                X, y = get_X_y(8, 10)
-                epm.train(X, y)
+                # more instances than pca components, the pca is applied independent of the number of data points
+                # and fitted once on the instance features
+                instance_features = np.array([np.random.rand(10) for _ in range(20)])
+                epm = get_epm(instance_features)
                 self.assertTrue(epm._apply_pca)
-                X_test, _ = get_X_y(5, None)
-                epm.predict_marginalized_over_instances(X_test)
+                for num_samples in (5, 8):
+                    X, y = get_X_y(num_samples, 10)
+                    epm.train(X, y)
+                    self.assertEqual(train_mock.call_args[0][0].shape, (num_samples, 12))
+                    self.assertEqual(len(epm.types), 12)
+                    reduced_features = epm.instance_feature_pca.get_reduced_features()
+                    self.assertEqual(reduced_features.shape, (20, 7))
+                    if num_samples == 5:
+                        first_reduced_features = reduced_features
+                    self.assertIs(reduced_features, first_reduced_features)
+
+                    X_test, _ = get_X_y(5, None)
+                    epm.predict_marginalized_over_instances(X_test)
+                    # the reduced features of the instances are used for marginalization
+                    np.testing.assert_array_almost_equal(predict_mock.call_args[0][0][:, 5:], reduced_features)
+
+                # the reduced features are the features of the instances transformed as data points
+                np.testing.assert_array_almost_equal(
+                    epm.instance_feature_pca.transform(instance_features), reduced_features
+                )
 
-                # and less again - this ensures that the types array inside the epm is reverted
-                # and the pca is disabled again
-                X, y = get_X_y(5, 10)
-                epm.train(X, y)
-                self.assertFalse(epm._apply_pca)
-                X_test, _ = get_X_y(5, None)
-                epm.predict_marginalized_over_instances(X_test)
+                # models can share the pca
+                other_epm = get_epm(instance_features)
+                other_epm.instance_feature_pca = epm.instance_feature_pca
+                other_epm.train(X, y)
+                self.assertIs(other_epm.pca, epm.pca)
@@ -0,0 +1,120 @@
+import unittest
+
+import numpy as np
+from ConfigSpace import CategoricalHyperparameter, UniformFloatHyperparameter
+
+import smac.configspace
+from smac.epm.random_forest.flat_forest import FlatForest
+from smac.epm.random_forest.rf_with_instances import RandomForestWithInstances
+from smac.epm.utils import get_types
+
+__copyright__ = "Copyright 2022, AutoML.org Freiburg-Hannover"
+__license__ = "3-clause BSD"
+
+
+class TestFlatForest(unittest.TestCase):
+    def setUp(self):
+        self.cs = smac.configspace.ConfigurationSpace()
+        self.cs.add_hyperparameter(CategoricalHyperparameter("a", ["a%d" % i for i in range(3)]))
+        self.cs.add_hyperparameter(CategoricalHyperparameter("b", ["b%d" % i for i in range(40)]))
+        for i in range(4):
+            self.cs.add_hyperparameter(UniformFloatHyperparameter("x%d" % i, 0, 1))
+        self.types, self.bounds = get_types(self.cs)
+
+    def _sample(self, n, rs):
+        X = rs.rand(n, 6)
+        X[:, 0] = rs.randint(3, size=n)
+        X[:, 1] = rs.randint(40, size=n)
+        return X
+
+    def _train(self, n=300, weights=False, **kwargs):
+        rs = np.random.RandomState(1)
+        X = self._sample(n, rs)
+        Y = (X[:, 2] + (X[:, 0] == 1) + (X[:, 1] % 3 == 0) + 0.1 * rs.rand(n)).reshape((-1, 1))
+        model = RandomForestWithInstances(self.cs, self.types, self.bounds, seed=1, **kwargs)
+        model.train(X, Y, weights=rs.randint(1, 4, size=n).astype(float) if weights else None)
+        return model
+
+    def _get_test_points(self, model):
+        rs = np.random.RandomState(2)
+        X = self._sample(200, rs)
+        # Data points on the thresholds and with missing values go the same way as in pyrfr
+        forest = FlatForest(model.rf)
+        numerical = np.flatnonzero(~np.isnan(forest.thresholds))[:50]
+        X[np.arange(len(numerical)), forest.features[numerical]] = forest.thresholds[numerical]
+        X[-10:, 2] = np.nan
+        return X
+
+    def test_predict_mean_var(self):
+        for kwargs in (
+            {},
+            {"do_bootstrapping": False},
+            {"weights": True},
+            {"num_trees": 1},
+            {"ratio_features": 1.0, "min_samples_leaf": 1},
+        ):
+            model = self._train(**kwargs)
+            X = self._get_test_points(model)
+            means, vars_ = FlatForest(model.rf).predict_mean_var(X)
+            expected = np.array([model.rf.predict_mean_var(x) for x in X])
+            np.testing.assert_array_equal(means, expected[:, 0], err_msg=str(kwargs))
+            np.testing.assert_array_equal(vars_, expected[:, 1], err_msg=str(kwargs))
+
+    def test_all_leaf_values(self):
+        model = self._train()
+        X = self._get_test_points(model)
+        values = FlatForest(model.rf).all_leaf_values(X)
+
+        max_leaf_size = 0
+        for x, values_per_tree in zip(X, values):
+            for expected, value in zip(model.rf.all_leaf_values(x), values_per_tree):
+                np.testing.assert_array_equal(value[: len(expected)], expected)
+                self.assertTrue(np.all(np.isnan(value[len(expected) :])))
+                max_leaf_size = max(max_leaf_size, len(expected))
+        self.assertEqual(values.shape, (len(X), 10, max_leaf_size))
+
+    def test_find_leaf_indices(self):
+        model = self._train()
+        X = self._get_test_points(model)
+        forest = FlatForest(model.rf)
+        leaf_indices = forest.find_leaf_indices(X)
+
+        self.assertEqual(leaf_indices.shape, (len(X), 10))
+        for tree, indices in zip(model.rf.get_all_trees(), leaf_indices.T):
+            np.testing.assert_array_equal(indices, [tree.find_leaf_index(x) for x in X])
+        self.assertTrue(np.all(forest.features[leaf_indices + forest.roots] == -1))
+
+    def test_marginalize_over_instances(self):
+        rs = np.random.RandomState(1)
+        F = rs.rand(30, 2)
+        F[:3, 0] = np.nan
+        X = self._sample(600, rs)
+        instances = rs.randint(len(F), size=600)
+        Y = X[:, 2] + (X[:, 0] == 1) + 2 * F[instances, 1] + (F[instances, 0] > 0.5) + 0.1 * rs.rand(600)
+        model = RandomForestWithInstances(self.cs, self.types + [0, 0], self.bounds, seed=1, instance_features=F)
+        model.train(np.hstack((X, np.nan_to_num(F[instances]))), np.log(Y).reshape((-1, 1)))
+        forest = FlatForest(model.rf)
+        self.assertTrue(np.any(forest.features >= 6))
+
+        X_test = self._sample(20, rs)
+        for log_y in (False, True):
+            expected = np.zeros((len(X_test), 10))
+            for i, x in enumerate(X_test):
+                values = [[] for _ in range(10)]
+                for f in F:
+                    for tree, leaf_values in enumerate(model.rf.all_leaf_values(np.concatenate((x, f)))):
+                        values[tree] += leaf_values
+                for tree in range(10):
+                    expected[i, tree] = np.log(np.exp(values[tree]).mean()) if log_y else np.mean(values[tree])
+            np.testing.assert_allclose(forest.marginalize_over_instances(X_test, F, log_y=log_y), expected, rtol=1e-12)
+
+    def test_empty(self):
+        forest = FlatForest(self._train().rf)
+        means, vars_ = forest.predict_mean_var(np.zeros((0, 6)))
+        self.assertEqual(means.shape, (0,))
+        self.assertEqual(vars_.shape, (0,))
+        self.assertEqual(forest.all_leaf_values(np.zeros((0, 6))).shape, (0, 10, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
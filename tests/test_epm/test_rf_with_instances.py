@@ -58,6 +58,36 @@ class TestRFWithInstances(unittest.TestCase):
         self.assertEqual(m_hat.shape, (10, 1))
         self.assertEqual(v_hat.shape, (10, 1))
 
+    def test_predict_with_flat_forest(self):
+        rs = np.random.RandomState(1)
+        X = rs.rand(100, 10)
+        Y = rs.rand(100, 1)
+        X_test = rs.rand(60, 10)
+        for log_y in (False, True):
+            model = RandomForestWithInstances(
+                configspace=self._get_cs(10),
+                types=np.zeros((10,), dtype=np.uint),
+                bounds=list(map(lambda x: (0, 10), range(10))),
+                seed=1,
+                log_y=log_y,
+            )
+            model.train(X, Y)
+            expected = model.predict(X_test)
+            self.assertIsNone(model.flat_forest)
+
+            # The forest is flattened once as many data points are predicted as it is trained on
+            np.testing.assert_array_equal(model.predict(X_test)[0], expected[0])
+            self.assertIsNotNone(model.flat_forest)
+            mean, var = model.predict(X_test)
+            np.testing.assert_array_equal(mean, expected[0])
+            np.testing.assert_array_equal(var, expected[1])
+
+            model.train(X, Y)
+            self.assertIsNone(model.flat_forest)
+            flat_forest = model.get_flat_forest()
+            self.assertIs(model.flat_forest, flat_forest)
+            self.assertIs(model.get_flat_forest(), flat_forest)
+
     def test_train_with_pca(self):
         rs = np.random.RandomState(1)
         X = rs.rand(20, 20)
@@ -77,6 +107,13 @@ class TestRFWithInstances(unittest.TestCase):
         self.assertEqual(model.n_feats, 10)
         self.assertIsNotNone(model.pca)
         self.assertIsNotNone(model.scaler)
+        self.assertEqual(len(model.types), 12)
+
+        # The instances are marginalized with their reduced features
+        means, variances = model.predict_marginalized_over_instances(X[:, :10])
+        self.assertEqual(means.shape, (20, 1))
+        self.assertTrue(np.all(np.isfinite(means)))
+        self.assertTrue(np.all(np.isfinite(variances)))
 
     def test_predict_marginalized_over_instances_wrong_X_dimensions(self):
         rs = np.random.RandomState(1)
@@ -205,6 +242,119 @@ class TestRFWithInstances(unittest.TestCase):
         for y_i, y_hat_i in zip(y.reshape((1, -1)).flatten(), y_hat.reshape((1, -1)).flatten()):
             self.assertAlmostEqual(y_i, y_hat_i, delta=0.1)
 
+    def test_train_with_weights(self):
+        rs = np.random.RandomState(1)
+        X = rs.rand(30, 2)
+        Y = rs.rand(30, 1)
+        X_test = rs.rand(50, 2)
+
+        def predict(weights):
+            model = RandomForestWithInstances(
+                configspace=self._get_cs(2),
+                types=np.zeros((2,), dtype=np.uint),
+                bounds=[(0, 1), (0, 1)],
+                seed=1,
+                do_bootstrapping=False,
+                ratio_features=1.0,
+            )
+            model.train(X, Y, weights=weights)
+            return model.predict(X_test)[0]
+
+        np.testing.assert_array_equal(predict(np.ones(30)), predict(None))
+        # A heavy data point pulls the predictions towards its response
+        weights = np.ones(30)
+        weights[0] = 100
+        self.assertLess(np.abs(predict(weights) - Y[0]).mean(), np.abs(predict(None) - Y[0]).mean())
+        self.assertRaisesRegex(ValueError, "Expected 30 weights", predict, np.ones(10))
+
+    def test_reuse_data_container(self):
+        rs = np.random.RandomState(1)
+        X = rs.rand(30, 2)
+        Y = rs.rand(30, 1)
+        X_test = rs.rand(50, 2)
+
+        def get_model():
+            model = RandomForestWithInstances(
+                configspace=self._get_cs(2),
+                types=np.zeros((2,), dtype=np.uint),
+                bounds=[(0, 1), (0, 1)],
+                seed=1,
+            )
+            model.train(X[:20], Y[:20])
+            return model
+
+        for weights in (None, rs.randint(1, 4, size=30).astype(float)):
+            # Only the new data points are added to the data container of the previous training
+            model = get_model()
+            model.train(X[:20], Y[:20], weights=None if weights is None else weights[:20])
+            data = model._data_container
+            model.train(X, Y, weights=weights)
+            self.assertIs(model._data_container, data)
+            self.assertEqual(data.num_data_points(), 30)
+
+            # The forest is the same as when filling a new data container
+            expected_model = get_model()
+            expected_model.train(X[:20], Y[:20], weights=None if weights is None else weights[:20])
+            expected_model._data_container = None
+            expected_model.train(X, Y, weights=weights)
+            np.testing.assert_array_equal(model.predict(X_test), expected_model.predict(X_test))
+
+        # Changed data points require a new data container
+        for X_new, Y_new in ((X[::-1], Y), (X, Y + 1), (X[:10], Y[:10])):
+            model = get_model()
+            data = model._data_container
+            model.train(X_new, Y_new)
+            self.assertIsNot(model._data_container, data)
+            self.assertEqual(model._data_container.num_data_points(), len(X_new))
+
+    def test_full_fit_interval(self):
+        rs = np.random.RandomState(1)
+        X = rs.rand(40, 2)
+        Y = rs.rand(40, 1)
+        X_test = rs.rand(50, 2)
+
+        def get_model(full_fit_interval):
+            return RandomForestWithInstances(
+                configspace=self._get_cs(2),
+                types=np.zeros((2,), dtype=np.uint),
+                bounds=[(0, 1), (0, 1)],
+                seed=1,
+                full_fit_interval=full_fit_interval,
+            )
+
+        model = get_model(2)
+        model.train(X[:20], Y[:20])
+        rf = model.rf
+        model.predict(X_test)
+
+        # The new data points are inserted into the leaves of the trees
+        model.train(X[:25], Y[:25])
+        self.assertIs(model.rf, rf)
+        self.assertIsNone(model.flat_forest)
+        self.assertEqual(model.X.shape[0], 25)
+        for x, y in zip(X[20:25], Y[20:25, 0]):
+            for leaf_values in rf.all_leaf_values(x):
+                self.assertIn(y, leaf_values)
+        np.testing.assert_array_equal(model.predict(X_test)[0][:, 0], [rf.predict_mean_var(x)[0] for x in X_test])
+
+        # The next training fits a new forest, which is the same as without updates in between
+        model.train(X[:30], Y[:30])
+        self.assertIsNot(model.rf, rf)
+        expected_model = get_model(1)
+        expected_model.train(X[:20], Y[:20])
+        expected_model.train(X[:30], Y[:30])
+        np.testing.assert_array_equal(model.predict(X_test), expected_model.predict(X_test))
+
+        # Changed responses also require a new forest
+        rf = model.rf
+        model.train(X[:35], Y[:35] + 1)
+        self.assertIsNot(model.rf, rf)
+
+        # Adding data points with weights to data points without weights, too
+        rf = model.rf
+        model.train(X[:40], Y[:40] + 1, weights=np.ones(40))
+        self.assertIsNot(model.rf, rf)
+
     def test_with_ordinal(self):
         cs = smac.configspace.ConfigurationSpace()
         _ = cs.add_hyperparameter(CategoricalHyperparameter("a", [0, 1], default_value=0))
@@ -0,0 +1,44 @@
+import unittest
+
+import numpy as np
+
+from smac.multi_objective.aggregation_strategy import (
+    AggregationStrategy,
+    MeanAggregationStrategy,
+)
+from smac.multi_objective.parego import ParEGO
+
+__copyright__ = "Copyright 2022, AutoML.org Freiburg-Hannover"
+__license__ = "3-clause BSD"
+
+
+class MaxAggregationStrategy(AggregationStrategy):
+    def __call__(self, values):
+        return max(values)
+
+
+class AggregationStrategyTest(unittest.TestCase):
+    def setUp(self):
+        self.costs = np.random.RandomState(1).rand(50, 3)
+
+    def test_aggregate(self):
+        """Aggregating many costs at once is the same as aggregating one after the other."""
+        for algorithm in (MeanAggregationStrategy, ParEGO, MaxAggregationStrategy):
+            strategy = algorithm(rng=np.random.RandomState(2))
+            expected = [strategy(row) for row in self.costs.tolist()]
+            aggregated = algorithm(rng=np.random.RandomState(2)).aggregate(self.costs)
+            self.assertEqual(aggregated.shape, (50,))
+            self.assertEqual(aggregated.tolist(), expected)
+
+    def test_aggregate_parego_weights(self):
+        """ParEGO draws the weights in the same order for each row as when called row by row."""
+        parego = ParEGO(rng=np.random.RandomState(2))
+        parego.aggregate(self.costs)
+        expected = ParEGO(rng=np.random.RandomState(2))
+        for row in self.costs.tolist():
+            expected(row)
+        self.assertEqual(parego.rng.rand(), expected.rng.rand())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,145 @@
+import gc
+import pickle
+import unittest
+
+import numpy as np
+from ConfigSpace import Configuration, ConfigurationSpace
+from ConfigSpace.conditions import EqualsCondition
+from ConfigSpace.hyperparameters import (
+    CategoricalHyperparameter,
+    UniformFloatHyperparameter,
+)
+
+from smac.configspace import convert_configurations_to_array
+from smac.runhistory.configurations import (
+    ConfigIdsView,
+    ConfigurationStore,
+    IdsConfigView,
+)
+
+__copyright__ = "Copyright 2022, AutoML.org Freiburg-Hannover"
+__license__ = "3-clause BSD"
+
+
+def get_config_space():
+    cs = ConfigurationSpace(seed=1)
+    a = CategoricalHyperparameter("a", ["x", "y"])
+    b = UniformFloatHyperparameter("b", 0, 10)
+    c = UniformFloatHyperparameter("c", 0, 1)
+    cs.add_hyperparameters([a, b, c])
+    cs.add_condition(EqualsCondition(b, a, "x"))
+    return cs
+
+
+class ConfigurationStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.cs = get_config_space()
+        self.configs = self.cs.sample_configuration(10)
+
+    def fill(self, store):
+        for config_id, config in enumerate(self.configs, start=1):
+            store.add(config, config_id)
+
+    def test_add_and_find(self):
+        store = ConfigurationStore(capacity=2)
+        self.fill(store)
+
+        self.assertEqual(len(store), 10)
+        self.assertEqual(list(store), list(range(1, 11)))
+        for config_id, config in enumerate(self.configs, start=1):
+            self.assertEqual(store.find(config), config_id)
+            self.assertIs(store.get_configuration(config_id), config)
+        self.assertIsNone(store.find(Configuration(self.cs, values={"a": "y", "c": 0.5})))
+        self.assertIsNone(store.find("not a configuration"))
+        with self.assertRaises(KeyError):
+            store.get_configuration(11)
+        with self.assertRaises(ValueError):
+            store.add(self.configs[0], 1)
+
+    def test_vectors(self):
+        store = ConfigurationStore()
+        self.fill(store)
+
+        expected = convert_configurations_to_array(self.configs)
+        np.testing.assert_array_equal(store.get_vectors([3, 1]), expected[[2, 0]])
+        np.testing.assert_array_equal(store.vectors[1:], expected)
+        self.assertEqual(store.get_vectors([]).shape, (0, 3))
+
+        # Rows are views of the matrix, which can not be modified
+        vector = store.get_vector(3)
+        np.testing.assert_array_equal(vector, self.configs[2].get_array())
+        self.assertIs(vector.base, store._vectors)
+        with self.assertRaises(ValueError):
+            vector[0] = 1
+        with self.assertRaises(KeyError):
+            store.get_vector(0)
+
+    def test_equal_configuration_with_other_vector(self):
+        # The vector of a configuration created from the values of a sampled one may differ in the last bit
+        pairs = [(config, Configuration(self.cs, values=config.get_dictionary())) for config in self.configs]
+        config, same = [pair for pair in pairs if pair[0].get_array().tobytes() != pair[1].get_array().tobytes()][0]
+        self.assertEqual(same, config)
+
+        store = ConfigurationStore()
+        store.add(config, 1)
+        self.assertEqual(store.find(same), 1)
+        # The other vector is added to the index
+        self.assertEqual(store._by_vector[same.get_array().tobytes()], 1)
+
+    def test_lazy(self):
+        store = ConfigurationStore(lazy=True)
+        self.fill(store)
+        from_values = Configuration(self.cs, values={"a": "x", "b": 0.9, "c": 0.5}, origin="user")
+        store.add(from_values, 11)
+
+        # Sampled configurations can be created from their vector, hence they are only kept while referenced
+        self.assertEqual(list(store._configs), [11])
+        config = store.get_configuration(1)
+        self.assertIs(config, self.configs[0])
+        del config
+        self.configs = None
+        gc.collect()
+        self.assertNotIn(1, store._cache)
+
+        config = store.get_configuration(1)
+        self.assertEqual(config, get_config_space().sample_configuration(10)[0])
+        self.assertIs(store.get_configuration(1), config)
+        self.assertIs(store.get_configuration(11), from_values)
+
+    def test_duplicates(self):
+        store = ConfigurationStore()
+        config = self.configs[0]
+        store.add(config, 1)
+        store.add(Configuration(self.cs, values=config.get_dictionary()), 2)
+
+        self.assertEqual(len(store), 2)
+        self.assertEqual(store.n_configs(), 1)
+        self.assertEqual(store.find(config), 2)
+        self.assertEqual(list(store.iter_config_ids()), [2])
+
+    def test_views(self):
+        store = ConfigurationStore()
+        self.fill(store)
+        ids_config = IdsConfigView(store)
+        config_ids = ConfigIdsView(store)
+
+        self.assertEqual(dict(ids_config), dict(enumerate(self.configs, start=1)))
+        self.assertEqual(dict(config_ids), {config: i for i, config in enumerate(self.configs, start=1)})
+        self.assertEqual(list(config_ids.values()), list(range(1, 11)))
+        self.assertEqual(list(config_ids.items())[0], (self.configs[0], 1))
+        self.assertIn(self.configs[3], config_ids)
+        self.assertIn(4, ids_config)
+        self.assertIsNone(config_ids.get(Configuration(self.cs, values={"a": "y", "c": 0.5})))
+
+    def test_pickle(self):
+        store = ConfigurationStore(lazy=True)
+        self.fill(store)
+        loaded = pickle.loads(pickle.dumps(store))
+
+        self.assertEqual(len(loaded._cache), 0)
+        self.assertEqual([loaded.get_configuration(i) for i in loaded], self.configs)
+        self.assertEqual(loaded.find(self.configs[4]), 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
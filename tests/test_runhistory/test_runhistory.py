@@ -1,15 +1,18 @@
 from typing import Optional
 
+import json
 import os
 import pickle
 import tempfile
 import unittest
 
+import numpy as np
 from ConfigSpace import Configuration, ConfigurationSpace
 from ConfigSpace.hyperparameters import UniformIntegerHyperparameter
 
-from smac.runhistory.runhistory import RunHistory, RunKey
+from smac.runhistory.runhistory import JOURNAL_SUFFIX, DataOrigin, RunHistory, RunKey
 from smac.tae import StatusType
+from smac.utils.io.serialization import SERIALIZERS, get_serializer
 
 __copyright__ = "Copyright 2021, AutoML.org Freiburg-Hannover"
 __license__ = "3-clause BSD"
@@ -80,6 +83,64 @@ class RunhistoryTest(unittest.TestCase):
         ):
             rh.add(config="abc", cost=1.23, time=2.34, status=StatusType.SUCCESS)
 
+    def test_json_validation(self):
+        cs = get_config_space()
+        config = Configuration(cs, values={"a": 1, "b": 2})
+
+        with self.assertRaisesRegex(ValueError, "Unknown json validation"):
+            RunHistory(json_validation="always")
+
+        rh = RunHistory()
+        with self.assertRaisesRegex(ValueError, "Cannot add additional_info"):
+            rh.add(config, cost=1, time=1, status=StatusType.SUCCESS, seed=1, additional_info={"x": object()})
+        self.assertEqual(len(rh), 0)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            fn = os.path.join(tmpdir, "runhistory.json")
+            for json_validation, error in (("deferred", ValueError), ("off", TypeError)):
+                rh = RunHistory(json_validation=json_validation)
+                rh.add(config, cost=1, time=1, status=StatusType.SUCCESS, seed=1)
+                rh.add(config, cost=1, time=1, status=StatusType.SUCCESS, seed=2, additional_info={"x": object()})
+                with self.assertRaises(error) as cm:
+                    rh.save_json(fn)
+                if json_validation == "deferred":
+                    self.assertIn(
+                        "RunKey: RunKey(config_id=1, instance_id=None, seed=2, budget=0.0)", str(cm.exception)
+                    )
+
+    def test_json_validation_saves_current_runs(self):
+        cs = get_config_space()
+        configs = [Configuration(cs, values={"a": i, "b": i}) for i in range(3)]
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            contents = []
+            for json_validation in ("strict", "off"):
+                rh = RunHistory(json_validation=json_validation)
+                infos = [{"status": StatusType.CRASHED, "curve": [1.0, 0.5]} for _ in configs]
+                for i, (config, info) in enumerate(zip(configs, infos)):
+                    rh.add(config, cost=i, time=1, status=StatusType.SUCCESS, seed=1, additional_info=info)
+
+                # The runs are saved as they are when saving, not as they were added
+                infos[2]["curve"].append(0.25)
+                infos[2]["a"] = 2
+                rh.add(configs[0], cost=5, time=2, status=StatusType.TIMEOUT, seed=1, force_update=True)
+                rh.data[RunKey(2, None, 1, 0.0)] = rh.data[RunKey(2, None, 1, 0.0)]._replace(cost=10.0)
+
+                fn = os.path.join(tmpdir, "runhistory_%s.json" % json_validation)
+                rh.save_json(fn, append=True)
+                rh.add(configs[2], cost=1, time=1, status=StatusType.SUCCESS, seed=2)
+                rh.save_json(fn, append=True)
+                with open(fn) as fh, open(fn + JOURNAL_SUFFIX) as journal_fh:
+                    contents.append((fh.read(), journal_fh.read()))
+
+                loaded = RunHistory()
+                loaded.load_json(fn, cs)
+                self.assertEqual(list(loaded.data.items()), list(rh.data.items()))
+                self.assertEqual(loaded.data[RunKey(3, None, 1, 0.0)].additional_info["curve"], [1.0, 0.5, 0.25])
+                self.assertEqual(loaded.data[RunKey(3, None, 1, 0.0)].additional_info["a"], 2)
+
+        self.assertEqual(contents[0], contents[1])
+
     def test_add_multiple_times(self):
         rh = RunHistory()
         cs = get_config_space()
@@ -208,6 +269,85 @@ class RunhistoryTest(unittest.TestCase):
         self.assertEqual(ist[0].budget, 1)
         self.assertEqual(ist[1].budget, 2)
 
+    def test_get_runs_view_for_config(self):
+        rh = RunHistory()
+        cs = get_config_space()
+        config1 = Configuration(cs, values={"a": 1, "b": 2})
+        config2 = Configuration(cs, values={"a": 1, "b": 3})
+
+        view = rh.get_runs_view_for_config(config1)
+        self.assertEqual(view.runs, ())
+        self.assertEqual(view.max_budget_run_set, frozenset())
+
+        for config in (config1, config2):
+            rh.add(config, cost=1, time=1, status=StatusType.SUCCESS, instance_id="1", seed=1, budget=1)
+
+        # The view is cached until a run of the configuration is added
+        view = rh.get_runs_view_for_config(config1)
+        self.assertIs(view, rh.get_runs_view_for_config(config1))
+        self.assertIs(view.runs, view.max_budget_runs)
+        self.assertEqual(list(view.runs), rh.get_runs_for_config(config1, only_max_observed_budget=False))
+
+        rh.add(config2, cost=1, time=1, status=StatusType.SUCCESS, instance_id="1", seed=1, budget=2)
+        self.assertIs(view, rh.get_runs_view_for_config(config1))
+        rh.add(config1, cost=1, time=1, status=StatusType.CAPPED, instance_id="1", seed=1, budget=3)
+        self.assertIs(view, rh.get_runs_view_for_config(config1))
+
+        rh.add(config1, cost=1, time=1, status=StatusType.SUCCESS, instance_id="1", seed=1, budget=2)
+        view = rh.get_runs_view_for_config(config1)
+        self.assertEqual(view.runs, (("1", 1, 1), ("1", 1, 2)))
+        self.assertEqual(view.max_budget_runs, (("1", 1, 2),))
+        self.assertEqual(view.run_set, frozenset(view.runs))
+        self.assertEqual(view.max_budget_run_set, frozenset(view.max_budget_runs))
+        self.assertEqual(list(view.max_budget_runs), rh.get_runs_for_config(config1, only_max_observed_budget=True))
+        self.assertEqual(
+            view.max_budget_run_set & rh.get_runs_view_for_config(config2).max_budget_run_set, {("1", 1, 2)}
+        )
+
+    def test_get_costs(self):
+        rh = RunHistory()
+        cs = get_config_space()
+        configs = [Configuration(cs, values={"a": i, "b": i}) for i in range(4)]
+        for i in range(20):
+            rh.add(
+                config=configs[i % 3],
+                cost=i * 1.5 % 7,
+                time=1,
+                status=StatusType.SUCCESS,
+                instance_id=str(i % 5),
+                seed=i % 2,
+            )
+
+        costs = rh.get_costs(configs)
+        self.assertEqual(costs.n_runs.tolist(), [7, 7, 6, 0])
+        self.assertEqual(costs.costs.shape, (20, 1))
+        self.assertEqual(len(costs.keys), 20)
+        for i, config in enumerate(configs[:3]):
+            self.assertAlmostEqual(costs.mean[i], rh.average_cost(config))
+            self.assertAlmostEqual(costs.sum[i], rh.sum_cost(config))
+            self.assertEqual(costs.min[i], rh.min_cost(config))
+        self.assertTrue(np.isnan(costs.mean[3]))
+        self.assertTrue(np.isnan(costs.min[3]))
+        self.assertEqual(costs.sum[3], 0)
+
+        # Only the runs on the given keys
+        keys = rh.get_runs_for_config(configs[0], only_max_observed_budget=True)[:3]
+        costs = rh.get_costs(configs, keys)
+        for i, config in enumerate(configs):
+            selected = [k for k in keys if k in rh.get_runs_view_for_config(config).max_budget_run_set]
+            self.assertEqual(costs.n_runs[i], len(selected))
+            if len(selected) > 0:
+                self.assertAlmostEqual(costs.mean[i], rh.average_cost(config, selected))
+
+        # All costs are computed again from the runs
+        rh._cost_per_config = {}
+        rh.compute_all_costs()
+        for i, config in enumerate(configs[:3]):
+            self.assertAlmostEqual(rh.get_cost(config), rh.average_cost(config))
+            self.assertEqual(rh.num_runs_per_config[i + 1], [7, 7, 6][i])
+        rh.compute_all_costs(instances=["0"])
+        self.assertEqual(rh.num_runs_per_config, {1: 2, 2: 1, 3: 1})
+
     def test_full_update(self):
         rh = RunHistory()
         cs = get_config_space()
@@ -393,6 +533,68 @@ class RunhistoryTest(unittest.TestCase):
 
         self.assertListEqual(rh.get_all_configs_per_budget([1]), [config1, config2])
 
+    def test_get_runs(self):
+        cs = get_config_space()
+        configs = [Configuration(cs, values={"a": i, "b": i}) for i in range(5)]
+        statuses = [StatusType.SUCCESS, StatusType.TIMEOUT, StatusType.CRASHED, StatusType.RUNNING]
+
+        rh = RunHistory()
+        for i in range(40):
+            rh.add(
+                config=configs[i % 5],
+                cost=i,
+                time=1,
+                status=statuses[i % 4],
+                instance_id=str(i % 3),
+                seed=0,
+                budget=[3, 1, 9][i % 7 % 3],
+                # Costs are only aggregated for configurations which are run once per budget
+                origin=DataOrigin.EXTERNAL_DIFFERENT_INSTANCES,
+            )
+        # Also fill a runhistory with the bulk update, once before and once after the statuses changed
+        rh_updated = RunHistory()
+        rh_updated.update(rh, origin=DataOrigin.EXTERNAL_DIFFERENT_INSTANCES)
+
+        # Finished runs change the status of running runs and move them to the end of their new status
+        for k, v in list(rh.data.items())[::-1]:
+            if v.status == StatusType.RUNNING:
+                rh.add(
+                    config=rh.ids_config[k.config_id],
+                    cost=1,
+                    time=1,
+                    status=StatusType.SUCCESS if k.config_id % 2 == 0 else StatusType.TIMEOUT,
+                    instance_id=k.instance_id,
+                    seed=k.seed,
+                    budget=k.budget,
+                    origin=DataOrigin.EXTERNAL_DIFFERENT_INSTANCES,
+                )
+        rh_updated.update(rh, origin=DataOrigin.EXTERNAL_DIFFERENT_INSTANCES)
+
+        for selected_statuses in (None, [StatusType.SUCCESS], [StatusType.TIMEOUT, StatusType.SUCCESS], []):
+            for selected_budgets in (None, [1], [9.0, 3], [2]):
+                expected = [
+                    (k, v)
+                    for k, v in rh.data.items()
+                    if (selected_statuses is None or v.status in selected_statuses)
+                    and (selected_budgets is None or k.budget in selected_budgets)
+                ]
+                for runhistory in (rh, rh_updated):
+                    self.assertEqual(
+                        list(runhistory.get_runs(statuses=selected_statuses, budgets=selected_budgets).items()),
+                        expected,
+                    )
+
+        self.assertEqual(rh.get_budgets(), [1, 3, 9])
+        self.assertEqual(rh_updated.get_budgets(), [1, 3, 9])
+        self.assertEqual(
+            rh.get_config_ids_per_budget(9), list(dict.fromkeys(k.config_id for k in rh.data if k.budget == 9))
+        )
+        self.assertEqual(rh.get_config_ids_per_budget(2), [])
+        self.assertEqual(
+            rh.get_all_configs_per_budget([9, 1]),
+            [rh.ids_config[k.config_id] for k in rh.data if k.budget in (1, 9)],
+        )
+
     def test_json_origin(self):
 
         for origin in ["test_origin", None]:
@@ -417,6 +619,311 @@ class RunhistoryTest(unittest.TestCase):
 
             os.remove(path)
 
+    def test_json_journal(self):
+        rh = RunHistory()
+        cs = get_config_space()
+        configs = [Configuration(cs, values={"a": i, "b": i}, origin="origin %d" % i) for i in range(4)]
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            fn = os.path.join(tmpdir, "runhistory.json")
+
+            # The first save writes a complete snapshot
+            rh.add(config=configs[0], cost=1, time=1, status=StatusType.SUCCESS, instance_id="a", seed=1)
+            rh.save_json(fn, append=True)
+            self.assertFalse(os.path.exists(fn + JOURNAL_SUFFIX))
+
+            # Afterwards, only the new and updated runs are appended
+            rh.add(config=configs[1], cost=0, time=0, status=StatusType.RUNNING, instance_id="a", seed=1)
+            rh.add(config=configs[2], cost=3, time=3, status=StatusType.SUCCESS, instance_id="b", seed=1)
+            rh.save_json(fn, append=True)
+            rh.add(
+                config=configs[1], cost=2, time=2, status=StatusType.SUCCESS, instance_id="a", seed=1, force_update=True
+            )
+            rh.add(config=configs[3], cost=4, time=4, status=StatusType.SUCCESS, instance_id="a", seed=1)
+            rh.save_json(fn, append=True)
+            # Nothing new to write
+            rh.save_json(fn, append=True)
+
+            with open(fn + JOURNAL_SUFFIX) as fh:
+                lines = fh.readlines()
+            self.assertEqual(len(lines), 2)
+            self.assertEqual(len(json.loads(lines[0])["data"]), 2)
+            self.assertEqual(list(json.loads(lines[1])["configs"]), ["4"])
+
+            # A partially written line is ignored
+            with open(fn + JOURNAL_SUFFIX, "a") as fh:
+                fh.write('{"data": [[[1, "c"')
+
+            loaded = RunHistory()
+            loaded.load_json(fn, cs)
+            self.assertEqual(list(loaded.data.items()), list(rh.data.items()))
+            self.assertEqual(loaded.get_all_configs(), rh.get_all_configs())
+            self.assertEqual([c.origin for c in loaded.get_all_configs()], [c.origin for c in configs])
+            self.assertEqual(loaded.get_cost(configs[1]), 2)
+
+            # A complete save compacts the journal into the snapshot
+            rh.save_json(fn)
+            self.assertFalse(os.path.exists(fn + JOURNAL_SUFFIX))
+            loaded = RunHistory()
+            loaded.load_json(fn, cs)
+            self.assertEqual(list(loaded.data.items()), list(rh.data.items()))
+
+    def test_json_serializers(self):
+        cs = get_config_space()
+        configs = [Configuration(cs, values={"a": i, "b": i}, origin="origin %d" % i) for i in range(3)]
+        for name in SERIALIZERS:
+            try:
+                get_serializer(name)
+            except ImportError:
+                continue
+
+            rh = RunHistory()
+            rh.add(config=configs[0], cost=1, time=1, status=StatusType.SUCCESS, instance_id="a", seed=1)
+            rh.add(
+                config=configs[1],
+                cost=2,
+                time=2,
+                status=StatusType.CRASHED,
+                seed=1,
+                additional_info={"status": StatusType.MEMOUT, "list": [1, "x"]},
+            )
+            with tempfile.TemporaryDirectory() as tmpdir:
+                fn = os.path.join(tmpdir, "runhistory")
+                rh.save_json(fn, append=True, serializer=name)
+                rh.add(config=configs[2], cost=3, time=3, status=StatusType.TIMEOUT, seed=2, budget=1)
+                rh.save_json(fn, append=True, serializer=name)
+                self.assertTrue(os.path.exists(fn + JOURNAL_SUFFIX))
+
+                loaded = RunHistory()
+                loaded.load_json(fn, cs, serializer=name)
+
+            self.assertEqual(list(loaded.data.items()), list(rh.data.items()), name)
+            self.assertEqual(loaded.ids_config, rh.ids_config, name)
+            self.assertEqual([c.origin for c in loaded.get_all_configs()], [c.origin for c in configs], name)
+
+    def test_bulk_add(self):
+        """Loading and updating add all runs at once, which must give the same runhistory as `add`."""
+        cs = get_config_space()
+        statuses = [StatusType.SUCCESS, StatusType.CAPPED, StatusType.TIMEOUT, StatusType.RUNNING, StatusType.SUCCESS]
+
+        def fill(rh, offset, num_obj):
+            for i in range(offset, offset + 40):
+                cost = [i % 7, i % 3] if num_obj > 1 else i % 7
+                if i % 4:
+                    # Runs on instances, some of them cap or overwrite existing runs
+                    config = Configuration(cs, values={"a": i % 5, "b": i % 3})
+                    instance_id, seed, budget = "inst%d" % (i % 2), i % 3, 0.0
+                    status = statuses[i % len(statuses)]
+                else:
+                    # Runs on budgets
+                    config = Configuration(cs, values={"a": 50 + i % 11, "b": 0})
+                    instance_id, seed, budget = None, 0, float(i % 3)
+                    status = StatusType.SUCCESS
+                if num_obj > 1 and status == StatusType.CAPPED:
+                    status = StatusType.CRASHED
+                rh.add(
+                    config=config,
+                    cost=cost,
+                    time=float(i),
+                    status=status,
+                    instance_id=instance_id,
+                    seed=seed,
+                    budget=budget,
+                    additional_info={"i": i},
+                )
+
+        def assert_same(rh1, rh2):
+            self.assertEqual(list(rh1.data.items()), list(rh2.data.items()))
+            self.assertEqual(rh1.external, rh2.external)
+            self.assertEqual(rh1.ids_config, rh2.ids_config)
+            self.assertEqual(rh1.config_ids, rh2.config_ids)
+            self.assertEqual(rh1._configid_to_inst_seed_budget, rh2._configid_to_inst_seed_budget)
+            self.assertEqual(rh1._cost_per_config, rh2._cost_per_config)
+            self.assertEqual(rh1._min_cost_per_config, rh2._min_cost_per_config)
+            self.assertEqual(rh1.num_runs_per_config, rh2.num_runs_per_config)
+            self.assertEqual(rh1.objective_bounds, rh2.objective_bounds)
+            self.assertEqual(rh1.num_obj, rh2.num_obj)
+
+        for num_obj, overwrite_existing_runs, origin in (
+            (1, False, DataOrigin.INTERNAL),
+            (1, True, DataOrigin.EXTERNAL_SAME_INSTANCES),
+            (1, False, DataOrigin.EXTERNAL_DIFFERENT_INSTANCES),
+            (2, False, DataOrigin.INTERNAL),
+        ):
+            source = RunHistory()
+            fill(source, 20, num_obj)
+
+            expected = RunHistory(overwrite_existing_runs=overwrite_existing_runs)
+            updated = RunHistory(overwrite_existing_runs=overwrite_existing_runs)
+            for rh in (expected, updated):
+                fill(rh, 0, num_obj)
+
+            for k, v in source.data.items():
+                expected.add(
+                    source.ids_config[k.config_id],
+                    instance_id=k.instance_id,
+                    seed=k.seed,
+                    budget=k.budget,
+                    origin=origin,
+                    **v._asdict(),
+                )
+            updated.update(source, origin=origin)
+            assert_same(expected, updated)
+
+            with tempfile.TemporaryDirectory() as tmpdir:
+                fn = os.path.join(tmpdir, "runhistory.json")
+                source.save_json(fn)
+                loaded = RunHistory()
+                loaded.load_json(fn, cs)
+
+            expected = RunHistory()
+            for k, v in source.data.items():
+                expected.add(
+                    source.ids_config[k.config_id],
+                    instance_id=k.instance_id,
+                    seed=k.seed,
+                    budget=k.budget,
+                    **v._asdict(),
+                )
+            assert_same(expected, loaded)
+
+    def test_compact(self):
+        """Compact runhistories share the fields of their run keys and behave like default runhistories."""
+        cs = get_config_space()
+        configs = [Configuration(cs, values={"a": i, "b": i}) for i in range(3)]
+        runhistories = [RunHistory(), RunHistory(compact=True)]
+        for rh in runhistories:
+            for i in range(12):
+                rh.add(
+                    config=configs[i % 3],
+                    cost=i,
+                    time=1,
+                    status=StatusType.SUCCESS,
+                    instance_id="instance %d" % (i % 2),
+                    seed=1000 + i // 6,
+                )
+
+        rh, compact = runhistories
+        self.assertEqual(list(compact.data.items()), list(rh.data.items()))
+        keys = list(compact.data)
+        self.assertIs(keys[0].instance_id, keys[2].instance_id)
+        self.assertIs(keys[0].seed, keys[5].seed)
+        self.assertIs(keys[0].budget, keys[1].budget)
+        for config in configs:
+            self.assertEqual(compact.get_cost(config), rh.get_cost(config))
+
+        # Pickled and json files are the same for both
+        loaded = pickle.loads(pickle.dumps(compact))
+        self.assertTrue(loaded.compact)
+        self.assertEqual(list(loaded.data.items()), list(rh.data.items()))
+        self.assertEqual(loaded.get_runs(budgets=[0.0]), rh.get_runs(budgets=[0.0]))
+        with tempfile.TemporaryDirectory() as tmpdir:
+            fn = os.path.join(tmpdir, "runhistory.json")
+            compact.save_json(fn)
+            loaded = RunHistory(compact=True)
+            loaded.load_json(fn, cs)
+            with open(fn) as fh:
+                compact_file = fh.read()
+            rh.save_json(fn)
+            with open(fn) as fh:
+                self.assertEqual(compact_file, fh.read())
+        self.assertEqual(list(loaded.data.items()), list(rh.data.items()))
+
+    def test_unpickle_without_indexes(self):
+        """Runhistories pickled by older versions have no indexes, which are rebuilt."""
+        rh = RunHistory()
+        cs = get_config_space()
+        for i in range(6):
+            rh.add(
+                config=Configuration(cs, values={"a": i % 2, "b": 0}),
+                cost=i,
+                time=1,
+                status=StatusType.SUCCESS if i % 3 else StatusType.CRASHED,
+                seed=0,
+                budget=i // 2,
+            )
+
+        state = dict(rh.__dict__)
+        for name in ("_runs_per_budget", "_runs_per_status", "_config_ids_per_budget", "_budgets"):
+            del state[name]
+        loaded = RunHistory.__new__(RunHistory)
+        loaded.__setstate__(state)
+        self.assertEqual(loaded.get_budgets(), [0.0, 1.0, 2.0])
+        self.assertEqual(
+            list(loaded.get_runs(statuses=[StatusType.CRASHED])), list(rh.get_runs(statuses=[StatusType.CRASHED]))
+        )
+        self.assertEqual(list(loaded.get_runs(budgets=[1.0])), list(rh.get_runs(budgets=[1.0])))
+
+    def test_unpickle_config_dicts(self):
+        """Runhistories pickled by older versions keep the configurations in dictionaries."""
+        rh = RunHistory()
+        cs = get_config_space()
+        configs = [Configuration(cs, values={"a": i, "b": 0}) for i in range(3)]
+        for i, config in enumerate(configs):
+            rh.add(config=config, cost=i, time=1, status=StatusType.SUCCESS, seed=0)
+
+        state = dict(rh.__dict__)
+        del state["_configs"]
+        state["ids_config"] = dict(rh.ids_config)
+        state["config_ids"] = dict(rh.config_ids)
+        loaded = RunHistory.__new__(RunHistory)
+        loaded.__setstate__(state)
+        self.assertEqual(dict(loaded.ids_config), dict(rh.ids_config))
+        self.assertEqual(loaded.config_ids[configs[1]], 2)
+        np.testing.assert_array_equal(
+            loaded.get_config_vectors([3, 1]), [configs[2].get_array(), configs[0].get_array()]
+        )
+
+    def test_lazy_configs(self):
+        cs = get_config_space()
+        cs.seed(1)
+        configs = cs.sample_configuration(5)
+        from_values = Configuration(cs, values={"a": 1, "b": 2})
+        rh = RunHistory(lazy_configs=True)
+        for i, config in enumerate(configs + [from_values, configs[0]]):
+            rh.add(config=config, cost=i, time=1, status=StatusType.SUCCESS, seed=i)
+
+        self.assertEqual(rh._n_id, 6)
+        self.assertEqual(len(rh.data), 7)
+        self.assertEqual(rh.get_all_configs(), configs + [from_values])
+        self.assertEqual(rh.get_config_vector(6).tolist(), from_values.get_array().tolist())
+        np.testing.assert_array_equal(rh.get_config_vectors(range(1, 7)), [c.get_array() for c in rh.get_all_configs()])
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            fn = os.path.join(tmpdir, "runhistory.json")
+            rh.save_json(fn)
+            loaded = RunHistory(lazy_configs=True)
+            loaded.load_json(fn, cs)
+
+        self.assertEqual(loaded.ids_config, rh.ids_config)
+        self.assertEqual(loaded.config_ids, rh.config_ids)
+        self.assertEqual(list(loaded.data.items()), list(rh.data.items()))
+
+    def test_load_json_duplicate_configs(self):
+        cs = get_config_space()
+        config = Configuration(cs, values={"a": 1, "b": 2})
+        rh = RunHistory()
+        rh.add(config=config, cost=1, time=1, status=StatusType.SUCCESS, seed=0)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            fn = os.path.join(tmpdir, "runhistory.json")
+            rh.save_json(fn)
+            with open(fn) as fh:
+                content = json.load(fh)
+            # The configuration is contained twice, the runs refer to the second id
+            content["configs"]["2"] = content["configs"]["1"]
+            content["data"][0][0][0] = 2
+            with open(fn, "w") as fh:
+                json.dump(content, fh)
+            rh = RunHistory()
+            rh.load_json(fn, cs)
+
+        self.assertEqual(list(rh.ids_config), [1, 2])
+        self.assertEqual(dict(rh.config_ids), {config: 2})
+        self.assertEqual(list(rh.data), [RunKey(2, None, 0, 0.0)])
+        # New configurations get an unused id
+        rh.add(config=Configuration(cs, values={"a": 2, "b": 2}), cost=1, time=1, status=StatusType.SUCCESS, seed=0)
+        self.assertEqual(list(rh.ids_config), [1, 2, 3])
+
 
 class RunHistoryMappingTest(unittest.TestCase):
     def setUp(self) -> None:
@@ -249,6 +249,8 @@ class RunhistoryTest(unittest.TestCase):
         X, y = rh2epm.transform(self.rh)
         np.testing.assert_array_almost_equal(X, np.array([[0.005, 0.995], [0.995, 0.005], [0.995, 0.995]]), decimal=3)
         np.testing.assert_array_almost_equal(y, np.array([[1.0], [11.0], [200.0]]), decimal=1)
+        # The censored run is appended before the older TIMEOUT run
+        np.testing.assert_array_equal(rh2epm.run_positions, [0, 2, 1])
 
     def test_cost_without_imputation(self):
         """
@@ -606,6 +608,189 @@ class RunhistoryTest(unittest.TestCase):
         self.assertTrue(len(y) == 4)
         self.assertRaises(ValueError, rh2epm.transform, self.rh, budget_subset=[4, 5])
 
+    def test_cached_rows(self):
+        """The rows of the design matrix are reused by subsequent calls, updated runs are refreshed."""
+        scen = Scenario(
+            {
+                "run_obj": "runtime",
+                "cutoff_time": 20,
+                "cs": self.cs,
+                "output_dir": "",
+                "instances": [["i1"], ["i2"]],
+                "features": {"i1": [1, 2], "i2": [3, 4]},
+            }
+        )
+        kwargs = dict(
+            num_params=2,
+            success_states=[StatusType.SUCCESS],
+            impute_censored_data=False,
+            scenario=scen,
+        )
+        rh2epm = runhistory2epm.RunHistory2EPM4LogScaledCost(**kwargs)
+        configs = [self.config1, self.config2, self.config3, self.config4]
+        for i, config in enumerate(configs):
+            for instance in ("i1", "i2"):
+                self.rh.add(config, i + 1, i + 1, StatusType.SUCCESS, instance_id=instance, seed=i)
+
+        def check():
+            X, y = rh2epm.transform(self.rh)
+            X_new, y_new = runhistory2epm.RunHistory2EPM4LogScaledCost(**kwargs).transform(self.rh)
+            np.testing.assert_array_equal(X, X_new)
+            np.testing.assert_array_equal(y, y_new)
+            return X, y
+
+        X, _ = check()
+        self.assertEqual(X.shape, (8, 4))
+        self.assertEqual(X[1, 2:].tolist(), [3, 4])
+        rows = rh2epm._run_rows.rows
+
+        # New runs are added to the cached rows, updated runs are refreshed
+        self.rh.add(self.config5, 5, 5, StatusType.SUCCESS, instance_id="i1", seed=4)
+        self.rh.add(self.config1, 10, 20, StatusType.TIMEOUT, instance_id="i1", seed=0, force_update=True)
+        self.rh.add(self.config2, 0.5, 0.5, StatusType.SUCCESS, instance_id="i2", seed=1, force_update=True)
+        X, _ = check()
+        self.assertEqual(X.shape, (9, 4))
+        self.assertIs(rh2epm._run_rows.rows, rows)
+        self.assertEqual(len(rows), 9)
+
+        # Another runhistory replaces the cache
+        self.rh = runhistory.RunHistory()
+        self.rh.add(self.config5, 5, 5, StatusType.SUCCESS, instance_id="i2", seed=4)
+        X, _ = check()
+        self.assertEqual(X.tolist(), [[self.config5.get_array()[0], self.config5.get_array()[1], 3, 4]])
+
+    def test_run_partition(self):
+        """The runs are partitioned once and the partition is updated with added and updated runs."""
+        kwargs = dict(
+            num_params=2,
+            success_states=[StatusType.SUCCESS],
+            consider_for_higher_budgets_state=[StatusType.SUCCESS, StatusType.CRASHED],
+            impute_censored_data=False,
+            scenario=self.scen,
+        )
+        rh2epm = runhistory2epm.RunHistory2EPM4Cost(**kwargs)
+        configs = [self.config1, self.config2, self.config3, self.config4]
+        statuses = [StatusType.SUCCESS, StatusType.CRASHED, StatusType.TIMEOUT, StatusType.SUCCESS]
+        for i, (config, status) in enumerate(zip(configs, statuses)):
+            for budget in (1, 2, 3)[: 4 - i]:
+                self.rh.add(config, i + budget, 10 * i + budget, status, instance_id=1, seed=0, budget=budget)
+
+        def check():
+            expected = runhistory2epm.RunHistory2EPM4Cost(**kwargs)
+            for budget_subset in (None, [1], [2], [3], [4]):
+                X, y = rh2epm.transform(self.rh, budget_subset=budget_subset)
+                X_new, y_new = expected.transform(self.rh, budget_subset=budget_subset)
+                np.testing.assert_array_equal(X, X_new)
+                np.testing.assert_array_equal(y, y_new)
+                np.testing.assert_array_equal(
+                    rh2epm.get_configurations(self.rh, budget_subset=budget_subset),
+                    expected.get_configurations(self.rh, budget_subset=budget_subset),
+                )
+
+        check()
+        partition = rh2epm._run_partition
+        self.assertEqual(partition.get_positions("success", [3]), [2])
+        # Runs on lower budgets are considered for higher budgets
+        self.assertEqual(len(rh2epm._get_s_run_dict(self.rh, [3])), 6)
+        self.assertEqual(len(rh2epm._get_t_run_dict(self.rh)), 2)
+
+        # Updated runs move to the categories of their new status, new runs are appended
+        self.rh.add(self.config1, 1, 1, StatusType.CRASHED, instance_id=1, seed=0, budget=1, force_update=True)
+        self.rh.add(self.config2, 2, 2, StatusType.SUCCESS, instance_id=1, seed=0, budget=2, force_update=True)
+        self.rh.add(self.config5, 5, 5, StatusType.SUCCESS, instance_id=1, seed=0, budget=4)
+        check()
+        self.assertIs(rh2epm._run_partition, partition)
+        self.assertEqual(partition.get_positions("success", [1, 2]), [1, 4, 8])
+        self.assertEqual(partition.get_positions("higher", [1]), [0, 3, 8])
+
+    def test_aggregate_seeds(self):
+        """Runs of a configuration on an instance with different seeds are aggregated into one weighted row."""
+        kwargs = dict(
+            num_params=2,
+            success_states=[StatusType.SUCCESS],
+            impute_censored_data=False,
+            scenario=self.scen,
+        )
+        rh2epm = runhistory2epm.RunHistory2EPM4LogCost(aggregate_seeds=True, **kwargs)
+        for seed in range(3):
+            self.rh.add(self.config1, seed + 1, 1, StatusType.SUCCESS, instance_id=1, seed=seed)
+            self.rh.add(self.config2, 2, 1, StatusType.SUCCESS, instance_id=seed % 2, seed=seed)
+        self.rh.add(self.config3, 21, 21, StatusType.TIMEOUT, instance_id=1, seed=0)
+        self.rh.add(self.config3, 22, 22, StatusType.TIMEOUT, instance_id=1, seed=1)
+
+        X, y = rh2epm.transform(self.rh)
+        X_runs, y_runs = runhistory2epm.RunHistory2EPM4LogCost(**kwargs).transform(self.rh)
+        self.assertEqual(X_runs.shape[0], 8)
+        self.assertEqual(X.shape[0], 4)
+        np.testing.assert_array_equal(X, X_runs[[0, 1, 3, 6]])
+        np.testing.assert_array_almost_equal(y.flatten(), np.log([2, 2, 2, 21.5]))
+        np.testing.assert_array_equal(rh2epm.weights, [3, 2, 1, 2])
+        # The rows are positioned at their most recent run
+        np.testing.assert_array_equal(rh2epm.run_positions, [4, 5, 3, 7])
+
+        # Without repeated seeds, the rows are the same as without aggregation
+        self.rh = runhistory.RunHistory()
+        self.rh.add(self.config1, 1, 1, StatusType.SUCCESS, instance_id=1, seed=0)
+        self.rh.add(self.config1, 2, 2, StatusType.SUCCESS, instance_id=2, seed=0)
+        X, y = rh2epm.transform(self.rh)
+        X_runs, y_runs = runhistory2epm.RunHistory2EPM4LogCost(**kwargs).transform(self.rh)
+        np.testing.assert_array_equal(X, X_runs)
+        np.testing.assert_array_equal(y, y_runs)
+        self.assertIsNone(rh2epm.weights)
+
+    def test_incremental_response_values(self):
+        """The statistics of the y values are updated with new runs, and only y values of new runs are
+        transformed unless the statistics changed."""
+        kwargs = dict(
+            num_params=2,
+            success_states=[StatusType.SUCCESS],
+            impute_censored_data=False,
+            scenario=self.scen,
+        )
+        rng = np.random.RandomState(1)
+        y = rng.rand(50, 2)
+        for q in (0, 5, 50, 97.5, 100):
+            np.testing.assert_array_almost_equal(
+                runhistory2epm._sorted_percentile(np.sort(y, axis=0), q), np.percentile(y, q, axis=0)
+            )
+
+        configs = self.cs.sample_configuration(20)
+        for cls in (runhistory2epm.RunHistory2EPM4LogCost, runhistory2epm.RunHistory2EPM4LogScaledCost):
+            self.rh = runhistory.RunHistory()
+            rh2epm = cls(**kwargs)
+            for i in range(30):
+                self.rh.add(configs[i % 20], rng.rand() + 0.1, 1, StatusType.SUCCESS, instance_id=1, seed=i // 20)
+                if i == 25:
+                    # Updated runs change y values which were cached
+                    self.rh.add(configs[0], 2, 1, StatusType.SUCCESS, instance_id=1, seed=0, force_update=True)
+                X, y = rh2epm.transform(self.rh)
+                expected = cls(**kwargs)
+                X_new, y_new = expected.transform(self.rh)
+                np.testing.assert_array_equal(X, X_new)
+                np.testing.assert_array_almost_equal(y, y_new)
+                for statistic in ("min_y", "max_y", "perc"):
+                    np.testing.assert_array_almost_equal(getattr(rh2epm, statistic), getattr(expected, statistic))
+
+            cached = rh2epm._response_values[(False, True)]
+            self.assertEqual(cached.y.shape, (len(self.rh.data), 1))
+            np.testing.assert_array_equal(cached.sorted_y, np.sort(cached.y, axis=0))
+
+            # Only new y values are transformed unless the scaling statistics change
+            calls = []
+            transform_response_values = rh2epm.transform_response_values
+
+            def count_transformed(values):
+                calls.append(len(values))
+                return transform_response_values(values)
+
+            rh2epm.transform_response_values = count_transformed
+            self.rh.add(configs[1], 1.5, 1, StatusType.SUCCESS, instance_id=2, seed=0)
+            rh2epm.transform(self.rh)
+            if cls is runhistory2epm.RunHistory2EPM4LogCost:
+                self.assertEqual(calls[0], 1)
+            else:
+                self.assertEqual(calls[0], len(self.rh.data))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -2,7 +2,9 @@ import os
 import pickle
 import tempfile
 import unittest
+from array import array
 
+import numpy as np
 import pytest
 from ConfigSpace import Configuration, ConfigurationSpace
 from ConfigSpace.hyperparameters import UniformIntegerHyperparameter
@@ -608,6 +610,82 @@ class RunhistoryMultiObjectiveTest(unittest.TestCase):
         self.assertEqual(rh.get_cost(config2), 0.5)
         self.assertEqual(rh.average_cost(config2), [0, 150])
 
+    def test_objective_bounds_overwrite(self):
+        rh = RunHistory(overwrite_existing_runs=True)
+        cs = get_config_space()
+        config1 = Configuration(cs, values={"a": 1, "b": 2})
+        config2 = Configuration(cs, values={"a": 2, "b": 3})
+
+        rh.add(config=config1, cost=[0, 50], time=5, status=StatusType.CRASHED, instance_id=1, seed=1)
+        self.assertEqual(rh.objective_bounds, [(np.inf, -np.inf), (np.inf, -np.inf)])
+
+        rh.add(config=config1, cost=[10, 50], time=5, status=StatusType.SUCCESS, instance_id=1, seed=1)
+        rh.add(config=config2, cost=[20, 100], time=5, status=StatusType.SUCCESS, instance_id=1, seed=1)
+        self.assertEqual(rh.objective_bounds, [(10, 20), (50, 100)])
+
+        # The run defining the lower bounds is overwritten, so the bounds have to shrink
+        rh.add(config=config1, cost=[15, 70], time=5, status=StatusType.SUCCESS, instance_id=1, seed=1)
+        self.assertEqual(rh.objective_bounds, [(15, 20), (70, 100)])
+
+        # A run which is not successful anymore does not count towards the bounds
+        rh.add(config=config2, cost=[1, 1], time=5, status=StatusType.CRASHED, instance_id=1, seed=1)
+        self.assertEqual(rh.objective_bounds, [(15, 15), (70, 70)])
+
+    def test_get_costs(self):
+        rh = RunHistory()
+        cs = get_config_space()
+        configs = [Configuration(cs, values={"a": i, "b": i}) for i in range(4)]
+
+        rng = np.random.RandomState(1)
+        for i in range(20):
+            rh.add(
+                config=configs[i % 3],
+                cost=rng.rand(3) * [1, 10, 100],
+                time=1,
+                status=StatusType.SUCCESS,
+                instance_id=str(i % 5),
+                seed=i % 2,
+            )
+
+        for normalize in (False, True):
+            costs = rh.get_costs(configs, normalize=normalize)
+            self.assertEqual(costs.costs.shape, (20, 3))
+            self.assertEqual(costs.n_runs.tolist(), [7, 7, 6, 0])
+            self.assertEqual(costs.mean.shape, (4,) if normalize else (4, 3))
+            for i, config in enumerate(configs[:3]):
+                np.testing.assert_allclose(costs.mean[i], rh.average_cost(config, normalize=normalize))
+                np.testing.assert_allclose(costs.sum[i], rh.sum_cost(config, normalize=normalize))
+                np.testing.assert_allclose(costs.min[i], rh.min_cost(config, normalize=normalize))
+            self.assertTrue(np.all(np.isnan(costs.mean[3])))
+            self.assertTrue(np.all(np.isnan(costs.min[3])))
+            if not normalize:
+                self.assertTrue(np.all(costs.sum[3] == 0))
+
+        # Normalized like `get_cost` does it
+        np.testing.assert_allclose(
+            rh.get_costs(configs[:3], normalize=True).mean, [rh.get_cost(c) for c in configs[:3]]
+        )
+
+    def test_compact(self):
+        rh = RunHistory(compact=True)
+        cs = get_config_space()
+        config = Configuration(cs, values={"a": 1, "b": 2})
+        rh.add(config=config, cost=[1, 2], time=1, status=StatusType.SUCCESS, instance_id="a", seed=1)
+        rh.add(config=config, cost=np.array([3, 4]), time=1, status=StatusType.SUCCESS, instance_id="b", seed=1)
+
+        costs = [v.cost for v in rh.data.values()]
+        self.assertEqual(costs, [array("d", [1, 2]), array("d", [3, 4])])
+        self.assertEqual(rh.average_cost(config, normalize=False), [2, 3])
+        self.assertEqual(rh.get_costs([config]).mean.tolist(), [[2, 3]])
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            fn = os.path.join(tmpdir, "runhistory.json")
+            rh.save_json(fn)
+            loaded = RunHistory(compact=True)
+            loaded.load_json(fn, cs)
+        self.assertEqual(list(loaded.data.items()), list(rh.data.items()))
+        self.assertEqual(pickle.loads(pickle.dumps(rh)).data, rh.data)
+
 
 if __name__ == "__main__":
     t = RunhistoryMultiObjectiveTest()
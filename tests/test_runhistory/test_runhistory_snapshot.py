@@ -0,0 +1,121 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+from ConfigSpace import ConfigurationSpace
+from ConfigSpace.conditions import EqualsCondition
+from ConfigSpace.hyperparameters import (
+    CategoricalHyperparameter,
+    UniformFloatHyperparameter,
+)
+
+from smac.configspace import convert_configurations_to_array
+from smac.runhistory.runhistory import DataOrigin, RunHistory
+from smac.runhistory.snapshot import RunHistorySnapshot, write_snapshot
+from smac.tae import StatusType
+
+__copyright__ = "Copyright 2022, AutoML.org Freiburg-Hannover"
+__license__ = "3-clause BSD"
+
+
+def get_config_space():
+    cs = ConfigurationSpace(seed=1)
+    a = CategoricalHyperparameter("a", ["x", "y"])
+    b = UniformFloatHyperparameter("b", 0, 1)
+    cs.add_hyperparameters([a, b])
+    cs.add_condition(EqualsCondition(b, a, "x"))
+    return cs
+
+
+class RunHistorySnapshotTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.fn = os.path.join(self.tmpdir.name, "runhistory.snapshot")
+        self.cs = get_config_space()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def get_runhistory(self, num_obj):
+        rh = RunHistory()
+        configs = self.cs.sample_configuration(8)
+        configs[0].origin = "Random"
+        for i in range(30):
+            rh.add(
+                configs[i % len(configs)],
+                cost=[i, -i][:num_obj] if num_obj > 1 else i,
+                time=i / 10,
+                status=[StatusType.SUCCESS, StatusType.CRASHED, StatusType.TIMEOUT][i % 3],
+                instance_id=None if i % 5 == 0 else "instance %d" % (i % 4),
+                seed=i,
+                starttime=i,
+                endtime=i + 1,
+                additional_info={"status": StatusType.MEMOUT, "i": i} if i % 7 == 0 else None,
+            )
+        return rh
+
+    def test_round_trip(self):
+        for num_obj in (1, 2):
+            rh = self.get_runhistory(num_obj)
+            write_snapshot(rh, self.fn)
+            snapshot = RunHistorySnapshot(self.fn)
+
+            self.assertEqual(len(snapshot), len(rh.data))
+            self.assertEqual(snapshot.num_obj, num_obj)
+            self.assertEqual(list(snapshot.items()), list(rh.data.items()))
+            self.assertEqual(list(snapshot), list(rh.data))
+            k = list(rh.data)[7]
+            self.assertIn(k, snapshot)
+            self.assertEqual(snapshot[k], rh.data[k])
+            self.assertEqual(
+                snapshot.get_runs(statuses=[StatusType.CRASHED]), rh.get_runs(statuses=[StatusType.CRASHED])
+            )
+            np.testing.assert_array_equal(snapshot.costs, np.array([v.cost for v in rh.data.values()]).reshape(30, -1))
+            np.testing.assert_array_equal(snapshot.run_config_ids, [k.config_id for k in rh.data])
+
+    def test_lazy_configurations(self):
+        rh = self.get_runhistory(1)
+        write_snapshot(rh, self.fn)
+        snapshot = RunHistorySnapshot(self.fn)
+
+        # The configurations are stored as vectors and only created on access
+        self.assertIsInstance(snapshot.config_vectors, np.memmap)
+        np.testing.assert_array_equal(snapshot.config_vectors, convert_configurations_to_array(rh.get_all_configs()))
+        self.assertEqual(snapshot.ids_config._configs, {})
+        self.assertEqual(snapshot.ids_config[1], rh.ids_config[1])
+        self.assertEqual(snapshot.ids_config[1].origin, "Random")
+        self.assertEqual(list(snapshot.ids_config._configs), [1])
+        self.assertEqual(snapshot.get_all_configs(), rh.get_all_configs())
+
+        # Warm-starting from the snapshot is the same as from the runhistory
+        expected = RunHistory()
+        expected.update(rh, origin=DataOrigin.EXTERNAL_SAME_INSTANCES)
+        updated = RunHistory()
+        updated.update(snapshot, origin=DataOrigin.EXTERNAL_SAME_INSTANCES)
+        self.assertEqual(list(updated.data.items()), list(expected.data.items()))
+        self.assertEqual(updated.ids_config, expected.ids_config)
+        self.assertEqual(updated._cost_per_config, expected._cost_per_config)
+
+    def test_empty(self):
+        write_snapshot(RunHistory(), self.fn)
+        snapshot = RunHistorySnapshot(self.fn)
+        self.assertTrue(snapshot.empty())
+        self.assertEqual(list(snapshot.items()), [])
+        self.assertEqual(snapshot.get_all_configs(), [])
+
+    def test_invalid_file(self):
+        with open(self.fn, "w") as fh:
+            fh.write("{}")
+        with self.assertRaisesRegex(ValueError, "is not a runhistory snapshot"):
+            RunHistorySnapshot(self.fn)
+
+        write_snapshot(self.get_runhistory(1), self.fn)
+        cs = ConfigurationSpace()
+        cs.add_hyperparameter(UniformFloatHyperparameter("c", 0, 1))
+        with self.assertRaisesRegex(ValueError, "does not match"):
+            RunHistorySnapshot(self.fn, cs)
+
+
+if __name__ == "__main__":
+    unittest.main()
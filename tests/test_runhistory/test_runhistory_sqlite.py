@@ -0,0 +1,157 @@
+import logging
+import os
+import pickle
+import sqlite3
+import tempfile
+import unittest
+
+from ConfigSpace import Configuration, ConfigurationSpace
+from ConfigSpace.hyperparameters import (
+    UniformFloatHyperparameter,
+    UniformIntegerHyperparameter,
+)
+
+from smac.facade.smac_ac_facade import SMAC4AC
+from smac.optimizer import pSMAC
+from smac.runhistory.runhistory import DataOrigin, RunKey
+from smac.runhistory.sqlite import SQLiteRunHistory
+from smac.scenario.scenario import Scenario
+from smac.tae import StatusType
+
+__copyright__ = "Copyright 2022, AutoML.org Freiburg-Hannover"
+__license__ = "3-clause BSD"
+
+
+def get_config_space():
+    cs = ConfigurationSpace()
+    cs.add_hyperparameter(UniformIntegerHyperparameter(name="a", lower=0, upper=100))
+    cs.add_hyperparameter(UniformIntegerHyperparameter(name="b", lower=0, upper=100))
+    return cs
+
+
+class SQLiteRunHistoryTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.database = os.path.join(self.tmpdir.name, "runhistory.sqlite")
+        self.cs = get_config_space()
+        self.configs = [Configuration(self.cs, values={"a": i, "b": 100 - i}, origin="origin %d" % i) for i in range(3)]
+        self.runhistories = []
+
+    def tearDown(self):
+        for rh in self.runhistories:
+            rh.close()
+        self.tmpdir.cleanup()
+
+    def get_runhistory(self, **kwargs):
+        rh = SQLiteRunHistory(self.database, **kwargs)
+        self.runhistories.append(rh)
+        return rh
+
+    def count_runs(self):
+        with sqlite3.connect(self.database) as connection:
+            return connection.execute("SELECT count(*) FROM runs").fetchone()[0]
+
+    def test_write_and_read(self):
+        writer = self.get_runhistory(worker="writer")
+        reader = self.get_runhistory(worker="reader")
+
+        writer.add(self.configs[0], 1, 1, StatusType.SUCCESS, instance_id="i1", seed=1)
+        writer.add(self.configs[1], 2, 1, StatusType.RUNNING, instance_id="i1", seed=1)
+        # Runs are committed right away
+        self.assertEqual(self.count_runs(), 2)
+
+        self.assertEqual(reader.read(self.cs), 2)
+        self.assertEqual(list(reader.data.items()), list(writer.data.items()))
+        self.assertEqual(set(reader.external.values()), {DataOrigin.EXTERNAL_SAME_INSTANCES})
+        self.assertEqual([c.origin for c in reader.get_all_configs()], ["origin 0", "origin 1"])
+        self.assertEqual(reader.read(self.cs), 0)
+
+        # Updated runs are read again, runs of the reader are not written back
+        writer.add(self.configs[1], 3, 1, StatusType.CAPPED, instance_id="i1", seed=1, force_update=True)
+        reader.add(self.configs[2], 4, 1, StatusType.SUCCESS, seed=2, additional_info={"status": StatusType.MEMOUT})
+        self.assertEqual(self.count_runs(), 3)
+        self.assertEqual(reader.read(self.cs), 1)
+        self.assertEqual(reader.data[RunKey(2, "i1", 1, 0.0)].status, StatusType.CAPPED)
+
+        self.assertEqual(writer.read(self.cs), 1)
+        self.assertEqual(writer.data[RunKey(3, None, 2, 0.0)], reader.data[RunKey(3, None, 2, 0.0)])
+        self.assertEqual(writer.get_cost(self.configs[2]), 4)
+
+    def test_without_seed(self):
+        writer = self.get_runhistory(worker="writer")
+        reader = self.get_runhistory(worker="reader")
+
+        writer.add(self.configs[0], 1, 1, StatusType.SUCCESS)
+        self.assertEqual(reader.read(self.cs), 1)
+        self.assertEqual(reader.data[RunKey(1, None, None, 0.0)].cost, 1)
+
+        # The run without a seed is overwritten like any other run
+        writer.add(self.configs[0], 2, 1, StatusType.SUCCESS, force_update=True)
+        self.assertEqual(self.count_runs(), 1)
+        reader = self.get_runhistory(worker="other reader")
+        self.assertEqual(reader.read(self.cs), 1)
+        self.assertEqual(list(reader.data.items()), list(writer.data.items()))
+        self.assertEqual(reader.data[RunKey(1, None, None, 0.0)].cost, 2)
+
+    def test_restore(self):
+        rh = self.get_runhistory(worker="worker")
+        rh.add(self.configs[1], [1, 2], 1, StatusType.SUCCESS, instance_id="i1", seed=1)
+        rh.add(self.configs[1], [3, 4], 1, StatusType.SUCCESS, instance_id="i2", seed=1)
+        rh.close()
+
+        restored = self.get_runhistory(worker="worker")
+        self.assertEqual(restored.read(self.cs), 2)
+        self.assertEqual(list(restored.data.items()), list(rh.data.items()))
+        self.assertEqual(set(restored.external.values()), {DataOrigin.INTERNAL})
+        self.assertEqual(restored.average_cost(self.configs[1], normalize=False), [2, 3])
+
+        # The configuration is not inserted again
+        restored.add(self.configs[1], [5, 6], 1, StatusType.SUCCESS, instance_id="i3", seed=1)
+        with sqlite3.connect(self.database) as connection:
+            self.assertEqual(connection.execute("SELECT count(*) FROM configs").fetchone()[0], 1)
+        self.assertEqual(restored.read(self.cs), 0)
+
+    def test_pickle(self):
+        rh = self.get_runhistory()
+        rh.add(self.configs[0], 1, 1, StatusType.SUCCESS, seed=1)
+        loaded = pickle.loads(pickle.dumps(rh))
+        self.runhistories.append(loaded)
+        self.assertEqual(loaded.worker, rh.worker)
+        self.assertEqual(list(loaded.data.items()), list(rh.data.items()))
+
+        loaded.add(self.configs[0], 2, 1, StatusType.SUCCESS, seed=2)
+        self.assertEqual(self.count_runs(), 2)
+
+    def test_psmac(self):
+        rh = self.get_runhistory()
+        other = self.get_runhistory()
+        other.add(self.configs[0], 1, 1, StatusType.SUCCESS, seed=1)
+
+        logger = logging.getLogger("Test")
+        pSMAC.write(rh, self.tmpdir.name, logger)
+        self.assertFalse(os.path.exists(os.path.join(self.tmpdir.name, "runhistory.json")))
+        pSMAC.read(rh, self.tmpdir.name, self.cs, logger)
+        self.assertEqual(list(rh.data.items()), list(other.data.items()))
+
+    def test_facade(self):
+        cs = ConfigurationSpace()
+        cs.add_hyperparameter(UniformFloatHyperparameter("x", -1, 1))
+        scenario = Scenario(
+            {"cs": cs, "run_obj": "quality", "runcount_limit": 3, "deterministic": True, "output_dir": self.tmpdir.name}
+        )
+        smac = SMAC4AC(
+            scenario,
+            tae_runner=lambda config: config["x"] ** 2,
+            runhistory=SQLiteRunHistory,
+            runhistory_kwargs={"database": self.database},
+        )
+        self.runhistories.append(smac.solver.runhistory)
+        self.assertIsInstance(smac.solver.runhistory, SQLiteRunHistory)
+        smac.optimize()
+
+        self.assertEqual(self.count_runs(), len(smac.runhistory.data))
+        self.assertEqual(self.count_runs(), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -7,6 +7,7 @@ from ConfigSpace import Configuration
 
 from smac.epm.random_forest.rf_with_instances import RandomForestWithInstances
 from smac.facade.smac_ac_facade import SMAC4AC
+from smac.optimizer.configuration_chooser.training_set import KeepRecent
 from smac.runhistory.runhistory import RunHistory
 from smac.scenario.scenario import Scenario
 from smac.tae import StatusType
@@ -60,6 +61,28 @@ class TestEPMChooser(unittest.TestCase):
         x = next(smbo.epm_chooser.choose_next()).get_array()
         self.assertEqual(x.shape, (2,))
 
+    def test_choose_next_training_set_policy(self):
+        rh = RunHistory()
+        for i, config in enumerate(self.scenario.cs.sample_configuration(10)):
+            rh.add(config, i, 10, StatusType.SUCCESS)
+
+        smbo = SMAC4AC(
+            self.scenario,
+            rng=42,
+            runhistory=rh,
+            smbo_kwargs={"epm_chooser_kwargs": {"training_set_policy": KeepRecent(max_size=4)}},
+        ).solver
+        epm_chooser = smbo.epm_chooser
+        epm_chooser.model = mock.Mock(spec=RandomForestWithInstances)
+        epm_chooser.model.predict_marginalized_over_instances.return_value = (np.ones((10, 1)), np.ones((10, 1)))
+        next(epm_chooser.choose_next())
+
+        # The model is trained on the 4 most recent runs
+        X, Y = epm_chooser.model.train.call_args[0]
+        X_all, Y_all = epm_chooser.rh2EPM.transform(rh)
+        np.testing.assert_array_equal(X, X_all[6:])
+        np.testing.assert_array_equal(Y, Y_all[6:])
+
     def test_choose_next_budget(self):
         seed = 42
         config = self.scenario.cs.sample_configuration()
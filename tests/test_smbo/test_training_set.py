@@ -0,0 +1,100 @@
+import unittest
+
+import numpy as np
+
+from smac.optimizer.configuration_chooser.training_set import (
+    KeepAll,
+    KeepRecent,
+    KeepTopAndSubsample,
+    Reservoir,
+)
+
+__copyright__ = "Copyright 2022, AutoML.org Freiburg-Hannover"
+__license__ = "3-clause BSD"
+
+
+class TestTrainingSetPolicies(unittest.TestCase):
+    def setUp(self):
+        self.X = np.arange(100, dtype=float).reshape(50, 2)
+        self.Y = np.random.RandomState(1).rand(50, 1)
+
+    def test_keep_all(self):
+        self.assertIsNone(KeepAll().select(self.X, self.Y, np.random.RandomState(1)))
+
+    def test_keep_recent(self):
+        policy = KeepRecent(max_size=10)
+        np.testing.assert_array_equal(policy.select(self.X, self.Y, np.random.RandomState(1)), np.arange(40, 50))
+        self.assertIsNone(policy.select(self.X[:10], self.Y[:10], np.random.RandomState(1)))
+        with self.assertRaises(ValueError):
+            KeepRecent(max_size=0)
+
+    def test_keep_recent_with_timeouts(self):
+        # The 20 TIMEOUT runs are appended after the successful runs, but are older than the last 20 successful runs
+        positions = np.concatenate((np.arange(10), np.arange(30, 50), np.arange(10, 30)))
+        policy = KeepRecent(max_size=10)
+        indices = policy.select(self.X, self.Y, np.random.RandomState(1), positions=positions)
+        np.testing.assert_array_equal(indices, np.arange(20, 30))
+
+        # The window covers the most recent TIMEOUT runs, too
+        indices = KeepRecent(max_size=25).select(self.X, self.Y, np.random.RandomState(1), positions=positions)
+        np.testing.assert_array_equal(np.sort(positions[indices]), np.arange(25, 50))
+        np.testing.assert_array_equal(indices, np.concatenate((np.arange(10, 30), np.arange(45, 50))))
+
+    def test_keep_top_and_subsample(self):
+        policy = KeepTopAndSubsample(max_size=20, top_fraction=0.25)
+        indices = policy.select(self.X, self.Y, np.random.RandomState(1))
+
+        self.assertEqual(len(indices), 20)
+        self.assertEqual(len(set(indices.tolist())), 20)
+        self.assertEqual(indices.tolist(), sorted(indices.tolist()))
+        # The 5 best data points are always kept
+        self.assertTrue(set(np.argsort(self.Y[:, 0])[:5].tolist()) <= set(indices.tolist()))
+        # The subsample is reproducible with the same random number generator
+        np.testing.assert_array_equal(policy.select(self.X, self.Y, np.random.RandomState(1)), indices)
+        self.assertIsNone(policy.select(self.X[:20], self.Y[:20], np.random.RandomState(1)))
+        with self.assertRaises(ValueError):
+            KeepTopAndSubsample(max_size=20, top_fraction=2)
+
+    def test_reservoir(self):
+        rng = np.random.RandomState(1)
+        policy = Reservoir(max_size=10)
+        self.assertIsNone(policy.select(self.X[:10], self.Y[:10], rng))
+
+        indices = policy.select(self.X[:30], self.Y[:30], rng)
+        self.assertEqual(len(indices), 10)
+        self.assertTrue(np.all(indices < 30))
+
+        # New data points replace few of the sampled ones
+        new_indices = policy.select(self.X[:31], self.Y[:31], rng)
+        self.assertGreaterEqual(len(set(indices.tolist()) & set(new_indices.tolist())), 9)
+
+        # The reservoir is sampled anew if there are fewer data points
+        indices = policy.select(self.X[:20], self.Y[:20], np.random.RandomState(1))
+        self.assertTrue(np.all(indices < 20))
+        np.testing.assert_array_equal(
+            indices, Reservoir(max_size=10).select(self.X[:20], self.Y[:20], np.random.RandomState(1))
+        )
+
+    def test_reservoir_with_timeouts(self):
+        # The TIMEOUT runs come after the successful runs, hence a new successful run shifts them
+        X_success, Y_success = self.X[:40], self.Y[:40]
+        X_timeout, Y_timeout = self.X[40:], self.Y[40:]
+        rng = np.random.RandomState(1)
+        policy = Reservoir(max_size=10)
+        policy.select(np.vstack((X_success[:30], X_timeout)), np.vstack((Y_success[:30], Y_timeout)), rng)
+
+        for X, Y in (
+            (np.vstack((X_success[:31], X_timeout)), np.vstack((Y_success[:31], Y_timeout))),
+            # Also if the costs were rescaled
+            (np.vstack((X_success[:31], X_timeout)), 2 * np.vstack((Y_success[:31], Y_timeout))),
+        ):
+            # The reservoir is sampled anew instead of pointing to other data points
+            state = rng.get_state()
+            indices = policy.select(X, Y, rng)
+            expected_rng = np.random.RandomState()
+            expected_rng.set_state(state)
+            np.testing.assert_array_equal(indices, Reservoir(max_size=10).select(X, Y, expected_rng))
+
+
+if __name__ == "__main__":
+    unittest.main()
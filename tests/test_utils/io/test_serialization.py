@@ -0,0 +1,91 @@
+import io
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from smac.tae import StatusType
+from smac.utils.io.serialization import (
+    SERIALIZERS,
+    JSONSerializer,
+    MsgpackSerializer,
+    decode_enums,
+    encode_enums,
+    get_serializer,
+)
+
+__copyright__ = "Copyright 2022, AutoML.org Freiburg-Hannover"
+__license__ = "3-clause BSD"
+
+
+def get_available_serializers():
+    serializers = []
+    for name in SERIALIZERS:
+        try:
+            serializers.append(get_serializer(name))
+        except ImportError:
+            pass
+
+    return serializers
+
+
+class SerializationTest(unittest.TestCase):
+    def setUp(self):
+        self.obj = {
+            "data": [[[1, "inst", 0, 0.0], [0.5, 1, {"__enum__": "StatusType.SUCCESS"}, 0.0, 1.0, None]]],
+            "configs": {"1": {"a": 1, "b": "x", "c": 0.1}},
+            "nested": {"list": [1, [2.5, None], "s"], "empty": {}},
+        }
+
+    def test_round_trip(self):
+        for serializer in get_available_serializers():
+            self.assertEqual(serializer.loads(serializer.dumps(self.obj)), self.obj, serializer.name)
+
+            with tempfile.TemporaryDirectory() as tmpdir:
+                fn = os.path.join(tmpdir, "file")
+                serializer.dump(self.obj, fn)
+                self.assertEqual(serializer.load(fn), self.obj, serializer.name)
+
+    def test_numpy(self):
+        for serializer in get_available_serializers():
+            obj = serializer.loads(serializer.dumps({"a": np.int64(1), "b": np.float64(0.5), "c": np.arange(2)}))
+            self.assertEqual(obj, {"a": 1, "b": 0.5, "c": [0, 1]}, serializer.name)
+
+    def test_stream(self):
+        for serializer in get_available_serializers():
+            content = serializer.dumps_entry(self.obj) + serializer.dumps_entry({"x": 1})
+            self.assertEqual(list(serializer.iter_loads(io.BytesIO(content))), [self.obj, {"x": 1}], serializer.name)
+
+            # An incomplete last entry can not be read
+            entries = []
+            with self.assertRaises(ValueError):
+                for entry in serializer.iter_loads(io.BytesIO(content[:-2])):
+                    entries.append(entry)
+            self.assertEqual(entries, [self.obj], serializer.name)
+
+    def test_json_non_finite(self):
+        serializer = JSONSerializer()
+        obj = serializer.loads(serializer.dumps([np.nan, np.inf]))
+        self.assertTrue(np.isnan(obj[0]))
+        self.assertEqual(obj[1], np.inf)
+
+    def test_enums(self):
+        obj = {"status": StatusType.TIMEOUT, "list": [StatusType.CRASHED, (1, 2)], "other": "x"}
+        encoded = encode_enums(obj)
+        self.assertEqual(encoded["status"], {"__enum__": "StatusType.TIMEOUT"})
+        self.assertEqual(
+            decode_enums(encoded), {"status": StatusType.TIMEOUT, "list": [StatusType.CRASHED, [1, 2]], "other": "x"}
+        )
+
+    def test_get_serializer(self):
+        self.assertIsInstance(get_serializer(), JSONSerializer)
+        self.assertIsInstance(get_serializer(fn="runhistory.json"), JSONSerializer)
+        self.assertIsInstance(get_serializer(fn="runhistory.msgpack"), MsgpackSerializer)
+        self.assertIsInstance(get_serializer("json", fn="runhistory.msgpack"), JSONSerializer)
+        with self.assertRaises(ValueError):
+            get_serializer("pickle")
+
+
+if __name__ == "__main__":
+    unittest.main()